@@ -0,0 +1,121 @@
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from tree_engine import TreeEnsembleEngine
+
+BUNDLE_PATH = 'models/analytics_bundle.pkl'
+
+# Incrémenté lorsque la structure du bundle change
+BUNDLE_VERSION = 1
+
+# Colonnes de segmentation des agrégats de dépenses
+SEGMENT_COLUMNS = ['owner', 'selfemp', 'card']
+
+DEFAULT_BINS = 40
+
+def histogram(values, bins=DEFAULT_BINS):
+    """Histogramme précalculé : effectifs et bornes des classes"""
+    counts, edges = np.histogram(np.asarray(values, dtype=np.float64), bins=bins)
+    return {'counts': counts, 'edges': edges}
+
+def feature_importances(model, feature_names):
+    """Importances triées par ordre croissant, ou None si le modèle n'en fournit pas"""
+    # Seul le moteur compilé est déballé : l'attribut ``estimator`` des forêts
+    # scikit-learn est le gabarit non entraîné de leurs arbres
+    if isinstance(model, TreeEnsembleEngine) and model.estimator is not None:
+        model = model.estimator
+    if not hasattr(model, 'feature_importances_'):
+        return None
+    importances = pd.DataFrame({'Variable': list(feature_names), 'Importance': model.feature_importances_})
+    return importances.sort_values('Importance', ascending=True).reset_index(drop=True)
+
+def segment_aggregates(df, target='expenditure', segments=SEGMENT_COLUMNS):
+    """
+    Statistiques de ``target`` par modalité de chaque colonne de segmentation
+
+    Les moustaches suivent la convention de Tukey (dernière valeur à moins de
+    1,5 écart interquartile des quartiles), comme les boîtes de plotly.
+
+    Returns:
+    --------
+    dict
+        ``{colonne: DataFrame}`` indexé par modalité (count, mean, median,
+        q1, q3, min, max, lowerfence, upperfence)
+    """
+    aggregates = {}
+    for column in segments:
+        if column not in df.columns:
+            continue
+        rows = {}
+        for value, group in df.groupby(column)[target]:
+            values = group.to_numpy(dtype=np.float64)
+            q1, median, q3 = np.percentile(values, [25, 50, 75])
+            iqr = q3 - q1
+            inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+            rows[value] = {'count': len(values), 'mean': values.mean(), 'median': median, 'q1': q1, 'q3': q3,
+                           'min': values.min(), 'max': values.max(),
+                           'lowerfence': inside.min(), 'upperfence': inside.max()}
+        aggregates[column] = pd.DataFrame.from_dict(rows, orient='index')
+    return aggregates
+
+def build_bundle(df, y_true, y_pred, metrics, importances=None, scope='test', target='expenditure',
+                 data_hash=None, model_hash=None, bins=DEFAULT_BINS):
+    """
+    Assemble le bundle d'analyse affiché par la page Analyse d'app.py
+
+    Parameters:
+    -----------
+    df : pandas.DataFrame
+        Jeu de données brut complet (distribution, segments, corrélations)
+    y_true, y_pred : array-like
+        Valeurs réelles et prédites sur lesquelles portent les métriques
+    metrics : dict
+        rmse, mae, r2 et éventuellement cv_score, cv_rmse, model_name
+    importances : pandas.DataFrame, optional
+        Résultat de ``feature_importances``
+    scope : str
+        'test' (jeu de test de l'entraînement) ou 'dataset' (jeu complet)
+    data_hash, model_hash : str, optional
+        Empreintes des fichiers dont le bundle est issu
+
+    Returns:
+    --------
+    dict
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    return {
+        'version': BUNDLE_VERSION,
+        'scope': scope,
+        'data_hash': data_hash,
+        'model_hash': model_hash,
+        'metrics': dict(metrics),
+        'y_true': y_true,
+        'y_pred': y_pred,
+        'residual_histogram': histogram(y_true - y_pred, bins),
+        'target_histogram': histogram(df[target], bins),
+        'importances': importances,
+        'correlation': df.select_dtypes(include=[np.number]).corr(),
+        'segments': segment_aggregates(df, target)
+    }
+
+def save_bundle(bundle, path=BUNDLE_PATH):
+    """Écriture atomique du bundle"""
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def load_bundle(path=BUNDLE_PATH):
+    """Retourne le bundle, ou None s'il est absent ou d'une version incompatible"""
+    try:
+        with open(path, 'rb') as f:
+            bundle = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if not isinstance(bundle, dict) or bundle.get('version') != BUNDLE_VERSION:
+        return None
+    return bundle
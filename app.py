@@ -1,52 +1,186 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import pickle
-import plotly.express as px
-import plotly.graph_objects as go
-from streamlit_lottie import st_lottie
-import requests
 from streamlit_option_menu import option_menu
-import json
+import importlib.util
 import os
 
+# Les modules lourds (pandas, scikit-learn, plotly, modèle, animations) sont
+# importés par les pages qui s'en servent : l'accueil démarre sans eux.
+# Profil : python -X importtime -c "import app" 2> importtime.txt
+
+DATA_PATH = 'AER_credit_card_data.csv'
+
+# Lignes affichées dans l'aperçu de la page de prédiction par lot
+BATCH_PREVIEW_ROWS = 200
+
+# Lecture et écriture Parquet (pandas délègue à pyarrow ou fastparquet) ;
+# sans moteur installé, la page de prédiction par lot se limite au CSV
+PARQUET_AVAILABLE = any(importlib.util.find_spec(engine) is not None for engine in ('pyarrow', 'fastparquet'))
+
+# Libellés des variables numériques dans les graphiques
+FEATURE_LABELS = {
+    'income': "Revenu annuel",
+    'share': "Part du revenu sur la carte",
+    'age': "Âge",
+    'reports': "Rapports de crédit",
+    'dependents': "Personnes à charge",
+    'months': "Ancienneté du compte (mois)",
+    'majorcards': "Cartes principales",
+    'active': "Comptes actifs",
+    'owner': "Propriétaire",
+    'selfemp': "Travailleur indépendant",
+    'card': "Carte de crédit acceptée"
+}
+
 # --------- UTILS ---------
+@st.cache_data(show_spinner=False, max_entries=16)
+def _file_hash(path, mtime_ns, size):
+    from predict_expenditure import file_sha256
+    return file_sha256(path)
+
+def file_hash(path):
+    """Empreinte SHA-256 d'un fichier, recalculée seulement si sa date ou sa taille change"""
+    stat = os.stat(path)
+    return _file_hash(path, stat.st_mtime_ns, stat.st_size)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_analytics(bundle_hash):
+    # bundle_hash fait partie de la clé du cache : un nouveau bundle est relu
+    from analytics_bundle import BUNDLE_PATH, load_bundle
+    return load_bundle(BUNDLE_PATH)
+
+@st.cache_data(show_spinner="Calcul des analyses...", max_entries=4)
+def compute_analysis(data_hash, model_hash):
+    """
+    Bundle d'analyse calculé dans l'application, sur l'ensemble du jeu de
+    données, lorsque l'entraînement n'a pas produit de bundle à jour
+
+    Le résultat est partagé entre les relances et les sessions ; il n'est
+    recalculé que si l'empreinte du jeu de données ou de l'artefact change.
+    """
+    import numpy as np
+    import pandas as pd
+    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+    from analytics_bundle import build_bundle, feature_importances
+    from predict_expenditure import get_predictor
+    df = pd.read_csv(DATA_PATH)
+    y = df['expenditure']
+    # Même encodage que les prédictions (Featurizer compilé depuis scaler_X),
+    # avec le modèle déjà chargé par le prédicteur partagé
+    predictor = get_predictor()
+    model, _, _, featurizer = predictor.components()
+    y_pred = predictor.predict(df)
+    mse = mean_squared_error(y, y_pred)
+    metrics = {'mse': mse, 'rmse': np.sqrt(mse), 'mae': mean_absolute_error(y, y_pred), 'r2': r2_score(y, y_pred)}
+    return build_bundle(df, y, y_pred, metrics, feature_importances(model, featurizer.feature_names), scope='dataset',
+                        data_hash=data_hash, model_hash=model_hash)
+
+def get_analytics():
+    """
+    Bundle d'analyse de la page Analyse : celui produit par l'entraînement
+    s'il correspond au jeu de données et à l'artefact courants, sinon un
+    bundle calculé (une fois) sur l'ensemble des données
+    """
+    from analytics_bundle import BUNDLE_PATH
+    from predict_expenditure import MODEL_PATH
+    data_hash, model_hash = file_hash(DATA_PATH), file_hash(MODEL_PATH)
+    if os.path.exists(BUNDLE_PATH):
+        bundle = load_analytics(file_hash(BUNDLE_PATH))
+        if bundle is not None and bundle['data_hash'] == data_hash and bundle['model_hash'] == model_hash:
+            return bundle
+    return compute_analysis(data_hash, model_hash)
+
+@st.cache_data(show_spinner="Calcul des courbes de dépendance partielle...", max_entries=4)
+def load_partial_dependence(model_hash, data_hash):
+    # Lues à côté de l'artefact si elles sont à jour, sinon calculées et enregistrées
+    from partial_dependence import load_or_compute
+    from predict_expenditure import MODEL_PATH, get_predictor
+    return load_or_compute(MODEL_PATH, DATA_PATH, predictor=get_predictor())
+
+def get_partial_dependence():
+    """Courbes PD/ICE du modèle courant, mises en cache par empreinte du modèle et des données"""
+    from predict_expenditure import MODEL_PATH
+    return load_partial_dependence(file_hash(MODEL_PATH), file_hash(DATA_PATH))
+
+def histogram_figure(histogram, color):
+    """Barres d'un histogramme précalculé (effectifs et bornes des classes)"""
+    import numpy as np
+    import plotly.graph_objects as go
+    edges = histogram['edges']
+    return go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=histogram['counts'], width=np.diff(edges),
+                            marker_color=color, marker_line_width=0))
+
+def model_signature():
+    """Empreinte de l'artefact chargé par le prédicteur partagé"""
+    from predict_expenditure import get_predictor
+    predictor = get_predictor()
+    predictor.components()
+    return predictor.artifact_hash
+
+@st.cache_data(show_spinner=False)
+def feature_ranges():
+    """Minimum et maximum observés de chaque variable numérique du jeu de données"""
+    import pandas as pd
+    from what_if import SWEEPABLE_COLUMNS
+    df = pd.read_csv(DATA_PATH, usecols=SWEEPABLE_COLUMNS)
+    return {col: (float(df[col].min()), float(df[col].max())) for col in SWEEPABLE_COLUMNS}
+
+@st.cache_data(show_spinner="Simulation en cours...", max_entries=64)
+def compute_what_if(model_hash, base_items, grid_spec):
+    """
+    Grille what-if mise en cache par (empreinte du modèle, profil de base, grille)
+
+    Parameters:
+    -----------
+    model_hash : str
+        Empreinte de l'artefact (la grille est recalculée après réentraînement)
+    base_items : tuple
+        Profil de base, sous forme de paires (variable, valeur) triées
+    grid_spec : tuple
+        (x_feature, x_min, x_max, y_feature, y_min, y_max, points par axe)
+
+    Returns:
+    --------
+    (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        Valeurs des axes x et y, matrice (y, x) des dépenses prédites
+    """
+    import numpy as np
+    from what_if import evaluate_grid
+    x_feature, x_min, x_max, y_feature, y_min, y_max, resolution = grid_spec
+    x_values = np.linspace(x_min, x_max, resolution)
+    y_values = np.linspace(y_min, y_max, resolution)
+    return x_values, y_values, evaluate_grid(dict(base_items), x_feature, x_values, y_feature, y_values)
+
 @st.cache_resource
-def load_model():
-    with open('models/best_regression_model.pkl', 'rb') as f:
-        data = pickle.load(f)
-    return data['model'], data['scaler_X'], data['scaler_y'], data.get('metrics', None)
-
-def load_lottieurl(url: str, local_file: str = None):
-    if local_file and os.path.exists(local_file):
-        try:
-            with open(local_file, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            st.warning(f"Erreur lors du chargement du fichier local {local_file} : {str(e)}")
-    try:
-        r = requests.get(url, timeout=5)
-        if r.status_code == 200:
-            return r.json()
-        else:
-            st.warning(f"Échec du chargement de l'animation depuis l'URL : {url}. Code de statut : {r.status_code}")
-    except Exception as e:
-        st.warning(f"Erreur lors du chargement de l'animation depuis l'URL : {str(e)}")
-    return None
+def get_prediction_cache():
+    # Partagé par toutes les sessions ; vidé si l'artefact du modèle change
+    from prediction_cache import PredictionCache
+    return PredictionCache(max_entries=10000, ttl=24 * 3600)
 
 # --------- ANIMATIONS ---------
-credit_animation = load_lottieurl(
-    "https://lottie.host/8f7a5303-d6fc-4f53-a251-83e668af0dde/K2g0gSOKlQ.json",
-    "animations/credit_animation.json"
-)
-loading_animation = load_lottieurl(
-    "https://lottie.host/7b6e1d43-4b53-4124-90e0-2a0f10d4eaff/6q3nNaM8zT.json",
-    "animations/loading_animation.json"
-)
-about_animation = load_lottieurl(
-    "https://lottie.host/4e8f2a3b-0e32-4a98-9e1c-6e94e5d39e2a/6d5w1O8pY8.json",
-    "animations/about_animation.json"
-)
+# Fichiers locaux de référence ; l'URL ne sert qu'à recréer un fichier manquant
+LOTTIE_ANIMATIONS = {
+    'credit': ("https://lottie.host/8f7a5303-d6fc-4f53-a251-83e668af0dde/K2g0gSOKlQ.json",
+               "animations/credit_animation.json"),
+    'loading': ("https://lottie.host/7b6e1d43-4b53-4124-90e0-2a0f10d4eaff/6q3nNaM8zT.json",
+                "animations/loading_animation.json"),
+    'about': ("https://lottie.host/4e8f2a3b-0e32-4a98-9e1c-6e94e5d39e2a/6d5w1O8pY8.json",
+              "animations/about_animation.json")
+}
+
+@st.cache_resource
+def get_lottie_assets():
+    # Partagé par toutes les sessions : chaque animation est lue une seule fois
+    # par processus, un fichier manquant est téléchargé en arrière-plan
+    from lottie_assets import LottieAssets
+    return LottieAssets(LOTTIE_ANIMATIONS)
+
+def show_animation(name, height, key, fallback="Animation non disponible"):
+    animation = get_lottie_assets().get(name)
+    if animation:
+        from streamlit_lottie import st_lottie
+        st_lottie(animation, height=height, key=key)
+    else:
+        st.markdown(f"<p style='text-align:center; color:#4b5563; font-size:0.9rem;'>{fallback}</p>", unsafe_allow_html=True)
 
 # --------- CONFIGURATION DE LA PAGE ---------
 st.set_page_config(
@@ -361,15 +495,12 @@ st.markdown("""
 # --------- BARRE LATÉRALE ---------
 with st.sidebar:
     st.markdown("<div class='section-card' style='text-align:center; padding: 1rem;'>", unsafe_allow_html=True)
-    if credit_animation:
-        st_lottie(credit_animation, height=120, key="sidebar_animation")
-    else:
-        st.markdown("<p style='text-align:center; color:#4b5563; font-size:0.9rem;'>Animation non disponible</p>", unsafe_allow_html=True)
+    show_animation('credit', 120, "sidebar_animation")
     st.markdown("</div>", unsafe_allow_html=True)
     selected = option_menu(
         menu_title="Navigation",
-        options=["Accueil", "Prédiction", "Analyse", "À Propos"],
-        icons=['house-fill', 'credit-card-2-front-fill', 'graph-up', 'info-circle-fill'],
+        options=["Accueil", "Prédiction", "Lot", "Analyse", "À Propos"],
+        icons=['house-fill', 'credit-card-2-front-fill', 'file-earmark-spreadsheet-fill', 'graph-up', 'info-circle-fill'],
         menu_icon="menu-button-wide-fill",
         default_index=0,
         styles={
@@ -423,10 +554,7 @@ if selected == "Accueil":
         </div>
         """, unsafe_allow_html=True)
     with col2:
-        if credit_animation:
-            st_lottie(credit_animation, height=220, key="main_animation")
-        else:
-            st.markdown("<p style='text-align:center; color:#4b5563; font-size:0.9rem;'>Animation non disponible</p>", unsafe_allow_html=True)
+        show_animation('credit', 220, "main_animation")
         st.markdown("""
         <div class='metric-card card-fade'>
             <h3>📈 Impact</h3>
@@ -464,36 +592,29 @@ elif selected == "Prédiction":
         submit_button = st.form_submit_button("💡 Prédire", use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
+    client = {
+        'income': income,
+        'share': share,
+        'age': age,
+        'owner': owner,
+        'selfemp': selfemp,
+        'reports': reports,
+        'dependents': dependents,
+        'months': months,
+        'majorcards': majorcards,
+        'active': active
+    }
     if submit_button:
         with st.spinner("Prédiction en cours..."):
-            if loading_animation:
-                st_lottie(loading_animation, height=100, key="loading")
-            else:
-                st.markdown("<p style='text-align:center; color:#4b5563; font-size:0.9rem;'>Chargement...</p>", unsafe_allow_html=True)
-            input_df = pd.DataFrame({
-                'income': [income],
-                'share': [share],
-                'age': [age],
-                'owner_No': [1 if owner == "Non" else 0],
-                'owner_Yes': [1 if owner == "Oui" else 0],
-                'selfemp_No': [1 if selfemp == "Non" else 0],
-                'selfemp_Yes': [1 if selfemp == "Oui" else 0],
-                'reports': [reports],
-                'dependents': [dependents],
-                'months': [months],
-                'majorcards': [majorcards],
-                'active': [active]
-            })
-            model, scaler_X, scaler_y, metrics = load_model()
-            X_cols = scaler_X.feature_names_in_
-            input_df = input_df.reindex(columns=X_cols, fill_value=0)
-            X_scaled = scaler_X.transform(input_df)
-            y_pred_scaled = model.predict(X_scaled)
-            y_pred = scaler_y.inverse_transform(y_pred_scaled.reshape(-1, 1)).ravel()[0]
+            show_animation('loading', 100, "loading", fallback="Chargement...")
+            # Encodage compilé depuis scaler_X.feature_names_in_ (Oui/Non inclus)
+            from predict_expenditure import get_predictor
+            y_pred = get_prediction_cache().predict(client, get_predictor())[0]
             st.markdown("<div class='section-card card-fade'>", unsafe_allow_html=True)
             st.markdown("<h2 class='section-title' style='text-align:center;'>Résultat de la Prédiction</h2>", unsafe_allow_html=True)
             st.metric("Dépense Prédite ($)", f"{y_pred:,.2f}", delta_color="normal")
             if real_expenditure > 0:
+                import plotly.graph_objects as go
                 st.metric("Dépense Réelle ($)", f"{real_expenditure:,.2f}", delta=f"{y_pred-real_expenditure:,.2f}")
                 fig = go.Figure()
                 fig.add_trace(go.Bar(
@@ -516,6 +637,183 @@ elif selected == "Prédiction":
                 st.plotly_chart(fig, use_container_width=True)
             st.markdown("</div>", unsafe_allow_html=True)
 
+            # Contributions exactes des variables (TreeSHAP), calculées avec chaque prédiction
+            st.markdown("<div class='section-card card-fade'>", unsafe_allow_html=True)
+            st.markdown("<h4 class='section-title'>Explication de la Prédiction</h4>", unsafe_allow_html=True)
+            if not get_predictor().explainable():
+                st.info("L'explication par variable n'est disponible que pour les forêts aléatoires et XGBoost.")
+            else:
+                _, base_value, contributions = get_predictor().explain(client)
+                import plotly.graph_objects as go
+                from tree_contributions import group_contributions
+                columns, grouped = group_contributions(contributions, get_predictor().featurizer)
+                order = sorted(range(len(columns)), key=lambda j: abs(grouped[0, j]), reverse=True)
+                labels = [FEATURE_LABELS.get(columns[j], columns[j]) + (f" = {client[columns[j]]}" if columns[j] in client else "")
+                          for j in order]
+                fig = go.Figure(go.Waterfall(
+                    orientation="h",
+                    measure=["absolute"] + ["relative"] * len(order) + ["total"],
+                    y=["Dépense moyenne"] + labels + ["Dépense prédite"],
+                    x=[base_value] + [grouped[0, j] for j in order] + [0],
+                    text=[f"{base_value:,.2f}"] + [f"{grouped[0, j]:+,.2f}" for j in order] + [f"{y_pred:,.2f}"],
+                    increasing=dict(marker=dict(color="#2563eb")),
+                    decreasing=dict(marker=dict(color="#ca8a04")),
+                    totals=dict(marker=dict(color="#1e3a8a")),
+                    connector=dict(line=dict(color="#94a3b8"))
+                ))
+                fig.update_layout(
+                    xaxis_title="Dépense ($)",
+                    yaxis=dict(autorange="reversed"),
+                    template="plotly_white",
+                    height=120 + 32 * len(order),
+                    showlegend=False,
+                    margin=dict(l=20, r=20, t=30, b=20),
+                    font=dict(family="Inter, sans-serif", color="#1f2937"),
+                    plot_bgcolor="rgba(0,0,0,0)",
+                    paper_bgcolor="rgba(0,0,0,0)"
+                )
+                st.plotly_chart(fig, use_container_width=True)
+                st.markdown("<p style='color:#4b5563; font-size:0.9rem;'>Partant de la dépense moyenne prédite, chaque barre "
+                            "indique de combien la valeur saisie d'une variable augmente ou diminue la prédiction "
+                            "(valeurs de Shapley exactes des arbres du modèle).</p>", unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+
+    # Simulation what-if : le profil saisi sert de base, deux variables sont balayées
+    with st.expander("🧭 Simulation what-if : sensibilité de la dépense à deux variables"):
+        from what_if import DEFAULT_RESOLUTION, SWEEPABLE_COLUMNS
+        ranges = feature_ranges()
+        col1, col2 = st.columns(2, gap="large")
+        with col1:
+            x_feature = st.selectbox("Variable en abscisse", SWEEPABLE_COLUMNS,
+                                     index=SWEEPABLE_COLUMNS.index('income'), format_func=FEATURE_LABELS.get)
+            x_range = st.slider("Plage en abscisse", *ranges[x_feature], value=ranges[x_feature], key=f"x_range_{x_feature}")
+        with col2:
+            y_options = [col for col in SWEEPABLE_COLUMNS if col != x_feature]
+            y_feature = st.selectbox("Variable en ordonnée", y_options,
+                                     index=y_options.index('age') if 'age' in y_options else 0, format_func=FEATURE_LABELS.get)
+            y_range = st.slider("Plage en ordonnée", *ranges[y_feature], value=ranges[y_feature], key=f"y_range_{y_feature}")
+        col1, col2 = st.columns(2, gap="large")
+        resolution = col1.slider("Points par axe", min_value=20, max_value=300, value=DEFAULT_RESOLUTION, step=10)
+        chart = col2.radio("Représentation", ["Carte de chaleur", "Contours"], horizontal=True)
+
+        grid_spec = (x_feature, *x_range, y_feature, *y_range, resolution)
+        x_values, y_values, Z = compute_what_if(model_signature(), tuple(sorted(client.items())), grid_spec)
+
+        import plotly.graph_objects as go
+        trace = go.Heatmap if chart == "Carte de chaleur" else go.Contour
+        fig = go.Figure(trace(x=x_values, y=y_values, z=Z, colorscale=["#f8fafc", "#2563eb", "#1e3a8a"],
+                              colorbar=dict(title="Dépense ($)")))
+        if x_range[0] <= client[x_feature] <= x_range[1] and y_range[0] <= client[y_feature] <= y_range[1]:
+            fig.add_trace(go.Scatter(x=[client[x_feature]], y=[client[y_feature]], mode="markers",
+                                     marker=dict(color="#ca8a04", size=12, symbol="x"), name="Profil saisi"))
+        fig.update_layout(
+            xaxis_title=FEATURE_LABELS[x_feature],
+            yaxis_title=FEATURE_LABELS[y_feature],
+            template="plotly_white",
+            height=500,
+            showlegend=False,
+            margin=dict(l=20, r=20, t=30, b=20),
+            font=dict(family="Inter, sans-serif", color="#1f2937"),
+            plot_bgcolor="rgba(0,0,0,0)",
+            paper_bgcolor="rgba(0,0,0,0)"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        st.markdown(f"<p style='color:#4b5563; font-size:0.9rem;'>{resolution * resolution:,} profils évalués en un seul appel au modèle. "
+                    f"Dépense prédite de {Z.min():,.2f} $ à {Z.max():,.2f} $.</p>", unsafe_allow_html=True)
+
+# --------- PRÉDICTION PAR LOT ---------
+elif selected == "Lot":
+    import io
+    import time
+    import pandas as pd
+    from batch_scoring import count_rows, iter_chunks, score_chunk
+    from predict_expenditure import REQUIRED_COLUMNS, get_predictor
+
+    st.markdown("""
+        <div class='header-container card-fade'>
+            <h1 class='section-title' style='color:white;'>🗂️ Prédiction par Lot</h1>
+            <p style='font-size:1.2rem; color:#f8fafc;'>Téléversez un fichier de clients pour estimer toutes leurs dépenses en une fois.</p>
+        </div>
+    """, unsafe_allow_html=True)
+    st.markdown(f"""
+        <div class='section-card card-fade'>
+            <p style='color:#4b5563; font-size:1rem;'>Fichier {"CSV ou Parquet" if PARQUET_AVAILABLE else "CSV"} avec les colonnes <b>{', '.join(REQUIRED_COLUMNS)}</b>
+            (owner et selfemp : yes/no ou Oui/Non). Les lignes incomplètes sont conservées, sans prédiction.</p>
+        </div>
+    """, unsafe_allow_html=True)
+    col1, col2 = st.columns([3, 1], gap="large")
+    with col1:
+        uploaded = st.file_uploader("Fichier clients", type=["csv", "parquet"] if PARQUET_AVAILABLE else ["csv"])
+    with col2:
+        chunk_size = st.number_input("Lignes par bloc", min_value=1000, max_value=100000, value=10000, step=1000,
+                                     help="Nombre de lignes validées et prédites en un seul appel au modèle")
+
+    if uploaded is not None:
+        predictor = get_predictor()
+        predictor.components()
+        fmt = 'parquet' if uploaded.name.lower().endswith(('.parquet', '.pq')) else 'csv'
+        run_key = (uploaded.file_id, chunk_size, predictor.artifact_hash)
+        results = st.session_state.get('batch_results')
+
+        # Un nouveau fichier (ou un nouveau modèle) est scoré une fois ; les
+        # relances suivantes (téléchargement, navigation) réutilisent le résultat
+        if results is None or results['key'] != run_key:
+            total = count_rows(uploaded, fmt)
+            progress = st.progress(0.0, text="Validation et prédiction...")
+            preview = st.empty()
+            scored, n_rows, n_incomplete = [], 0, 0
+            start = time.perf_counter()
+            try:
+                for chunk in iter_chunks(uploaded, chunk_size, fmt):
+                    chunk, incomplete = score_chunk(chunk, predictor)
+                    if n_rows < BATCH_PREVIEW_ROWS:
+                        preview.dataframe(pd.concat(scored + [chunk]).head(BATCH_PREVIEW_ROWS), use_container_width=True)
+                    scored.append(chunk)
+                    n_rows += len(chunk)
+                    n_incomplete += incomplete
+                    progress.progress(min(n_rows / max(total, 1), 1.0), text=f"{n_rows:,} / {total:,} lignes scorées")
+            except ValueError as e:
+                progress.empty()
+                preview.empty()
+                st.error(f"Fichier invalide (bloc commençant à la ligne {n_rows + 1}) : {e}")
+                st.stop()
+            progress.empty()
+            preview.empty()
+            frame = pd.concat(scored, ignore_index=True) if scored else pd.DataFrame()
+            parquet = None
+            if PARQUET_AVAILABLE:
+                parquet = io.BytesIO()
+                frame.to_parquet(parquet, index=False)
+            results = {
+                'key': run_key,
+                'name': os.path.splitext(uploaded.name)[0],
+                'frame': frame,
+                'incomplete': n_incomplete,
+                'seconds': time.perf_counter() - start,
+                'csv': frame.to_csv(index=False).encode('utf-8'),
+                'parquet': parquet.getvalue() if parquet is not None else None
+            }
+            st.session_state['batch_results'] = results
+
+        frame = results['frame']
+        st.markdown("<div class='section-card card-fade'>", unsafe_allow_html=True)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Lignes scorées", f"{len(frame) - results['incomplete']:,}")
+        col2.metric("Lignes incomplètes", f"{results['incomplete']:,}")
+        col3.metric("Débit", f"{len(frame) / max(results['seconds'], 1e-9):,.0f} lignes/s")
+        if len(frame):
+            st.dataframe(frame.head(BATCH_PREVIEW_ROWS), use_container_width=True)
+            st.markdown(f"<p style='color:#4b5563; font-size:0.9rem;'>Aperçu des {min(len(frame), BATCH_PREVIEW_ROWS)} premières lignes. "
+                        f"Dépense prédite moyenne : {frame['predicted_expenditure'].mean():,.2f} $</p>", unsafe_allow_html=True)
+        col1, col2 = st.columns(2)
+        col1.download_button("⬇️ Télécharger (CSV)", results['csv'], file_name=f"{results['name']}_predictions.csv",
+                             mime="text/csv", use_container_width=True)
+        if results['parquet'] is not None:
+            col2.download_button("⬇️ Télécharger (Parquet)", results['parquet'],
+                                 file_name=f"{results['name']}_predictions.parquet",
+                                 mime="application/octet-stream", use_container_width=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+
 # --------- ANALYSE ---------
 elif selected == "Analyse":
     st.markdown("""
@@ -525,53 +823,42 @@ elif selected == "Analyse":
         </div>
     """, unsafe_allow_html=True)
 
-    df = pd.read_csv('AER_credit_card_data.csv')
-    X = df.drop(['expenditure', 'card'], axis=1)
-    y = df['expenditure']
-    X = pd.get_dummies(X, columns=['owner', 'selfemp'])
-    model, scaler_X, scaler_y, metrics = load_model()
-    X = X.reindex(columns=scaler_X.feature_names_in_, fill_value=0)
-    X_scaled = scaler_X.transform(X)
-    y_pred_scaled = model.predict(X_scaled)
-    y_pred = scaler_y.inverse_transform(y_pred_scaled.reshape(-1, 1)).ravel()
-    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-    mse = mean_squared_error(y, y_pred)
-    rmse = np.sqrt(mse)
-    mae = mean_absolute_error(y, y_pred)
-    r2 = r2_score(y, y_pred)
+    import numpy as np
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    bundle = get_analytics()
+    metrics = bundle['metrics']
+    y_true, y_pred = bundle['y_true'], bundle['y_pred']
+    on_test = bundle['scope'] == 'test'
+    scope_label = "test" if on_test else "ensemble des données"
 
     st.markdown("<div class='metric-card card-fade'>", unsafe_allow_html=True)
     st.markdown("<h3 style='font-family:Poppins, sans-serif;'>✨ Performance du Modèle</h3>", unsafe_allow_html=True)
-    if metrics:
-        st.markdown(f"""
-            <ul class="metric-list">
-                <li><b>RMSE (test)</b>: {metrics.get('rmse', 'N/A'):.2f}</li>
-                <li><b>MAE (test)</b>: {metrics.get('mae', 'N/A'):.2f}</li>
-                <li><b>R² (test)</b>: {metrics.get('r2', 'N/A'):.3f}</li>
-                {f"<li><b>Score CV</b>: {metrics['cv_score']:.3f}</li>" if 'cv_score' in metrics else ""}
-            </ul>
-        """, unsafe_allow_html=True)
-    else:
-        st.markdown(f"""
-            <p style='color:#f8fafc; font-size:0.9rem;'>(Métriques calculées sur l'ensemble des données)</p>
-            <ul class="metric-list">
-                <li><b>RMSE</b>: {rmse:.2f}</li>
-                <li><b>MAE</b>: {mae:.2f}</li>
-                <li><b>R²</b>: {r2:.3f}</li>
-            </ul>
-        """, unsafe_allow_html=True)
+    if not on_test:
+        st.markdown("<p style='color:#f8fafc; font-size:0.9rem;'>(Métriques calculées sur l'ensemble des données)</p>",
+                    unsafe_allow_html=True)
+    st.markdown(f"""
+        <ul class="metric-list">
+            {f"<li><b>Modèle</b>: {metrics['model_name']}</li>" if 'model_name' in metrics else ""}
+            <li><b>RMSE ({scope_label})</b>: {metrics['rmse']:.2f}</li>
+            <li><b>MAE ({scope_label})</b>: {metrics['mae']:.2f}</li>
+            <li><b>R² ({scope_label})</b>: {metrics['r2']:.3f}</li>
+            {f"<li><b>RMSE CV</b>: {metrics['cv_rmse']:.2f}</li>" if 'cv_rmse' in metrics else ""}
+        </ul>
+    """, unsafe_allow_html=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
     st.markdown("<hr class='section-sep'/><div class='section-title-visual'>Analyse Visuelle</div>", unsafe_allow_html=True)
 
     # Nuage de Points
-    st.markdown("""
+    st.markdown(f"""
         <div class="visual-card card-fade">
             <h4 class='section-title'>1. Prédictions vs Valeurs Réelles</h4>
-            <p style='color:#4b5563; font-size:0.9rem;'>Chaque point représente un client. La proximité avec la diagonale indique une meilleure précision.</p>
+            <p style='color:#4b5563; font-size:0.9rem;'>Chaque point représente un client ({scope_label}). La proximité avec la diagonale indique une meilleure précision.</p>
     """, unsafe_allow_html=True)
     fig1 = px.scatter(
-        x=y, y=y_pred,
+        x=y_true, y=y_pred,
         labels={'x': 'Valeur Réelle ($)', 'y': 'Valeur Prédite ($)'},
         color_discrete_sequence=["#2563eb"],
         template="plotly_white",
@@ -579,8 +866,8 @@ elif selected == "Analyse":
     )
     fig1.add_shape(
         type="line",
-        x0=y.min(), y0=y.min(),
-        x1=y.max(), y1=y.max(),
+        x0=y_true.min(), y0=y_true.min(),
+        x1=y_true.max(), y1=y_true.max(),
         line=dict(color="#ca8a04", dash="dash", width=2)
     )
     fig1.update_layout(
@@ -600,12 +887,9 @@ elif selected == "Analyse":
             <h4 class='section-title'>2. Distribution des Dépenses</h4>
             <p style='color:#4b5563; font-size:0.9rem;'>Répartition des dépenses annuelles des clients.</p>
     """, unsafe_allow_html=True)
-    fig2 = px.histogram(
-        df, x="expenditure", nbins=40,
-        color_discrete_sequence=["#1e3a8a"],
-        template="plotly_white"
-    )
+    fig2 = histogram_figure(bundle['target_histogram'], "#1e3a8a")
     fig2.update_layout(
+        template="plotly_white",
         xaxis_title="Dépense Annuelle ($)",
         yaxis_title="Nombre de Clients",
         height=350,
@@ -617,17 +901,34 @@ elif selected == "Analyse":
     st.plotly_chart(fig2, use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
+    # Résidus
+    st.markdown(f"""
+        <div class="visual-card card-fade">
+            <h4 class='section-title'>3. Distribution des Résidus</h4>
+            <p style='color:#4b5563; font-size:0.9rem;'>Écarts entre dépenses réelles et prédites ({scope_label}).</p>
+    """, unsafe_allow_html=True)
+    fig_residuals = histogram_figure(bundle['residual_histogram'], "#2563eb")
+    fig_residuals.update_layout(
+        template="plotly_white",
+        xaxis_title="Résidu ($)",
+        yaxis_title="Nombre de Clients",
+        height=350,
+        margin=dict(l=20, r=20, t=30, b=20),
+        font=dict(family="Inter, sans-serif", color="#1f2937"),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)"
+    )
+    st.plotly_chart(fig_residuals, use_container_width=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
     # Importance des Variables
     st.markdown("""
         <div class="visual-card card-fade">
-            <h4 class='section-title'>3. Importance des Variables</h4>
+            <h4 class='section-title'>4. Importance des Variables</h4>
             <p style='color:#4b5563; font-size:0.9rem;'>Facteurs clés influençant les prédictions du modèle.</p>
     """, unsafe_allow_html=True)
-    if hasattr(model, "feature_importances_"):
-        importances = model.feature_importances_
-        features = X.columns
-        imp_df = pd.DataFrame({"Variable": features, "Importance": importances})
-        imp_df = imp_df.sort_values("Importance", ascending=True)
+    if bundle['importances'] is not None:
+        imp_df = bundle['importances']
         fig3 = px.bar(
             imp_df,
             x="Importance", y="Variable",
@@ -649,39 +950,45 @@ elif selected == "Analyse":
         st.info("L'importance des variables n'est pas disponible pour ce modèle.")
     st.markdown("</div>", unsafe_allow_html=True)
 
-    # Boîte à Moustaches
+    # Boîte à Moustaches (statistiques précalculées par segment)
     st.markdown("""
         <div class="visual-card card-fade">
-            <h4 class='section-title'>4. Dépenses par Statut de Propriétaire</h4>
-            <p style='color:#4b5563; font-size:0.9rem;'>Comparaison des dépenses selon le statut de propriété.</p>
+            <h4 class='section-title'>5. Dépenses par Segment</h4>
+            <p style='color:#4b5563; font-size:0.9rem;'>Comparaison des dépenses selon le statut de propriété, d'indépendant ou de détenteur de carte.</p>
     """, unsafe_allow_html=True)
-    fig4 = px.box(
-        df, x="owner", y="expenditure",
-        color="owner",
-        color_discrete_sequence=["#2563eb", "#1e3a8a"],
-        points="all",
-        template="plotly_white",
-        height=350
-    )
+    segment_labels = {'owner': "Statut de Propriétaire", 'selfemp': "Travailleur Indépendant", 'card': "Carte de Crédit"}
+    segment = st.selectbox("Segment", list(bundle['segments']), format_func=lambda c: segment_labels.get(c, c))
+    stats = bundle['segments'][segment]
+    fig4 = go.Figure()
+    for value, color in zip(stats.index, ["#2563eb", "#1e3a8a", "#ca8a04"]):
+        row = stats.loc[value]
+        fig4.add_trace(go.Box(
+            name=str(value), x=[str(value)], q1=[row['q1']], median=[row['median']], q3=[row['q3']],
+            lowerfence=[row['lowerfence']], upperfence=[row['upperfence']], mean=[row['mean']],
+            marker_color=color
+        ))
     fig4.update_layout(
-        xaxis_title="Statut de Propriétaire",
+        template="plotly_white",
+        xaxis_title=segment_labels.get(segment, segment),
         yaxis_title="Dépense Annuelle ($)",
         showlegend=False,
+        height=350,
         margin=dict(l=20, r=20, t=30, b=20),
         font=dict(family="Inter, sans-serif", color="#1f2937"),
         plot_bgcolor="rgba(0,0,0,0)",
         paper_bgcolor="rgba(0,0,0,0)"
     )
     st.plotly_chart(fig4, use_container_width=True)
+    st.dataframe(stats[['count', 'mean', 'median', 'min', 'max']].round(2), use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
     # Matrice de Corrélation
     st.markdown("""
         <div class="visual-card card-fade">
-            <h4 class='section-title'>5. Matrice de Corrélation</h4>
+            <h4 class='section-title'>6. Matrice de Corrélation</h4>
             <p style='color:#4b5563; font-size:0.9rem;'>Relations linéaires entre les variables du jeu de données.</p>
     """, unsafe_allow_html=True)
-    corr = df.select_dtypes(include=[np.number]).corr()
+    corr = bundle['correlation']
     fig5 = px.imshow(
         corr,
         text_auto=".2f",
@@ -699,6 +1006,42 @@ elif selected == "Analyse":
     st.plotly_chart(fig5, use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
+    # Dépendance partielle et courbes ICE
+    st.markdown("""
+        <div class="visual-card card-fade">
+            <h4 class='section-title'>7. Dépendance Partielle (PDP / ICE)</h4>
+            <p style='color:#4b5563; font-size:0.9rem;'>Dépense prédite moyenne lorsque seule la variable choisie varie (trait épais), et trajectoires de clients individuels (traits fins). Disponible pour tous les modèles, SVR compris.</p>
+    """, unsafe_allow_html=True)
+    curves = get_partial_dependence()
+    pdp_feature = st.selectbox("Variable", list(curves['features']), format_func=lambda c: FEATURE_LABELS.get(c, c))
+    curve = curves['features'][pdp_feature]
+    grid, ice = curve['grid'], curve['ice']
+    # Toutes les courbes ICE dans une seule trace, séparées par des valeurs manquantes
+    ice_x = np.tile(np.append(grid, np.nan), len(ice))
+    ice_y = np.column_stack([ice, np.full(len(ice), np.nan)]).ravel()
+    fig6 = go.Figure()
+    fig6.add_trace(go.Scatter(x=ice_x, y=ice_y, mode="lines", line=dict(color="rgba(37, 99, 235, 0.15)", width=1),
+                              name="ICE", hoverinfo="skip"))
+    fig6.add_trace(go.Scatter(x=grid, y=curve['pd'], mode="lines+markers", line=dict(color="#1e3a8a", width=4),
+                              name="Dépendance partielle"))
+    fig6.update_layout(
+        template="plotly_white",
+        xaxis_title=FEATURE_LABELS.get(pdp_feature, pdp_feature),
+        yaxis_title="Dépense Prédite ($)",
+        showlegend=False,
+        height=400,
+        margin=dict(l=20, r=20, t=30, b=20),
+        font=dict(family="Inter, sans-serif", color="#1f2937"),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)"
+    )
+    if curve['categorical']:
+        fig6.update_xaxes(tickvals=list(grid), ticktext=["Non" if value == 0 else "Oui" for value in grid])
+    st.plotly_chart(fig6, use_container_width=True)
+    st.markdown(f"<p style='color:#4b5563; font-size:0.9rem;'>Calculé sur {curves['n_rows']:,} clients ; "
+                f"colonnes du modèle : {', '.join(curve['encoded'])}.</p>", unsafe_allow_html=True)
+    st.markdown("</div>", unsafe_allow_html=True)
+
 # --------- À PROPOS ---------
 elif selected == "À Propos":
     st.markdown("""
@@ -709,10 +1052,7 @@ elif selected == "À Propos":
     """, unsafe_allow_html=True)
     col1, col2 = st.columns([1, 2], gap="large")
     with col1:
-        if about_animation:
-            st_lottie(about_animation, height=200, key="about_animation")
-        else:
-            st.markdown("<p style='text-align:center; color:#4b5563; font-size:0.9rem;'>Animation non disponible</p>", unsafe_allow_html=True)
+        show_animation('about', 200, "about_animation")
         st.markdown(f"""
             <div style='text-align:center;'>
                 <img src="https://avatars.githubusercontent.com/u/TheBeyonder237" class="about-avatar" style="width:160px; height:160px;" alt="Ngoue David">
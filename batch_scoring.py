@@ -0,0 +1,361 @@
+import argparse
+import collections
+import gc
+import json
+import multiprocessing
+import os
+import time
+import numpy as np
+import pandas as pd
+from predict_expenditure import MODEL_PATH, REQUIRED_COLUMNS, Predictor
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# Prédicteur des processus de travail : hérité du parent (fork) ou chargé
+# une fois par processus (spawn)
+_worker_predictor = None
+
+def detect_format(path):
+    """Déduit le format (csv, jsonl ou parquet) à partir de l'extension du fichier"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension == '.json':
+        # Un tableau JSON ne se lit pas par blocs : JSON Lines uniquement
+        raise ValueError(f"Fichier JSON non pris en charge: {path} (convertir en JSON Lines, "
+                         f"un enregistrement par ligne, extension .jsonl)")
+    if extension in ('.csv', '.txt'):
+        return 'csv'
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    raise ValueError(f"Format non reconnu pour {path} (attendu: .csv, .jsonl ou .parquet)")
+
+def iter_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, fmt=None):
+    """
+    Lit un fichier CSV, JSONL ou Parquet par blocs de ``chunk_size`` lignes
+
+    ``path`` peut aussi être un objet fichier binaire (ex. fichier téléversé),
+    ``fmt`` est alors obligatoire. Seul un bloc est en mémoire à la fois,
+    quelle que soit la taille du fichier.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+        return
+    if fmt == 'csv':
+        reader = pd.read_csv(path, chunksize=chunk_size)
+    else:
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size)
+    with reader:
+        for chunk in reader:
+            yield chunk
+
+def input_columns(path, fmt=None):
+    """Colonnes d'un fichier d'entrée sans lire ses lignes (vide pour JSONL)"""
+    fmt = fmt or detect_format(path)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return list(pq.ParquetFile(path).schema_arrow.names)
+    if fmt == 'csv':
+        return list(pd.read_csv(path, nrows=0).columns)
+    return []
+
+def count_rows(path, fmt=None):
+    """
+    Nombre de lignes de données, pour l'affichage de la progression
+
+    Lu dans les métadonnées pour Parquet, compté par blocs d'octets pour CSV
+    et JSONL (approximatif si des champs contiennent des retours à la ligne).
+    Un objet fichier est replacé au début.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        n_rows = pq.ParquetFile(path).metadata.num_rows
+    else:
+        f = open(path, 'rb') if isinstance(path, (str, os.PathLike)) else path
+        try:
+            newlines, last = 0, b'\n'
+            for block in iter(lambda: f.read(1 << 20), b''):
+                newlines += block.count(b'\n')
+                last = block[-1:]
+            n_lines = newlines + (last != b'\n')
+        finally:
+            if f is not path:
+                f.close()
+        n_rows = n_lines - 1 if fmt == 'csv' else n_lines
+    if hasattr(path, 'seek'):
+        path.seek(0)
+    return max(n_rows, 0)
+
+def score_chunk(chunk, predictor):
+    """
+    Ajoute la colonne ``predicted_expenditure`` à un bloc, en une seule
+    prédiction vectorisée
+
+    Les lignes auxquelles il manque une valeur sont exclues de la prédiction
+    et gardent une prédiction vide ; toute autre erreur (colonne manquante,
+    catégorie inconnue) lève ValueError.
+
+    Returns:
+    --------
+    (pandas.DataFrame, int)
+        Bloc complété et nombre de lignes incomplètes
+    """
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+    if missing_columns:
+        raise ValueError(f"Colonnes manquantes: {missing_columns}")
+    if len(chunk) == 0:
+        chunk['predicted_expenditure'] = np.empty(0)
+        return chunk, 0
+    columns = [col for col in predictor.featurizer.raw_columns if col in chunk.columns]
+    complete = chunk[columns].notna().all(axis=1).to_numpy()
+    n_incomplete = int(len(chunk) - complete.sum())
+    if n_incomplete == 0:
+        y_pred = predictor.predict(chunk)
+    else:
+        y_pred = np.full(len(chunk), np.nan)
+        if n_incomplete < len(chunk):
+            y_pred[complete] = predictor.predict(chunk[complete])
+    chunk['predicted_expenditure'] = y_pred
+    return chunk, n_incomplete
+
+def write_chunk(chunk, path, fmt, first):
+    """Ajoute un bloc de résultats au fichier de sortie"""
+    if fmt == 'csv':
+        chunk.to_csv(path, mode='w' if first else 'a', header=first, index=False)
+    else:
+        text = chunk.to_json(orient='records', lines=True, force_ascii=False) if len(chunk) else ''
+        with open(path, 'w' if first else 'a', encoding='utf-8') as f:
+            f.write(text if not text or text.endswith('\n') else text + '\n')
+
+def _limit_inner_threads(predictor, n_threads):
+    """Évite la sur-souscription : un seul thread BLAS/XGBoost par processus"""
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(n_threads)
+    except ImportError:
+        pass
+    model = predictor.components()[0]
+    # Moteur d'arbres compilé : l'estimateur d'origine traite les gros blocs
+    model = getattr(model, 'estimator', None) or model
+    if hasattr(model, 'n_jobs'):
+        model.n_jobs = n_threads
+
+def _init_worker(model_path, inner_threads):
+    global _worker_predictor
+    if _worker_predictor is None:
+        _worker_predictor = Predictor(model_path)
+    _limit_inner_threads(_worker_predictor, inner_threads)
+
+def _score_worker(chunk):
+    return score_chunk(chunk, _worker_predictor)
+
+def _worker_context():
+    # fork partage les pages du modèle déjà chargé en copie sur écriture
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+def iter_parallel_scores(chunks, predictor, workers, max_pending=None, inner_threads=1):
+    """
+    Score des blocs (``score_chunk``) sur un pool de processus et les
+    restitue dans l'ordre d'entrée
+
+    Le modèle est chargé une seule fois dans le processus parent avant la
+    création du pool ; avec ``fork``, les processus de travail en héritent
+    sans copie (``gc.freeze`` évite que le ramasse-miettes ne touche ces
+    pages). Au plus ``max_pending`` blocs sont en vol afin de borner la mémoire.
+
+    Yields:
+    -------
+    (pandas.DataFrame, int)
+        Bloc complété et nombre de lignes incomplètes, dans l'ordre de lecture
+    """
+    global _worker_predictor
+    max_pending = max_pending or 2 * workers
+    predictor.components()
+    ctx = _worker_context()
+    if ctx.get_start_method() == 'fork':
+        _worker_predictor = predictor
+        gc.collect()
+        gc.freeze()
+    try:
+        with ctx.Pool(workers, initializer=_init_worker,
+                      initargs=(predictor.model_path, inner_threads)) as pool:
+            pending = collections.deque()
+            for chunk in chunks:
+                pending.append(pool.apply_async(_score_worker, (chunk,)))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+    finally:
+        if ctx.get_start_method() == 'fork':
+            gc.unfreeze()
+            _worker_predictor = None
+
+def score_file(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, predictor=None,
+               input_format=None, output_format=None, verbose=True, workers=1):
+    """
+    Score un fichier arbitrairement grand par blocs et écrit les résultats au fil de l'eau
+
+    Parameters:
+    -----------
+    input_path : str
+        Fichier CSV, JSONL ou Parquet contenant les colonnes de prepare_input_data
+    output_path : str
+        Fichier de sortie (CSV ou JSONL), réécrit depuis le début (en-tête
+        seul si l'entrée n'a aucune ligne) ; les lignes incomplètes y
+        figurent avec une prédiction vide
+    chunk_size : int
+        Nombre de lignes lues et prédites à la fois
+    predictor : Predictor, optional
+        Prédicteur à utiliser (modèle chargé une seule fois)
+    workers : int
+        Nombre de processus de prédiction (1 = dans le processus courant)
+
+    Returns:
+    --------
+    int
+        Nombre de lignes scorées
+    """
+    predictor = predictor or Predictor(MODEL_PATH)
+    input_format = input_format or detect_format(input_path)
+    output_format = output_format or detect_format(output_path)
+    if output_format not in ('csv', 'jsonl'):
+        raise ValueError(f"Format de sortie non pris en charge: {output_format} (attendu: csv ou jsonl)")
+    chunks = iter_chunks(input_path, chunk_size, input_format)
+    if workers > 1:
+        scored = iter_parallel_scores(chunks, predictor, workers)
+    else:
+        scored = (score_chunk(chunk, predictor) for chunk in chunks)
+    n_rows = n_incomplete = 0
+    start = time.perf_counter()
+    with open(output_path, 'w'):
+        # Tronqué d'emblée : une entrée vide ne laisse pas l'ancien résultat
+        pass
+    for i, (chunk, incomplete) in enumerate(scored):
+        write_chunk(chunk, output_path, output_format, first=(i == 0))
+        n_rows += len(chunk)
+        n_incomplete += incomplete
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f"Bloc {i + 1}: {n_rows} lignes scorées ({n_rows / max(elapsed, 1e-9):,.0f} lignes/s), "
+                  f"{n_incomplete} incomplètes")
+    if n_rows == 0 and output_format == 'csv' and os.path.getsize(output_path) == 0:
+        columns = [col for col in input_columns(input_path, input_format) if col != 'predicted_expenditure']
+        pd.DataFrame(columns=columns + ['predicted_expenditure']).to_csv(output_path, index=False)
+    return n_rows
+
+def benchmark_workers(input_path, worker_counts, chunk_size=DEFAULT_CHUNK_SIZE, predictor=None,
+                      input_format=None, max_rows=None):
+    """
+    Mesure le débit de prédiction en fonction du nombre de processus
+
+    Les blocs sont lus une fois en mémoire pour ne mesurer que
+    l'encodage, la normalisation et la prédiction.
+
+    Returns:
+    --------
+    list of dict
+        Une ligne par nombre de processus : durée, lignes/s, accélération, efficacité
+    """
+    predictor = predictor or Predictor(MODEL_PATH)
+    predictor.components()
+    chunks, n_rows = [], 0
+    for chunk in iter_chunks(input_path, chunk_size, input_format):
+        if max_rows is not None and n_rows + len(chunk) > max_rows:
+            chunk = chunk.iloc[:max_rows - n_rows]
+        chunks.append(chunk)
+        n_rows += len(chunk)
+        if max_rows is not None and n_rows >= max_rows:
+            break
+
+    report = []
+    for workers in worker_counts:
+        start = time.perf_counter()
+        if workers > 1:
+            for _ in iter_parallel_scores(iter(chunks), predictor, workers):
+                pass
+        else:
+            # Même travail que les processus, sur une copie comme celle qu'ils reçoivent :
+            # lignes incomplètes écartées, prédictions jointes au bloc
+            for chunk in chunks:
+                score_chunk(chunk.copy(), predictor)
+        elapsed = time.perf_counter() - start
+        report.append({'workers': workers, 'rows': n_rows, 'seconds': elapsed,
+                       'rows_per_s': n_rows / elapsed})
+    baseline = report[0]['rows_per_s'] / report[0]['workers']
+    for row in report:
+        row['speedup'] = row['rows_per_s'] / baseline
+        row['efficiency'] = row['speedup'] / row['workers']
+    return report
+
+def print_worker_report(report):
+    print(f"\n{'Processus':>10} {'Durée (s)':>10} {'Lignes/s':>12} {'Accél.':>8} {'Effic.':>8}")
+    for row in report:
+        print(f"{row['workers']:>10} {row['seconds']:>10.2f} {row['rows_per_s']:>12,.0f} "
+              f"{row['speedup']:>8.2f} {row['efficiency']:>8.0%}")
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Score un fichier CSV/JSONL par blocs avec le modèle sauvegardé"
+    )
+    parser.add_argument('input', help="Fichier d'entrée (.csv, .jsonl ou .parquet)")
+    parser.add_argument('output', nargs='?', help="Fichier de sortie (.csv ou .jsonl)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Nombre de lignes par bloc (défaut: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument('--model', default=MODEL_PATH, help="Chemin de l'artefact du modèle")
+    parser.add_argument('--input-format', choices=['csv', 'jsonl', 'parquet'], help="Forcer le format d'entrée")
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'], help="Forcer le format de sortie")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Nombre de processus de prédiction (défaut: 1)")
+    parser.add_argument('--benchmark-workers',
+                        help="Liste de nombres de processus à comparer, ex. 1,2,4,8 (aucune sortie écrite)")
+    parser.add_argument('--benchmark-rows', type=int, help="Limite de lignes pour le benchmark")
+    parser.add_argument('--report', help="Fichier JSON où enregistrer le rapport du benchmark")
+    parser.add_argument('--quiet', action='store_true', help="N'affiche pas la progression")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.chunk_size <= 0:
+        raise SystemExit("--chunk-size doit être strictement positif")
+    if args.workers <= 0:
+        raise SystemExit("--workers doit être strictement positif")
+    predictor = Predictor(args.model)
+
+    if args.benchmark_workers:
+        worker_counts = [int(w) for w in args.benchmark_workers.split(',')]
+        report = benchmark_workers(args.input, worker_counts, chunk_size=args.chunk_size,
+                                   predictor=predictor, input_format=args.input_format,
+                                   max_rows=args.benchmark_rows)
+        print_worker_report(report)
+        if args.report:
+            with open(args.report, 'w') as f:
+                json.dump({'input': args.input, 'chunk_size': args.chunk_size,
+                           'cpu_count': os.cpu_count(), 'results': report}, f, indent=2)
+            print(f"\nRapport sauvegardé dans '{args.report}'")
+        return
+
+    if args.output is None:
+        parser.error("le fichier de sortie est requis")
+    start = time.perf_counter()
+    n_rows = score_file(
+        args.input, args.output,
+        chunk_size=args.chunk_size,
+        predictor=predictor,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        verbose=not args.quiet,
+        workers=args.workers
+    )
+    elapsed = time.perf_counter() - start
+    print(f"\n{n_rows} lignes scorées en {elapsed:.2f}s -> '{args.output}'")
+
+if __name__ == "__main__":
+    main()
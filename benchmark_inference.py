@@ -0,0 +1,198 @@
+import argparse
+import json
+import time
+import numpy as np
+import pandas as pd
+from predict_expenditure import (MODEL_PATH, REQUIRED_COLUMNS, Predictor, inverse_scale_target,
+                                 predict_expenditure, predict_single_example, scale_features)
+from prediction_cache import PredictionCache
+
+DATA_PATH = 'AER_credit_card_data.csv'
+DEFAULT_BATCH_SIZES = [1, 10, 1000, 100000]
+STAGES = ['load', 'featurize', 'scale', 'predict', 'inverse']
+
+# Budget de temps approximatif par scénario : le nombre d'itérations s'adapte
+# à la durée d'un appel (au moins MIN_ITERATIONS)
+DEFAULT_TIME_BUDGET = 2.0
+MIN_ITERATIONS = 5
+MAX_ITERATIONS = 2000
+
+def make_inputs(n_rows, data_path=DATA_PATH, random_state=0):
+    """Enregistrements bruts réalistes (lignes du jeu AER tirées avec remise)"""
+    df = pd.read_csv(data_path)[REQUIRED_COLUMNS]
+    rows = np.random.default_rng(random_state).integers(0, len(df), size=n_rows)
+    return df.iloc[rows].reset_index(drop=True)
+
+def app_client(record):
+    """Enregistrement tel que construit par le formulaire de la page Prédiction d'app.py"""
+    return {
+        'income': record['income'],
+        'share': record['share'],
+        'age': record['age'],
+        'owner': 'Oui' if record['owner'] == 'yes' else 'Non',
+        'selfemp': 'Oui' if record['selfemp'] == 'yes' else 'Non',
+        'reports': record['reports'],
+        'dependents': record['dependents'],
+        'months': record['months'],
+        'majorcards': record['majorcards'],
+        'active': record['active']
+    }
+
+def _iterations(first_call, time_budget, iterations=None):
+    if iterations:
+        return iterations
+    return int(min(MAX_ITERATIONS, max(MIN_ITERATIONS, time_budget / max(first_call, 1e-6))))
+
+def time_calls(func, inputs, time_budget=DEFAULT_TIME_BUDGET, iterations=None):
+    """
+    Latences d'appels successifs de ``func``
+
+    ``inputs(i)`` fournit l'argument de la i-ème itération ; un premier appel
+    de chauffe est exclu des mesures et sert à fixer le nombre d'itérations.
+    """
+    start = time.perf_counter()
+    func(inputs(0))
+    n = _iterations(time.perf_counter() - start, time_budget, iterations)
+    latencies = np.empty(n)
+    for i in range(n):
+        argument = inputs(i + 1)
+        start = time.perf_counter()
+        func(argument)
+        latencies[i] = time.perf_counter() - start
+    return latencies
+
+def summarize(name, latencies, rows_per_call):
+    return {
+        'scenario': name,
+        'rows': rows_per_call,
+        'iterations': len(latencies),
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'mean_ms': float(latencies.mean() * 1000),
+        'rows_per_s': float(rows_per_call * len(latencies) / latencies.sum())
+    }
+
+def stage_breakdown(predictor, batch, time_budget=DEFAULT_TIME_BUDGET, iterations=None):
+    """
+    Temps médian de chaque étape du chemin de prédiction pour un lot
+
+    Reproduit ``Predictor.predict`` étape par étape ; ``load`` est le
+    chargement complet de l'artefact dans un nouveau prédicteur.
+    """
+    model, scaler_X, scaler_y, featurizer = predictor.components()
+    timings = {stage: [] for stage in STAGES}
+    start = time.perf_counter()
+    inverse_scale_target(scaler_y, model.predict(scale_features(scaler_X, featurizer.transform(batch))))
+    n = _iterations(time.perf_counter() - start, time_budget, iterations)
+    for _ in range(n):
+        t0 = time.perf_counter()
+        X = featurizer.transform(batch)
+        t1 = time.perf_counter()
+        X_scaled = scale_features(scaler_X, X)
+        t2 = time.perf_counter()
+        y_scaled = model.predict(X_scaled)
+        t3 = time.perf_counter()
+        inverse_scale_target(scaler_y, y_scaled)
+        t4 = time.perf_counter()
+        timings['featurize'].append(t1 - t0)
+        timings['scale'].append(t2 - t1)
+        timings['predict'].append(t3 - t2)
+        timings['inverse'].append(t4 - t3)
+    for _ in range(min(n, 20)):
+        start = time.perf_counter()
+        Predictor(predictor.model_path, predictor.compile_trees).load()
+        timings['load'].append(time.perf_counter() - start)
+    return {f"{stage}_ms": float(np.median(values) * 1000) for stage, values in timings.items()}
+
+def run_benchmarks(model_path=MODEL_PATH, batch_sizes=DEFAULT_BATCH_SIZES, data_path=DATA_PATH,
+                   time_budget=DEFAULT_TIME_BUDGET, iterations=None, compile_trees=True, verbose=True):
+    """
+    Mesure chaque chemin d'inférence existant
+
+    - ``predict_single_example`` (un DataFrame d'une ligne par appel) ;
+    - ``predict_expenditure`` sur des lots de ``batch_sizes`` lignes ;
+    - la séquence de la page Prédiction d'app.py (enregistrement du
+      formulaire, ``PredictionCache.predict`` puis ``[0]``), avec des clients
+      tous différents (échecs du cache) puis un client répété (succès).
+
+    Returns:
+    --------
+    list of dict
+        Une ligne par scénario : latences p50/p95/p99, lignes/s et, pour les
+        lots, la décomposition par étape
+    """
+    predictor = Predictor(model_path, compile_trees=compile_trees)
+    start = time.perf_counter()
+    predictor.load()
+    if verbose:
+        print(f"Modèle {type(predictor.model).__name__} chargé en {(time.perf_counter() - start) * 1000:.1f} ms\n")
+    pool = make_inputs(max(max(batch_sizes), MAX_ITERATIONS + 1), data_path)
+    records = pool.to_dict('records')
+    results = []
+
+    def report(result):
+        results.append(result)
+        if verbose:
+            print(format_result(result))
+
+    # predict_single_example : arguments nommés, un client différent par appel
+    latencies = time_calls(lambda record: predict_single_example(predictor=predictor, **record),
+                           lambda i: records[i % len(records)], time_budget, iterations)
+    report(summarize('predict_single_example', latencies, 1))
+
+    # predict_expenditure sur des lots de tailles croissantes
+    for size in batch_sizes:
+        batch = pool.iloc[:size].copy()
+        latencies = time_calls(lambda df: predict_expenditure(df, predictor=predictor),
+                               lambda i: batch, time_budget, iterations)
+        result = summarize(f"predict_expenditure[{size}]", latencies, size)
+        result.update(stage_breakdown(predictor, batch, time_budget / 2, iterations))
+        report(result)
+
+    # Page Prédiction d'app.py : cache partagé, un enregistrement par soumission
+    cache = PredictionCache(max_entries=10000, ttl=24 * 3600)
+    # Revenu légèrement décalé à chaque itération : aucune soumission n'est déjà en cache
+    latencies = time_calls(lambda client: cache.predict(client, predictor)[0],
+                           lambda i: dict(app_client(records[i % len(records)]),
+                                          income=records[i % len(records)]['income'] + i * 1e-6),
+                           time_budget, iterations)
+    report(summarize('app_prediction (cache miss)', latencies, 1))
+    client = app_client(records[0])
+    latencies = time_calls(lambda client: cache.predict(client, predictor)[0],
+                           lambda i: client, time_budget, iterations)
+    report(summarize('app_prediction (cache hit)', latencies, 1))
+    return results
+
+def format_result(result):
+    line = (f"{result['scenario']:<32} p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  "
+            f"p99 {result['p99_ms']:9.3f} ms  {result['rows_per_s']:>14,.0f} lignes/s")
+    if 'predict_ms' in result:
+        line += "\n" + " " * 33 + "  ".join(f"{stage} {result[f'{stage}_ms']:.3f} ms" for stage in STAGES)
+    return line
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de latence et de débit des chemins d'inférence")
+    parser.add_argument('--model', default=MODEL_PATH, help="Chemin de l'artefact du modèle")
+    parser.add_argument('--data', default=DATA_PATH, help="Fichier CSV d'où sont tirés les enregistrements")
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=DEFAULT_BATCH_SIZES,
+                        help="Tailles de lot pour predict_expenditure (défaut: 1 10 1000 100000)")
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET,
+                        help="Durée approximative de mesure par scénario en secondes (défaut: 2)")
+    parser.add_argument('--iterations', type=int, default=None,
+                        help="Nombre fixe d'itérations par scénario (remplace --time-budget)")
+    parser.add_argument('--no-compile-trees', dest='compile_trees', action='store_false',
+                        help="Utilise l'estimateur d'origine au lieu du moteur d'arbres vectorisé")
+    parser.add_argument('--output', default=None, help="Écrit les résultats en JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.model, args.batch_sizes, args.data, args.time_budget, args.iterations,
+                             args.compile_trees)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': time.time(), 'model': args.model, 'compile_trees': args.compile_trees,
+                       'results': results}, f, indent=2)
+        print(f"\nRésultats écrits dans {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import time
+import numpy as np
+from sklearn.base import clone
+from regression_credit_card import DATA_PATH, encode_features, load_data, models, scale_data, split_data
+
+DEFAULT_HISTORY_PATH = 'benchmarks/training_history.json'
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_THRESHOLD = 0.20
+
+# Configuration représentative de chaque famille (milieu des grilles de recherche)
+BENCHMARK_PARAMS = {
+    'Random Forest': {'n_estimators': 100, 'max_depth': 20, 'min_samples_split': 5, 'min_samples_leaf': 2},
+    'XGBoost': {'n_estimators': 200, 'max_depth': 5, 'learning_rate': 0.1, 'subsample': 0.9},
+    'SVR': {'C': 1, 'kernel': 'rbf', 'gamma': 'scale'}
+}
+
+# Au-delà, l'ajustement devient déraisonnable sur une machine ordinaire
+# (SVR à noyau : temps quadratique à cubique en nombre de lignes)
+FIT_ROW_LIMITS = {'SVR': 20000}
+
+# Métriques comparées au run précédent (plus petit = meilleur)
+TRACKED_METRICS = ['fit_wall_time', 'predict_wall_time', 'peak_rss_mb']
+
+# Réglages d'un run qui doivent être identiques pour comparer ses mesures
+RUN_SETTINGS = ['threads', 'repeat']
+
+def upsample(X, y, factor, random_state=42):
+    """
+    Jeu synthétique ``factor`` fois plus grand
+
+    Les lignes d'origine sont conservées, complétées par des lignes tirées
+    avec remise ; les colonnes continues reçoivent un bruit gaussien de 5 %
+    de leur écart-type, les colonnes binaires (indicatrices) sont inchangées.
+    """
+    X, y = np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    if factor <= 1:
+        return X, y
+    rng = np.random.default_rng(random_state)
+    rows = rng.integers(0, len(X), size=(factor - 1) * len(X))
+    extra_X, extra_y = X[rows].copy(), y[rows].copy()
+    continuous = np.array([len(np.unique(X[:, j])) > 2 for j in range(X.shape[1])])
+    noise = rng.normal(size=(len(rows), int(continuous.sum()))) * (0.05 * X[:, continuous].std(axis=0))
+    extra_X[:, continuous] += noise
+    extra_y += rng.normal(size=len(rows)) * 0.05 * y.std()
+    return np.concatenate([X, extra_X]), np.concatenate([y, extra_y])
+
+def prepare_data(data_path=DATA_PATH):
+    """Données d'entraînement et de test normalisées, comme dans le pipeline d'entraînement"""
+    split = split_data(*encode_features(load_data(data_path)))
+    scaled = scale_data(split)
+    return scaled['X_train_scaled'], scaled['y_train_scaled'], scaled['X_test_scaled'], scaled['y_test_scaled']
+
+def _current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        return float('nan')
+
+def _limit_threads(n_threads):
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(n_threads)
+    except ImportError:
+        pass
+
+def _measure(family, scale, data, repeat, threads, connection):
+    """Exécuté dans un processus dédié : le pic de RSS mesuré est celui de la tâche"""
+    try:
+        _limit_threads(threads)
+        X_train, y_train, X_test, y_test = data
+        X_train, y_train = upsample(X_train, y_train, scale)
+        X_test, _ = upsample(X_test, y_test, scale, random_state=43)
+        baseline_rss = _current_rss_mb()
+        estimator = clone(models[family]['model']).set_params(**BENCHMARK_PARAMS[family])
+        if 'n_jobs' in estimator.get_params():
+            estimator.set_params(n_jobs=threads)
+
+        fit_wall, fit_cpu, predict_wall, predict_cpu = [], [], [], []
+        for _ in range(repeat):
+            model = clone(estimator)
+            start, cpu_start = time.perf_counter(), time.process_time()
+            model.fit(X_train, y_train)
+            fit_wall.append(time.perf_counter() - start)
+            fit_cpu.append(time.process_time() - cpu_start)
+            start, cpu_start = time.perf_counter(), time.process_time()
+            model.predict(X_test)
+            predict_wall.append(time.perf_counter() - start)
+            predict_cpu.append(time.process_time() - cpu_start)
+
+        # ru_maxrss est en kilo-octets sous Linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        best = int(np.argmin(fit_wall))
+        best_predict = int(np.argmin(predict_wall))
+        connection.send({
+            'family': family,
+            'scale': scale,
+            'fit_rows': len(X_train),
+            'predict_rows': len(X_test),
+            'fit_wall_time': fit_wall[best],
+            'fit_cpu_time': fit_cpu[best],
+            'predict_wall_time': predict_wall[best_predict],
+            'predict_cpu_time': predict_cpu[best_predict],
+            'fit_rows_per_s': len(X_train) / fit_wall[best],
+            'predict_rows_per_s': len(X_test) / predict_wall[best_predict],
+            'peak_rss_mb': peak_rss,
+            'rss_increase_mb': peak_rss - baseline_rss
+        })
+    except Exception as e:
+        connection.send({'family': family, 'scale': scale, 'error': repr(e)})
+    finally:
+        connection.close()
+
+def _process_context():
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+def run_benchmarks(families=None, scales=DEFAULT_SCALES, repeat=1, threads=1, data_path=DATA_PATH,
+                   row_limits=FIT_ROW_LIMITS, verbose=True):
+    """
+    Mesure l'ajustement et la prédiction de chaque famille à chaque échelle
+
+    Chaque couple (famille, échelle) s'exécute dans un processus séparé afin
+    que le pic de mémoire (RSS) lui soit propre. Le temps mural et le temps
+    CPU retenus sont le meilleur de ``repeat`` répétitions.
+
+    Returns:
+    --------
+    list of dict
+        Une mesure par (famille, échelle) ; ``skipped`` ou ``error`` sinon
+    """
+    families = families or list(models)
+    data = prepare_data(data_path)
+    ctx = _process_context()
+    results = []
+    for family in families:
+        for scale in scales:
+            fit_rows = len(data[0]) * scale
+            limit = (row_limits or {}).get(family)
+            if limit is not None and fit_rows > limit:
+                result = {'family': family, 'scale': scale, 'fit_rows': fit_rows,
+                          'skipped': f"plus de {limit} lignes"}
+            else:
+                receiver, sender = ctx.Pipe(duplex=False)
+                process = ctx.Process(target=_measure, args=(family, scale, data, repeat, threads, sender))
+                process.start()
+                sender.close()
+                try:
+                    result = receiver.recv()
+                except EOFError:
+                    result = {'family': family, 'scale': scale, 'error': 'processus interrompu'}
+                process.join()
+            results.append(result)
+            if verbose:
+                print(format_result(result))
+    return results
+
+def format_result(result):
+    label = f"{result['family']:<15} x{result['scale']:<4}"
+    if 'skipped' in result:
+        return f"{label} ignoré ({result['skipped']})"
+    if 'error' in result:
+        return f"{label} erreur: {result['error']}"
+    return (f"{label} {result['fit_rows']:>8} lignes  "
+            f"fit {result['fit_wall_time']:8.3f} s (CPU {result['fit_cpu_time']:8.3f} s, "
+            f"{result['fit_rows_per_s']:>10,.0f} l/s)  "
+            f"predict {result['predict_wall_time']:7.3f} s ({result['predict_rows_per_s']:>12,.0f} l/s)  "
+            f"RSS max {result['peak_rss_mb']:7.1f} Mo")
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              timeout=5, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def load_history(path=DEFAULT_HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_history(history, path=DEFAULT_HISTORY_PATH):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+def _measured(results):
+    return {(r['family'], r['scale']) for r in results if 'fit_wall_time' in r}
+
+def select_baseline(history, run):
+    """
+    Run de référence : le plus récent de l'historique mesuré avec les mêmes
+    réglages (``RUN_SETTINGS``) et ayant au moins une mesure (famille,
+    échelle) en commun avec ``run``
+
+    Returns:
+    --------
+    dict or None
+        Entrée de l'historique, ou None si aucun run n'est comparable
+    """
+    measured = _measured(run['results'])
+    for previous in reversed(history):
+        if all(previous.get(name) == run[name] for name in RUN_SETTINGS) and \
+                measured & _measured(previous.get('results', [])):
+            return previous
+    return None
+
+def find_regressions(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare les mesures au run de référence
+
+    Returns:
+    --------
+    list of dict
+        Métriques dont la valeur dépasse la référence de plus de ``threshold``
+        (0.2 = +20 %)
+    """
+    reference = {(r['family'], r['scale']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        previous = reference.get((result['family'], result['scale']))
+        if previous is None:
+            continue
+        for metric in TRACKED_METRICS:
+            if metric not in result or not previous.get(metric):
+                continue
+            ratio = result[metric] / previous[metric]
+            if ratio > 1 + threshold:
+                regressions.append({'family': result['family'], 'scale': result['scale'], 'metric': metric,
+                                    'baseline': previous[metric], 'current': result[metric], 'ratio': ratio})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark d'entraînement et de prédiction par famille de modèles")
+    parser.add_argument('--families', nargs='+', choices=list(models), default=None,
+                        help="Familles mesurées (défaut: toutes)")
+    parser.add_argument('--scales', nargs='+', type=int, default=DEFAULT_SCALES,
+                        help="Facteurs de sur-échantillonnage du jeu AER (défaut: 1 10 100)")
+    parser.add_argument('--repeat', type=int, default=1, help="Répétitions par mesure, la meilleure est retenue")
+    parser.add_argument('--threads', type=int, default=1, help="Threads par ajustement (défaut: 1)")
+    parser.add_argument('--data', default=DATA_PATH, help="Fichier CSV des données")
+    parser.add_argument('--history', default=DEFAULT_HISTORY_PATH,
+                        help=f"Historique JSON des mesures (défaut: {DEFAULT_HISTORY_PATH})")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Dégradation tolérée par rapport au run précédent (défaut: 0.20 = +20 %%)")
+    parser.add_argument('--no-row-limits', action='store_true',
+                        help="Mesure aussi le SVR au-delà de 20 000 lignes")
+    parser.add_argument('--no-save', action='store_true', help="N'ajoute pas ce run à l'historique")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="Code de sortie 1 si une régression est détectée")
+    args = parser.parse_args(argv)
+
+    history = load_history(args.history)
+    results = run_benchmarks(args.families, args.scales, args.repeat, args.threads, args.data,
+                             row_limits=None if args.no_row_limits else FIT_ROW_LIMITS)
+    run = {
+        'timestamp': time.time(),
+        'revision': _git_revision(),
+        'host': {'platform': platform.platform(), 'python': platform.python_version(),
+                 'cpu_count': os.cpu_count()},
+        'threads': args.threads,
+        'repeat': args.repeat,
+        'results': results
+    }
+
+    baseline = select_baseline(history, run)
+    regressions = find_regressions(results, baseline, args.threshold) if baseline else []
+    settings = ', '.join(f"{name}={run[name]}" for name in RUN_SETTINGS)
+    if baseline is None:
+        print(f"\nAucun run précédent comparable ({settings})")
+    else:
+        print(f"\nComparaison avec le run précédent ({baseline.get('revision') or 'révision inconnue'}, "
+              f"{settings}, seuil +{args.threshold:.0%}) :")
+        for r in regressions:
+            print(f"  RÉGRESSION {r['family']} x{r['scale']} {r['metric']}: "
+                  f"{r['baseline']:.3f} -> {r['current']:.3f} ({r['ratio'] - 1:+.0%})")
+        if not regressions:
+            print("  aucune régression")
+    run['regressions'] = regressions
+
+    if not args.no_save:
+        history.append(run)
+        save_history(history, args.history)
+        print(f"\nMesures ajoutées à {args.history}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -6,8 +6,8 @@ from PIL import Image
 import plotly.express as px
 import plotly.graph_objects as go
 from streamlit_lottie import st_lottie
-import requests
 from streamlit_option_menu import option_menu
+from lottie_assets import LottieAssets
 
 # --------- UTILS ---------
 @st.cache_resource
@@ -16,16 +16,19 @@ def load_model():
         data = pickle.load(f)
     return data['model'], data['scaler_X'], data['scaler_y'], data.get('metrics', None)
 
-def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200:
-        return None
-    return r.json()
+@st.cache_resource
+def get_lottie_assets():
+    # Lues une fois par processus depuis animations/, téléchargées en arrière-plan si absentes
+    return LottieAssets({
+        'credit': ("https://assets2.lottiefiles.com/packages/lf20_4kx2q32n.json", None),
+        'loading': ("https://assets3.lottiefiles.com/packages/lf20_p8bfn5to.json", None),
+        'about': ("https://assets2.lottiefiles.com/packages/lf20_0yfsb3a1.json", None)
+    })
 
-# --------- ANIMATIONS ---------
-credit_animation = load_lottieurl("https://assets2.lottiefiles.com/packages/lf20_4kx2q32n.json")
-loading_animation = load_lottieurl("https://assets3.lottiefiles.com/packages/lf20_p8bfn5to.json")
-about_animation = load_lottieurl("https://assets2.lottiefiles.com/packages/lf20_0yfsb3a1.json")
+def show_animation(name, height, key):
+    animation = get_lottie_assets().get(name)
+    if animation:
+        st_lottie(animation, height=height, key=key)
 
 # --------- PAGE CONFIG ---------
 st.set_page_config(
@@ -190,7 +193,7 @@ st.markdown("""
 
 # --------- SIDEBAR ---------
 with st.sidebar:
-    st_lottie(credit_animation, height=120, key="sidebar_animation")
+    show_animation('credit', 120, "sidebar_animation")
     selected = option_menu(
         menu_title="Navigation",
         options=["Accueil", "Prédiction", "Analyse", "À propos"],
@@ -256,7 +259,7 @@ if selected == "Accueil":
         </div>
         """, unsafe_allow_html=True)
     with col2:
-        st_lottie(credit_animation, height=220, key="main_animation")
+        show_animation('credit', 220, "main_animation")
         st.markdown("""
         <div style='margin-top: 18px; background: linear-gradient(135deg, #4b79a1 0%, #283e51 100%); color: white; padding: 18px; border-radius: 12px; text-align: center; box-shadow: 0 2px 10px rgba(76,110,245,0.10);'>
             <h2 style='margin:0;'>+2000</h2>
@@ -304,7 +307,7 @@ elif selected == "Prédiction":
 
     if submit_button:
         with st.spinner("Prédiction en cours..."):
-            st_lottie(loading_animation, height=100, key="loading")
+            show_animation('loading', 100, "loading")
             # Préparation des données
             input_df = pd.DataFrame({
                 'income': [income],
@@ -523,7 +526,7 @@ elif selected == "À propos":
     """, unsafe_allow_html=True)
     col1, col2 = st.columns([1, 2])
     with col1:
-        st_lottie(about_animation, height=220, key="about_animation")
+        show_animation('about', 220, "about_animation")
         st.image(
             "https://avatars.githubusercontent.com/u/TheBeyonder237",
             width=180,
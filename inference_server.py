@@ -0,0 +1,297 @@
+import argparse
+import asyncio
+import json
+import time
+import logging
+import numpy as np
+from instrumentation import LogSink, PrometheusSink
+from predict_expenditure import MODEL_PATH, Predictor, inverse_scale_target, scale_features
+
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 5.0
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+STATUS_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                  413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+class MicroBatcher:
+    """
+    Regroupe les requêtes concurrentes en micro-lots
+
+    Les enregistrements reçus sont mis en file tels quels ; une tâche de fond
+    attend la première requête, collecte les suivantes jusqu'à
+    ``max_batch_size`` lignes ou ``max_wait_ms`` millisecondes, puis, hors de
+    la boucle d'événements, résout une seule fois les composants du
+    prédicteur (vérification de l'artefact, rechargement éventuel), encode
+    chaque requête et exécute une seule normalisation, un seul
+    ``model.predict`` et un seul retour à l'échelle originale pour tout le
+    lot. Toutes les lignes d'un lot sont ainsi encodées et prédites par la
+    même version du modèle ; une requête invalide n'échoue que pour
+    elle-même et une erreur inattendue n'échoue que pour son lot.
+
+    Parameters:
+    -----------
+    predictor : Predictor
+        Prédicteur partagé (modèle chargé une seule fois)
+    max_batch_size : int
+        Nombre maximal de lignes par lot
+    max_wait_ms : float
+        Attente maximale après la première ligne d'un lot
+    """
+
+    def __init__(self, predictor, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = None
+        self.batches = 0
+        self.rows = 0
+        self._task = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def predict(self, records):
+        """Met les enregistrements en file et attend leurs prédictions"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((records, future))
+        return await future
+
+    async def _collect(self):
+        items = [await self.queue.get()]
+        n_rows = len(items[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while n_rows < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            items.append(item)
+            n_rows += len(item[0])
+        return items
+
+    def _predict_batch(self, requests):
+        """
+        Encode et prédit un micro-lot (exécuté hors de la boucle d'événements)
+
+        Le lot est instrumenté comme un seul lot (``path='served'``) :
+        encodage de toutes les requêtes puis normalisation, prédiction et
+        retour à l'échelle, chaque ligne servie n'étant comptée qu'une fois.
+
+        Returns:
+        --------
+        list
+            Par requête, ses prédictions (numpy.ndarray) ou l'exception
+            levée par son encodage
+        """
+        timer = self.predictor.instrumentation.start_batch(path='served')
+        if timer is None:
+            return self._encode_and_predict(requests)
+        with timer:
+            return self._encode_and_predict(requests, timer)
+
+    def _encode_and_predict(self, requests, timer=None):
+        model, scaler_X, scaler_y, featurizer = self.predictor.components()
+        if timer is not None:
+            timer.mark('load')
+        results, encoded = [], []
+        for records in requests:
+            try:
+                X = featurizer.transform(records, timer=timer)
+            except Exception as e:
+                results.append(e)
+                continue
+            results.append(len(encoded))
+            encoded.append(X)
+        if not encoded:
+            return results
+
+        X = np.concatenate(encoded) if len(encoded) > 1 else encoded[0]
+        if timer is None:
+            y_pred = inverse_scale_target(scaler_y, model.predict(scale_features(scaler_X, X)))
+        else:
+            timer.rows = len(X)
+            y_pred = self.predictor._predict_timed(model, scaler_X, scaler_y, X, timer)
+        self.batches += 1
+        self.rows += len(X)
+        offsets = np.cumsum([0] + [len(X) for X in encoded])
+        return [result if isinstance(result, Exception) else y_pred[offsets[result]:offsets[result + 1]]
+                for result in results]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect()
+            try:
+                results = await loop.run_in_executor(None, self._predict_batch, [records for records, _ in items])
+            except Exception as e:
+                # Seules les requêtes du lot échouent ; la tâche continue de servir
+                results = [e] * len(items)
+            for (_, future), result in zip(items, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+class InferenceServer:
+    """
+    Service HTTP minimal (asyncio, sans dépendance) de prédiction des dépenses
+
+    Routes :
+
+    - ``POST /predict`` : un enregistrement JSON ou une liste d'enregistrements,
+      répond ``{"predictions": [...]}`` ;
+    - ``GET /health`` : état du service et statistiques de micro-lots ;
+    - ``GET /metrics`` : histogrammes des étapes au format texte Prometheus,
+      si un ``PrometheusSink`` est fourni.
+    """
+
+    def __init__(self, predictor, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS,
+                 metrics=None):
+        self.predictor = predictor
+        self.metrics = metrics
+        self.batcher = MicroBatcher(predictor, max_batch_size, max_wait_ms)
+
+    async def handle_predict(self, body):
+        payload = json.loads(body)
+        if isinstance(payload, dict) and 'instances' in payload:
+            payload = payload['instances']
+        single = isinstance(payload, dict)
+        records = [payload] if single else payload
+        if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+            raise ValueError("Le corps doit être un enregistrement JSON ou une liste non vide d'enregistrements")
+        y_pred = await self.batcher.predict(records)
+        return {'predictions': [float(v) for v in y_pred]}
+
+    def handle_health(self):
+        return {
+            'status': 'ok',
+            'model_path': self.predictor.model_path,
+            'model_version': self.predictor.version,
+            'batches': self.batcher.batches,
+            'rows': self.batcher.rows,
+            'mean_batch_rows': self.batcher.rows / self.batcher.batches if self.batcher.batches else 0.0
+        }
+
+    async def dispatch(self, method, path, body):
+        path = path.split('?', 1)[0]
+        if path == '/predict':
+            if method != 'POST':
+                return 405, {'error': "Utiliser POST"}
+            try:
+                return 200, await self.handle_predict(body)
+            except (ValueError, json.JSONDecodeError) as e:
+                return 400, {'error': str(e)}
+        if path == '/health':
+            return 200, self.handle_health()
+        if path == '/metrics' and self.metrics is not None:
+            return 200, self.metrics.render()
+        return 404, {'error': f"Route inconnue: {path}"}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    await self._send(writer, 400, {'error': "Requête invalide"}, keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._send(writer, 400, {'error': "Requête invalide"}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._send(writer, 413, {'error': "Corps de requête trop volumineux"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    status, payload = await self.dispatch(method.upper(), path, body)
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._send(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, payload, keep_alive=True):
+        if isinstance(payload, str):
+            body, content_type = payload.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body, content_type = json.dumps(payload).encode('utf-8'), 'application/json'
+        head = (f"HTTP/1.1 {status} {STATUS_REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        self.predictor.components()
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Service de prédiction sur http://{host}:{port} "
+              f"(lots de {self.batcher.max_batch_size} lignes max, attente {self.batcher.max_wait * 1000:.1f} ms)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service HTTP de prédiction avec micro-lots dynamiques")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model', default=MODEL_PATH, help="Chemin de l'artefact du modèle")
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help=f"Lignes maximum par lot (défaut: {DEFAULT_MAX_BATCH_SIZE})")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help=f"Attente maximale pour compléter un lot en ms (défaut: {DEFAULT_MAX_WAIT_MS})")
+    parser.add_argument('--metrics', action='store_true',
+                        help="Mesure la durée de chaque étape et l'expose sur GET /metrics (format Prometheus)")
+    parser.add_argument('--log-metrics', action='store_true',
+                        help="Journalise une ligne JSON par lot (logger predictor.metrics)")
+    args = parser.parse_args(argv)
+    predictor = Predictor(args.model)
+    metrics = predictor.instrumentation.add_sink(PrometheusSink()) if args.metrics else None
+    if args.log_metrics:
+        logging.basicConfig(level=logging.INFO, format='%(message)s')
+        predictor.instrumentation.add_sink(LogSink())
+    server = InferenceServer(predictor, args.max_batch_size, args.max_wait_ms, metrics)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+
+# Étapes instrumentées du chemin de prédiction
+STAGES = ['load', 'validate', 'encode', 'scale', 'predict', 'inverse_transform']
+
+# Bornes des histogrammes de durée, en secondes (10 µs à 10 s)
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class BatchTimer:
+    """
+    Chronométrage des étapes d'un lot
+
+    ``mark(étape)`` attribue à l'étape le temps écoulé depuis la marque
+    précédente (les durées d'une même étape s'additionnent). À la sortie du
+    bloc ``with``, le lot est transmis à tous les collecteurs, y compris en
+    cas d'exception.
+    """
+
+    __slots__ = ('instrumentation', 'rows', 'stages', 'start', '_last', 'labels')
+
+    def __init__(self, instrumentation, rows=0, labels=None):
+        self.instrumentation = instrumentation
+        self.rows = rows
+        self.labels = labels or {}
+        self.stages = {}
+        self.start = self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        total = time.perf_counter() - self.start
+        error = None if exc is None else f"{exc_type.__name__}: {exc}"
+        self.instrumentation.emit(self, total, error)
+        return False
+
+class Instrumentation:
+    """
+    Point d'accroche de l'instrumentation du prédicteur
+
+    Sans collecteur, ``start_batch`` retourne None et le chemin de
+    prédiction ne fait aucune mesure : le surcoût se limite à un test.
+    """
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.sinks)
+
+    def add_sink(self, sink):
+        with self._lock:
+            self.sinks = self.sinks + [sink]
+        return sink
+
+    def remove_sink(self, sink):
+        with self._lock:
+            self.sinks = [s for s in self.sinks if s is not sink]
+
+    def start_batch(self, rows=0, **labels):
+        """Retourne un BatchTimer, ou None si l'instrumentation est désactivée"""
+        if not self.sinks:
+            return None
+        return BatchTimer(self, rows, labels)
+
+    def emit(self, timer, total, error=None):
+        for sink in self.sinks:
+            sink.record(timer.stages, total, timer.rows, error, timer.labels)
+
+class HistogramSink:
+    """
+    Histogrammes en mémoire des durées par étape, plus compteurs de lignes,
+    de lots et d'erreurs
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = {}
+            self.sums = {}
+            self.observations = {}
+            self.rows = 0
+            self.batches = 0
+            self.errors = 0
+
+    def _observe(self, stage, value):
+        counts = self.counts.get(stage)
+        if counts is None:
+            counts = self.counts[stage] = [0] * (len(self.buckets) + 1)
+            self.sums[stage] = 0.0
+            self.observations[stage] = 0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[stage] += value
+        self.observations[stage] += 1
+
+    def record(self, stages, total, rows, error=None, labels=None):
+        with self._lock:
+            for stage, value in stages.items():
+                self._observe(stage, value)
+            self._observe('total', total)
+            self.rows += rows
+            self.batches += 1
+            if error is not None:
+                self.errors += 1
+
+    def quantile(self, stage, q):
+        """Quantile approximatif (borne supérieure du seau atteint)"""
+        with self._lock:
+            counts = self.counts.get(stage)
+            if not counts:
+                return None
+            target = q * self.observations[stage]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                if cumulative >= target:
+                    return bound
+        return float('inf')
+
+    def snapshot(self):
+        """Compteurs et durées moyennes/p50/p99 par étape"""
+        stages = {}
+        for stage in list(self.counts):
+            n = self.observations[stage]
+            stages[stage] = {'count': n, 'mean_s': self.sums[stage] / n if n else 0.0,
+                             'p50_s': self.quantile(stage, 0.5), 'p99_s': self.quantile(stage, 0.99)}
+        return {'rows': self.rows, 'batches': self.batches, 'errors': self.errors, 'stages': stages}
+
+class PrometheusSink(HistogramSink):
+    """Histogrammes exportés au format texte Prometheus (``render`` ou ``dump``)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix='predictor'):
+        super().__init__(buckets)
+        self.prefix = prefix
+
+    def render(self):
+        name = f"{self.prefix}_stage_duration_seconds"
+        lines = [f"# HELP {name} Durée des étapes de prédiction par lot",
+                 f"# TYPE {name} histogram"]
+        with self._lock:
+            for stage in sorted(self.counts):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), self.counts[stage]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {self.sums[stage]!r}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {self.observations[stage]}')
+            for metric, value, help_text in (('rows_total', self.rows, "Lignes prédites"),
+                                             ('batches_total', self.batches, "Lots prédits"),
+                                             ('errors_total', self.errors, "Lots en erreur")):
+                lines.append(f"# HELP {self.prefix}_{metric} {help_text}")
+                lines.append(f"# TYPE {self.prefix}_{metric} counter")
+                lines.append(f"{self.prefix}_{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+class LogSink:
+    """Une ligne JSON par lot sur le logger ``predictor.metrics``"""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger('predictor.metrics')
+        self.level = level
+
+    def record(self, stages, total, rows, error=None, labels=None):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        event = {'event': 'predict_batch', 'rows': rows, 'total_ms': round(total * 1000, 4),
+                 'stages_ms': {stage: round(value * 1000, 4) for stage, value in stages.items()}}
+        if labels:
+            event.update(labels)
+        if error is not None:
+            event['error'] = error
+        self.logger.log(self.level, json.dumps(event))
+
+_default_instrumentation = Instrumentation()
+
+def get_instrumentation():
+    """Instrumentation partagée par défaut par tous les prédicteurs du processus"""
+    return _default_instrumentation
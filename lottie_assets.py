@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import threading
+import time
+
+DEFAULT_DIRECTORY = 'animations'
+DEFAULT_TIMEOUT = 5.0
+
+# Délai avant une nouvelle tentative de téléchargement après un échec
+DEFAULT_RETRY_AFTER = 300.0
+
+logger = logging.getLogger(__name__)
+
+class LottieAssets:
+    """
+    Animations Lottie résolues une seule fois par processus
+
+    Chaque animation est cherchée en mémoire, puis dans son fichier local
+    (lu et analysé une seule fois). Si le fichier manque, ``get`` retourne
+    None immédiatement et un thread de fond la télécharge, l'écrit dans le
+    fichier local (disponible hors ligne au prochain démarrage) et la garde
+    en mémoire : l'affichage d'une page n'attend jamais le réseau. Après un
+    échec, aucun nouveau téléchargement n'est tenté avant ``retry_after``
+    secondes.
+
+    Parameters:
+    -----------
+    assets : dict
+        ``{nom: (url, fichier_local)}`` ; ``fichier_local`` peut être None
+        (défaut : ``directory/<nom du fichier de l'URL>``)
+    directory : str
+        Répertoire des fichiers locaux
+    timeout : float
+        Délai maximal d'un téléchargement, en secondes
+    """
+
+    def __init__(self, assets=None, directory=DEFAULT_DIRECTORY, timeout=DEFAULT_TIMEOUT,
+                 retry_after=DEFAULT_RETRY_AFTER):
+        self.directory = directory
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._sources = {}
+        self._animations = {}
+        self._fetching = set()
+        self._failures = {}
+        self._lock = threading.Lock()
+        for name, (url, local_file) in (assets or {}).items():
+            self.register(name, url, local_file)
+
+    def register(self, name, url, local_file=None):
+        if local_file is None:
+            local_file = os.path.join(self.directory, os.path.basename(url.split('?', 1)[0]))
+        with self._lock:
+            self._sources[name] = (url, local_file)
+
+    def get(self, name):
+        """Animation analysée, ou None si elle n'est pas (encore) disponible"""
+        animation = self._animations.get(name)
+        if animation is not None:
+            return animation
+        with self._lock:
+            animation = self._animations.get(name)
+            if animation is not None:
+                return animation
+            url, local_file = self._sources[name]
+            animation = self._read_local(local_file)
+            if animation is not None:
+                self._animations[name] = animation
+                return animation
+            self._start_fetch(name, url, local_file)
+        return None
+
+    def preload(self, names=None):
+        """Résout les animations (lecture locale ou téléchargement en fond) sans attendre"""
+        for name in names or list(self._sources):
+            self.get(name)
+
+    def _read_local(self, local_file):
+        if not local_file or not os.path.exists(local_file):
+            return None
+        try:
+            with open(local_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Erreur lors du chargement du fichier local %s : %s", local_file, e)
+            return None
+
+    def _start_fetch(self, name, url, local_file):
+        # Appelé sous self._lock
+        if name in self._fetching or time.monotonic() - self._failures.get(name, -self.retry_after) < self.retry_after:
+            return
+        self._fetching.add(name)
+        threading.Thread(target=self._fetch, args=(name, url, local_file), daemon=True,
+                         name=f"lottie-{name}").start()
+
+    def _fetch(self, name, url, local_file):
+        try:
+            import requests
+            r = requests.get(url, timeout=self.timeout)
+            r.raise_for_status()
+            animation = r.json()
+        except Exception as e:
+            logger.warning("Échec du chargement de l'animation depuis l'URL %s : %s", url, e)
+            with self._lock:
+                self._fetching.discard(name)
+                self._failures[name] = time.monotonic()
+            return
+        if local_file:
+            try:
+                if os.path.dirname(local_file):
+                    os.makedirs(os.path.dirname(local_file), exist_ok=True)
+                tmp_path = f"{local_file}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(animation, f)
+                os.replace(tmp_path, local_file)
+            except OSError as e:
+                logger.warning("Impossible d'écrire %s : %s", local_file, e)
+        with self._lock:
+            self._animations[name] = animation
+            self._fetching.discard(name)
+            self._failures.pop(name, None)
@@ -0,0 +1,288 @@
+import argparse
+import json
+import os
+import pickle
+import struct
+import subprocess
+import sys
+import time
+import numpy as np
+from tree_engine import TreeEnsembleEngine
+
+# Format « artefact mappable » :
+#   MAGIC (8 octets) | longueur de l'en-tête (uint64 LE) | en-tête JSON |
+#   tableaux numpy bruts, chacun aligné sur ALIGNMENT octets
+# L'en-tête décrit le modèle, les scalers et l'emplacement de chaque tableau.
+MAGIC = b'SNMLMAP1'
+ALIGNMENT = 64
+FORMAT_VERSION = 1
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def is_mapped_artifact(path):
+    """Indique si le fichier est un artefact mappable (et non un pickle)"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+def write_arrays(path, arrays, meta):
+    """
+    Écrit un dictionnaire de tableaux numpy et des métadonnées JSON dans un fichier mappable
+
+    Le fichier est écrit dans un fichier temporaire puis renommé, afin que les
+    processus qui lisent l'artefact ne voient jamais un fichier incomplet.
+    """
+    table = {}
+    offset = 0
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    for name, array in arrays.items():
+        offset = _align(offset)
+        table[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    header = json.dumps({'format_version': FORMAT_VERSION, 'meta': meta, 'arrays': table}).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + table[name]['offset'])
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+def read_arrays(path, mmap=True):
+    """
+    Ouvre un artefact mappable
+
+    Avec ``mmap=True``, les tableaux sont des vues en lecture seule sur le
+    fichier projeté en mémoire : aucune copie n'est faite au chargement et
+    tous les processus qui ouvrent le même fichier partagent les mêmes pages
+    physiques via le cache du système.
+
+    Returns:
+    --------
+    (dict, dict)
+        Métadonnées et tableaux numpy
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} n'est pas un artefact mappable")
+        (header_length,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_length).decode('utf-8'))
+    if header['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"Version de format non prise en charge: {header['format_version']}")
+    data_start = _align(len(MAGIC) + 8 + header_length)
+    if mmap:
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        with open(path, 'rb') as f:
+            buffer = np.frombuffer(f.read(), dtype=np.uint8)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        start = data_start + spec['offset']
+        arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+    return header['meta'], arrays
+
+# --------- EXPORT DES MODÈLES ---------
+
+def _export_svr(model):
+    kernel = model.kernel
+    if kernel not in ('rbf', 'linear', 'poly', 'sigmoid'):
+        raise ValueError(f"Noyau SVR non pris en charge: {kernel}")
+    meta = {'kind': 'svr', 'kernel': kernel, 'gamma': float(model._gamma), 'coef0': float(model.coef0),
+            'degree': int(model.degree), 'n_features': int(model.n_features_in_)}
+    arrays = {
+        'svr.support_vectors': np.asarray(model.support_vectors_, dtype=np.float64),
+        'svr.dual_coef': np.asarray(model.dual_coef_, dtype=np.float64).ravel(),
+        'svr.intercept': np.asarray(model.intercept_, dtype=np.float64).ravel()
+    }
+    return meta, arrays
+
+def export_model(model):
+    """Convertit un modèle entraîné en (métadonnées, tableaux numpy)"""
+    name = type(model).__name__
+    if name in ('RandomForestRegressor', 'XGBRegressor'):
+        return TreeEnsembleEngine.from_model(model).to_arrays()
+    if isinstance(model, TreeEnsembleEngine):
+        return model.to_arrays()
+    if name == 'SVR':
+        return _export_svr(model)
+    raise ValueError(f"Modèle non pris en charge par le format mappable: {name}")
+
+def save_artifact(path, model, scaler_X, scaler_y):
+    """Sauvegarde le modèle et les scalers au format mappable"""
+    model_meta, arrays = export_model(model)
+    n_features = len(scaler_X.feature_names_in_)
+    mean = scaler_X.mean_ if scaler_X.with_mean and scaler_X.mean_ is not None else np.zeros(n_features)
+    scale = scaler_X.scale_ if scaler_X.with_std and scaler_X.scale_ is not None else np.ones(n_features)
+    arrays['scaler_X.mean'] = np.asarray(mean, dtype=np.float64)
+    arrays['scaler_X.scale'] = np.asarray(scale, dtype=np.float64)
+    arrays['scaler_y.min'] = np.asarray(scaler_y.min_, dtype=np.float64)
+    arrays['scaler_y.scale'] = np.asarray(scaler_y.scale_, dtype=np.float64)
+    meta = {
+        'model': model_meta,
+        'model_class': type(model).__name__,
+        'feature_names': [str(name) for name in scaler_X.feature_names_in_]
+    }
+    write_arrays(path, arrays, meta)
+
+def convert_pickle(pkl_path, out_path):
+    """Convertit un artefact pickle (regression_credit_card.py) au format mappable"""
+    with open(pkl_path, 'rb') as f:
+        saved_data = pickle.load(f)
+    save_artifact(out_path, saved_data['model'], saved_data['scaler_X'], saved_data['scaler_y'])
+
+# --------- MODÈLES CHARGÉS (numpy uniquement) ---------
+
+class ArrayStandardScaler:
+    """Équivalent de StandardScaler.transform sur des tableaux mappés"""
+
+    with_mean = True
+    with_std = True
+
+    def __init__(self, mean, scale, feature_names):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    def transform(self, X):
+        if hasattr(X, 'columns'):
+            X = X[list(self.feature_names_in_)].to_numpy()
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+class ArrayMinMaxScaler:
+    """Équivalent de MinMaxScaler (transform / inverse_transform) sur des tableaux mappés"""
+
+    def __init__(self, min_, scale):
+        self.min_ = min_
+        self.scale_ = scale
+
+    def transform(self, y):
+        return np.asarray(y, dtype=np.float64) * self.scale_ + self.min_
+
+    def inverse_transform(self, y):
+        return (np.asarray(y, dtype=np.float64) - self.min_) / self.scale_
+
+class KernelSVRModel:
+    """SVR évalué directement à partir des vecteurs de support"""
+
+    def __init__(self, meta, arrays, chunk_size=4096):
+        self.meta = meta
+        self.n_features_in_ = meta['n_features']
+        self.support_vectors_ = arrays['svr.support_vectors']
+        self.dual_coef_ = arrays['svr.dual_coef']
+        self.intercept_ = arrays['svr.intercept']
+        self.chunk_size = chunk_size
+        self._sv_sq_norms = np.einsum('ij,ij->i', self.support_vectors_, self.support_vectors_)
+
+    def _kernel(self, X):
+        kernel, gamma = self.meta['kernel'], self.meta['gamma']
+        dot = X @ self.support_vectors_.T
+        if kernel == 'linear':
+            return dot
+        if kernel == 'rbf':
+            sq_dist = np.einsum('ij,ij->i', X, X)[:, None] - 2 * dot + self._sv_sq_norms[None, :]
+            return np.exp(-gamma * np.maximum(sq_dist, 0))
+        if kernel == 'poly':
+            return (gamma * dot + self.meta['coef0']) ** self.meta['degree']
+        return np.tanh(gamma * dot + self.meta['coef0'])
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        out = np.empty(len(X))
+        for start in range(0, len(X), self.chunk_size):
+            stop = start + self.chunk_size
+            out[start:stop] = self._kernel(X[start:stop]) @ self.dual_coef_ + self.intercept_[0]
+        return out
+
+def load_artifact(path, mmap=True):
+    """
+    Charge un artefact mappable sans désérialisation ni import de sklearn/xgboost
+
+    Returns:
+    --------
+    (model, scaler_X, scaler_y)
+        Objets numpy exposant predict / transform / inverse_transform
+    """
+    meta, arrays = read_arrays(path, mmap=mmap)
+    model_meta = meta['model']
+    if model_meta['kind'] == 'tree_ensemble':
+        model = TreeEnsembleEngine(model_meta, arrays)
+    elif model_meta['kind'] == 'svr':
+        model = KernelSVRModel(model_meta, arrays)
+    else:
+        raise ValueError(f"Type de modèle inconnu: {model_meta['kind']}")
+    scaler_X = ArrayStandardScaler(arrays['scaler_X.mean'], arrays['scaler_X.scale'], meta['feature_names'])
+    scaler_y = ArrayMinMaxScaler(arrays['scaler_y.min'], arrays['scaler_y.scale'])
+    return model, scaler_X, scaler_y
+
+# --------- BENCHMARK DE CHARGEMENT ---------
+
+_COLD_LOAD_SNIPPETS = {
+    'pickle': "import pickle; pickle.load(open({path!r}, 'rb'))",
+    'mmap': "import model_artifact; model_artifact.load_artifact({path!r})"
+}
+
+def benchmark_load(pkl_path, mmap_path, repeat=20, cold_repeat=5):
+    """
+    Compare le temps de chargement pickle / mappable
+
+    - à chaud : chargements répétés dans le processus courant ;
+    - à froid : nouveau processus Python (imports compris), comme au
+      démarrage d'un worker.
+    """
+    results = {}
+    loaders = {'pickle': lambda: pickle.load(open(pkl_path, 'rb')), 'mmap': lambda: load_artifact(mmap_path)}
+    for name, loader in loaders.items():
+        loader()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            loader()
+            timings.append(time.perf_counter() - start)
+        results[name] = {'warm_median_ms': 1000 * float(np.median(timings))}
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name, path in (('pickle', pkl_path), ('mmap', mmap_path)):
+        snippet = _COLD_LOAD_SNIPPETS[name].format(path=os.path.abspath(path))
+        timings = []
+        for _ in range(cold_repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-W', 'ignore', '-c', snippet], cwd=here, check=True)
+            timings.append(time.perf_counter() - start)
+        results[name]['cold_process_median_ms'] = 1000 * float(np.median(timings))
+        results[name]['file_bytes'] = os.path.getsize(path)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Artefact de modèle mappable en mémoire")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert = subparsers.add_parser('convert', help="Convertit un artefact .pkl au format mappable")
+    convert.add_argument('pkl')
+    convert.add_argument('out')
+    bench = subparsers.add_parser('benchmark', help="Compare les temps de chargement pickle / mappable")
+    bench.add_argument('pkl')
+    bench.add_argument('mmap')
+    bench.add_argument('--repeat', type=int, default=20)
+    bench.add_argument('--cold-repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        convert_pickle(args.pkl, args.out)
+        print(f"Artefact mappable écrit dans '{args.out}' ({os.path.getsize(args.out):,} octets)")
+        return
+
+    results = benchmark_load(args.pkl, args.mmap, args.repeat, args.cold_repeat)
+    print(f"\n{'Format':<8} {'Taille (o)':>12} {'Chaud (ms)':>12} {'Processus froid (ms)':>22}")
+    for name, row in results.items():
+        print(f"{name:<8} {row['file_bytes']:>12,} {row['warm_median_ms']:>12.2f} {row['cold_process_median_ms']:>22.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,575 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, KFold, ParameterGrid
+
+SEARCH_STRATEGIES = ['grid', 'halving', 'resumable']
+DEFAULT_TRIAL_STORE = 'search_trials.sqlite'
+DEFAULT_CV_CACHE = 'cache/cv'
+
+# Part de l'entraînement de chaque pli réservée à l'arrêt précoce de XGBoost :
+# le pli de test ne sert qu'au score
+VALIDATION_FRACTION = 0.2
+
+def _json_key(value):
+    return json.dumps(value, sort_keys=True, default=repr)
+
+def data_fingerprint(X, y, cv):
+    """Empreinte des données d'entraînement et du découpage en plis"""
+    digest = hashlib.sha256()
+    for array in (X, y):
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.dtype.str, array.shape)).encode())
+        digest.update(array.tobytes())
+    digest.update(repr(cv).encode())
+    return digest.hexdigest()
+
+def estimator_fingerprint(family, estimator):
+    """Identifie une famille de modèles par son nom, sa classe et ses paramètres de base"""
+    base = f"{family}|{type(estimator).__module__}.{type(estimator).__name__}|{_json_key(estimator.get_params())}"
+    return hashlib.sha256(base.encode()).hexdigest()[:16]
+
+def _save_array(path, array):
+    # Écriture atomique : un processus concurrent ne lit jamais un fichier partiel
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+class CVData:
+    """
+    Données de validation croisée partagées entre processus
+
+    La matrice d'entraînement encodée est écrite une seule fois sur disque
+    puis mappée en mémoire (``np.load(mmap_mode='r')``) : tous les processus
+    de recherche lisent les mêmes pages au lieu d'en recevoir chacun une
+    copie. Le prétraitement (ex. StandardScaler) est ajusté sur la partie
+    d'entraînement de chaque pli uniquement ; le prétraitement ajusté et les
+    matrices transformées sont mis en cache par (empreinte des données,
+    prétraitement, pli) et calculés une seule fois pour tous les candidats.
+
+    Parameters:
+    -----------
+    X, y : array-like
+        Matrice encodée (non normalisée) et cible
+    cv : int
+        Nombre de plis (KFold sans mélange, comme GridSearchCV)
+    preprocessor : transformer, optional
+        Prétraitement des features, cloné et ajusté par pli
+    cache_dir : str, optional
+        Répertoire du cache ; None garde tout en mémoire
+    """
+
+    def __init__(self, X, y, cv=5, preprocessor=None, cache_dir=DEFAULT_CV_CACHE):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        y = np.ascontiguousarray(y, dtype=np.float64)
+        self.cv = cv
+        self.preprocessor = preprocessor
+        self.cache_dir = cache_dir
+        splitter = KFold(n_splits=cv)
+        self.splits = list(splitter.split(X))
+        self.data_hash = data_fingerprint(X, y, splitter)
+        preprocessing = 'identity' if preprocessor is None else (
+            f"{type(preprocessor).__name__}|{_json_key(preprocessor.get_params())}")
+        # Les scores dépendent aussi du prétraitement
+        self.fingerprint = hashlib.sha256(f"{self.data_hash}|{preprocessing}".encode()).hexdigest()
+        self._folds = {}
+        if cache_dir is None:
+            self.directory = None
+            self.X, self.y = X, y
+        else:
+            self.directory = os.path.join(cache_dir, self.data_hash[:16])
+            self.X = self._mapped(self.directory, 'X', X)
+            self.y = self._mapped(self.directory, 'y', y)
+
+    def __getstate__(self):
+        # Les tableaux mappés sont rouverts depuis le disque plutôt que copiés
+        state = dict(self.__dict__)
+        if self.directory is not None:
+            state.update(X=None, y=None, _folds={})
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.directory is not None:
+            self.X = np.load(os.path.join(self.directory, 'X.npy'), mmap_mode='r')
+            self.y = np.load(os.path.join(self.directory, 'y.npy'), mmap_mode='r')
+
+    @staticmethod
+    def _mapped(directory, name, array):
+        path = os.path.join(directory, f"{name}.npy")
+        if not os.path.exists(path):
+            os.makedirs(directory, exist_ok=True)
+            _save_array(path, array)
+        return np.load(path, mmap_mode='r')
+
+    def _prepare(self, name, train, test):
+        if name in self._folds:
+            return self._folds[name]
+        directory = None
+        if self.directory is not None:
+            directory = os.path.join(self.directory, self.fingerprint[:16], name)
+            if os.path.exists(os.path.join(directory, 'preprocessor.pkl')):
+                arrays = tuple(np.load(os.path.join(directory, f"{part}.npy"), mmap_mode='r')
+                               for part in ('X_train', 'y_train', 'X_test', 'y_test'))
+                self._folds[name] = arrays
+                return arrays
+
+        X_train, y_train = np.asarray(self.X[train]), np.asarray(self.y[train])
+        X_test, y_test = np.asarray(self.X[test]), np.asarray(self.y[test])
+        preprocessor = None
+        if self.preprocessor is not None:
+            preprocessor = clone(self.preprocessor).fit(X_train)
+            X_train = preprocessor.transform(X_train)
+            X_test = preprocessor.transform(X_test) if len(X_test) else X_test
+        arrays = (X_train, y_train, X_test, y_test)
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            for part, array in zip(('X_train', 'y_train', 'X_test', 'y_test'), arrays):
+                _save_array(os.path.join(directory, f"{part}.npy"), array)
+            # Écrit en dernier : marque le pli comme complet
+            with open(os.path.join(directory, 'preprocessor.pkl'), 'wb') as f:
+                pickle.dump(preprocessor, f)
+            arrays = tuple(np.load(os.path.join(directory, f"{part}.npy"), mmap_mode='r')
+                           for part in ('X_train', 'y_train', 'X_test', 'y_test'))
+        self._folds[name] = arrays
+        return arrays
+
+    def fold(self, fold):
+        """(X_train, y_train, X_test, y_test) du pli, features prétraitées sur sa partie d'entraînement"""
+        train, test = self.splits[fold]
+        return self._prepare(f"fold{fold}", train, test)
+
+    def full(self):
+        """(X, y) complets, prétraitement ajusté sur tout le jeu (réentraînement final)"""
+        X, y, _, _ = self._prepare('full', np.arange(len(self.X)), np.arange(0))
+        return X, y
+
+    def prepare(self):
+        """Calcule tous les plis à l'avance (avant de démarrer des processus)"""
+        for fold in range(self.cv):
+            self.fold(fold)
+        self.full()
+        return self
+
+class TrialStore:
+    """
+    Stockage SQLite des essais de validation croisée
+
+    Chaque essai (famille de modèles, paramètres, pli, empreinte des données)
+    est enregistré dès qu'il se termine ; une exécution relancée ou répétée ne
+    réévalue que les essais absents.
+    """
+
+    def __init__(self, path=DEFAULT_TRIAL_STORE):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS trials (
+                family TEXT NOT NULL,
+                estimator TEXT NOT NULL,
+                params TEXT NOT NULL,
+                fold INTEGER NOT NULL,
+                data_hash TEXT NOT NULL,
+                score REAL NOT NULL,
+                fit_time REAL,
+                score_time REAL,
+                created_at REAL,
+                n_iterations INTEGER,
+                PRIMARY KEY (estimator, params, fold, data_hash)
+            )
+        """)
+        columns = {row[1] for row in self.connection.execute('PRAGMA table_info(trials)')}
+        if 'n_iterations' not in columns:
+            # Stockage créé avant l'enregistrement des itérations retenues
+            self.connection.execute('ALTER TABLE trials ADD COLUMN n_iterations INTEGER')
+        self.connection.commit()
+
+    def load_scores(self, estimator_key, data_hash):
+        """Retourne {(params, pli): score} déjà évalués pour cette famille et ces données"""
+        return {key: score for key, (score, _) in self.load_trials(estimator_key, data_hash).items()}
+
+    def load_trials(self, estimator_key, data_hash):
+        """Retourne {(params, pli): (score, itérations retenues ou None)}"""
+        rows = self.connection.execute(
+            'SELECT params, fold, score, n_iterations FROM trials WHERE estimator = ? AND data_hash = ?',
+            (estimator_key, data_hash)
+        )
+        return {(params, fold): (score, n_iterations) for params, fold, score, n_iterations in rows}
+
+    def put(self, family, estimator_key, params_key, fold, data_hash, score, fit_time, score_time,
+            n_iterations=None):
+        self.connection.execute(
+            'INSERT OR REPLACE INTO trials '
+            '(family, estimator, params, fold, data_hash, score, fit_time, score_time, created_at, n_iterations) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (family, estimator_key, params_key, fold, data_hash, score, fit_time, score_time, time.time(),
+             n_iterations)
+        )
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+def supports_staged_fit(estimator):
+    """Vrai si un seul ajustement peut être évalué à plusieurs valeurs de n_estimators"""
+    params = estimator.get_params()
+    return 'n_estimators' in params and (type(estimator).__name__ == 'XGBRegressor' or 'warm_start' in params)
+
+class _BoosterCheckpoint(RegressorMixin, BaseEstimator):
+    """Vue d'un XGBRegressor limitée à ses ``n_iterations`` premiers arbres"""
+
+    def __init__(self, model, n_iterations):
+        self.model = model
+        self.n_iterations = n_iterations
+
+    def predict(self, X):
+        return self.model.predict(X, iteration_range=(0, self.n_iterations))
+
+def validation_split(X, y, fraction=VALIDATION_FRACTION, random_state=0):
+    """
+    Sépare (X, y) en parties d'ajustement et de validation
+
+    Returns:
+    --------
+    tuple
+        (X_fit, y_fit, X_val, y_val), la validation étant un tirage
+        reproductible de ``fraction`` des lignes
+    """
+    order = np.random.default_rng(random_state).permutation(len(X))
+    n_val = max(1, int(round(len(X) * fraction)))
+    fit, val = np.sort(order[n_val:]), np.sort(order[:n_val])
+    X, y = np.asarray(X), np.asarray(y)
+    return X[fit], y[fit], X[val], y[val]
+
+def _early_stopping_split(model, X_train, y_train, early_stopping_rounds):
+    """Active l'arrêt précoce de XGBoost ; retourne (X_fit, y_fit, paramètres de fit)"""
+    X_train, y_train, X_val, y_val = validation_split(X_train, y_train)
+    model.set_params(early_stopping_rounds=early_stopping_rounds)
+    return X_train, y_train, {'eval_set': [(X_val, y_val)], 'verbose': False}
+
+def _fit_and_score(estimator, params, data, fold, scoring, checkpoints=None, early_stopping_rounds=None):
+    """
+    Ajuste sur la partie d'entraînement du pli ``fold`` de ``data`` (CVData)
+    et score sur sa partie de test
+
+    Avec ``checkpoints`` (valeurs croissantes de n_estimators), un seul
+    ensemble est construit et scoré à chaque étape : warm_start pour la forêt
+    aléatoire (arbres ajoutés), un ajustement au maximum évalué avec
+    ``iteration_range`` pour XGBoost. Les scores sont identiques à des
+    ajustements indépendants. Avec ``early_stopping_rounds``, XGBoost est
+    ajusté sur une partie de l'entraînement du pli et s'arrête quand le score
+    de l'autre partie (``validation_split``) ne s'améliore plus ; le pli de
+    test ne sert qu'au score, avec le meilleur nombre d'arbres atteint (les
+    étapes suivantes aussi). Sans ``checkpoints``, chaque n_estimators est
+    ajusté et arrêté séparément.
+
+    Returns:
+    --------
+    (list, float, float, list or None)
+        Scores (un par étape), durée d'ajustement, durée de score et, avec
+        l'arrêt précoce, nombre d'arbres réellement utilisés à chaque étape
+    """
+    scorer = get_scorer(scoring)
+    X_train, y_train, X_test, y_test = data.fold(fold)
+    model = clone(estimator).set_params(**params)
+    fit_time = score_time = 0.0
+    scores, iterations = [], None
+    if checkpoints is None:
+        fit_params = {}
+        if early_stopping_rounds:
+            X_train, y_train, fit_params = _early_stopping_split(model, X_train, y_train, early_stopping_rounds)
+        start = time.perf_counter()
+        model.fit(X_train, y_train, **fit_params)
+        fit_time = time.perf_counter() - start
+        scored = model
+        if early_stopping_rounds:
+            iterations = [model.best_iteration + 1]
+            scored = _BoosterCheckpoint(model, iterations[0])
+        start = time.perf_counter()
+        scores.append(float(scorer(scored, X_test, y_test)))
+        score_time = time.perf_counter() - start
+    elif type(model).__name__ == 'XGBRegressor':
+        fit_params = {}
+        if early_stopping_rounds:
+            X_train, y_train, fit_params = _early_stopping_split(model, X_train, y_train, early_stopping_rounds)
+        start = time.perf_counter()
+        model.set_params(n_estimators=max(checkpoints)).fit(X_train, y_train, **fit_params)
+        fit_time = time.perf_counter() - start
+        n_trained = model.best_iteration + 1 if early_stopping_rounds else max(checkpoints)
+        start = time.perf_counter()
+        for n_estimators in checkpoints:
+            view = _BoosterCheckpoint(model, min(n_estimators, n_trained))
+            scores.append(float(scorer(view, X_test, y_test)))
+        score_time = time.perf_counter() - start
+        if early_stopping_rounds:
+            iterations = [min(n_estimators, n_trained) for n_estimators in checkpoints]
+    else:
+        model.set_params(warm_start=True)
+        for n_estimators in sorted(checkpoints):
+            start = time.perf_counter()
+            model.set_params(n_estimators=n_estimators).fit(X_train, y_train)
+            fit_time += time.perf_counter() - start
+            start = time.perf_counter()
+            scores.append(float(scorer(model, X_test, y_test)))
+            score_time += time.perf_counter() - start
+    return scores, fit_time, score_time, iterations
+
+class ResumableSearchCV:
+    """
+    Recherche exhaustive sur grille, reprise à partir d'un TrialStore
+
+    Même découpage que GridSearchCV pour un régresseur (KFold sans
+    mélange) et même interface de résultat : ``best_params_``,
+    ``best_score_``, ``best_estimator_``, ``cv_results_`` et ``predict``.
+
+    Avec ``warm_start``, les candidats qui ne diffèrent que par
+    ``n_estimators`` (forêt aléatoire, XGBoost) partagent un seul ajustement
+    par pli, scoré à chaque valeur de la grille (voir ``_fit_and_score``).
+    Avec ``early_stopping_rounds``, le modèle final est réentraîné avec le
+    nombre d'arbres retenu en moyenne sur les plis (``refit_params``), celui
+    qui a été scoré.
+    """
+
+    def __init__(self, estimator, param_grid, store, family, cv=5, scoring='neg_mean_squared_error',
+                 n_jobs=-1, verbose=1, warm_start=True, early_stopping_rounds=None):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.store = store
+        self.family = family
+        self.cv = cv
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.verbose = verbose
+        self.warm_start = warm_start
+        self.early_stopping_rounds = early_stopping_rounds
+
+    def plan(self, data):
+        """
+        Prépare la recherche sur ``data`` (CVData) et retourne les essais restant à évaluer
+
+        Returns:
+        --------
+        list of (tuple, dict, int, tuple or None)
+            Essais (clés des candidats, paramètres, pli, valeurs de
+            n_estimators à scorer ou None) absents du stockage
+        """
+        if data.cv != self.cv:
+            raise ValueError(f"CVData à {data.cv} plis, la recherche en attend {self.cv}")
+        self.splits_ = data.splits
+        self._candidates = list(ParameterGrid(self.param_grid))
+        self._params_keys = [_json_key(params) for params in self._candidates]
+        self._data_hash = data.fingerprint
+        staged = self.warm_start and supports_staged_fit(self.estimator)
+        reference = self.estimator
+        if self.early_stopping_rounds and type(self.estimator).__name__ == 'XGBRegressor':
+            # L'arrêt précoce (et sa partie de validation) modifie les scores : essais stockés à part
+            reference = clone(self.estimator).set_params(early_stopping_rounds=self.early_stopping_rounds)
+        self._early_stopping_rounds = self.early_stopping_rounds if reference is not self.estimator else None
+        family_key = self.family
+        if self._early_stopping_rounds:
+            family_key = f"{self.family}|validation={VALIDATION_FRACTION}"
+            if not staged:
+                # Arrêt propre à chaque n_estimators : autres scores que l'ajustement partagé
+                family_key += '|unstaged'
+        self._estimator_key = estimator_fingerprint(family_key, reference)
+        trials = self.store.load_trials(self._estimator_key, self._data_hash)
+        self._scores = {key: score for key, (score, _) in trials.items()}
+        self._iterations = {key: n for key, (_, n) in trials.items() if n is not None}
+
+        # Candidats regroupés par paramètres hors n_estimators
+        groups = {}
+        for key, params in zip(self._params_keys, self._candidates):
+            if staged and 'n_estimators' in params:
+                base = {name: value for name, value in params.items() if name != 'n_estimators'}
+                groups.setdefault(_json_key(base), []).append((params['n_estimators'], key, params))
+            else:
+                groups[key] = [(None, key, params)]
+
+        tasks = []
+        for fold in range(len(self.splits_)):
+            for members in groups.values():
+                missing = sorted((n, key, params) for n, key, params in members
+                                 if (key, fold) not in self._scores)
+                if not missing:
+                    continue
+                if missing[0][0] is None:
+                    tasks.append(((missing[0][1],), missing[0][2], fold, None))
+                else:
+                    # Paramètres du plus grand ensemble : sert aussi d'estimation de coût
+                    tasks.append((tuple(key for _, key, _ in missing), missing[-1][2], fold,
+                                  tuple(n for n, _, _ in missing)))
+        if self.verbose:
+            total = len(self._candidates) * len(self.splits_)
+            evaluated = sum(len(task[0]) for task in tasks)
+            print(f"{self.family} : {len(self._candidates)} candidats x {len(self.splits_)} plis, "
+                  f"{total - evaluated} essais repris du stockage, {evaluated} à évaluer "
+                  f"en {len(tasks)} ajustements")
+        return tasks
+
+    def task_args(self, task):
+        """Arguments de ``_fit_and_score`` après (estimateur, paramètres, données)"""
+        _, _, fold, checkpoints = task
+        return fold, self.scoring, checkpoints, self._early_stopping_rounds
+
+    def record(self, task, result):
+        """Enregistre immédiatement les scores (un par candidat) d'un ajustement"""
+        keys, _, fold, _ = task
+        scores, fit_time, score_time, iterations = result[:4]
+        for i, (key, score) in enumerate(zip(keys, scores)):
+            n_iterations = iterations[i] if iterations else None
+            self.store.put(self.family, self._estimator_key, key, fold, self._data_hash, score, fit_time, score_time,
+                           n_iterations)
+            self._scores[(key, fold)] = score
+            if n_iterations is not None:
+                self._iterations[(key, fold)] = n_iterations
+
+    def summarize(self):
+        """Agrège les scores des plis par candidat et sélectionne le meilleur"""
+        n_folds = len(self.splits_)
+        fold_scores = np.array([[self._scores[(key, fold)] for fold in range(n_folds)]
+                                for key in self._params_keys])
+        mean_scores = fold_scores.mean(axis=1)
+        self.cv_results_ = {
+            'params': self._candidates,
+            'mean_test_score': mean_scores,
+            'std_test_score': fold_scores.std(axis=1),
+            'rank_test_score': (-mean_scores).argsort().argsort() + 1
+        }
+        self.best_index_ = int(np.argmax(mean_scores))
+        self.best_params_ = self._candidates[self.best_index_]
+        self.best_score_ = float(mean_scores[self.best_index_])
+        return self
+
+    def refit_params(self):
+        """
+        Paramètres du réentraînement final : ceux du meilleur candidat, avec
+        l'arrêt précoce ``n_estimators`` ramené au nombre moyen d'arbres
+        utilisés pour le scorer sur les plis
+        """
+        params = dict(self.best_params_)
+        key = self._params_keys[self.best_index_]
+        iterations = [self._iterations.get((key, fold)) for fold in range(len(self.splits_))]
+        if self._early_stopping_rounds and None not in iterations:
+            params['n_estimators'] = max(1, int(round(np.mean(iterations))))
+        return params
+
+    def fit(self, X, y=None):
+        """
+        Parameters:
+        -----------
+        X : CVData or array-like
+            Données partagées (plis prétraités en cache), ou matrice déjà
+            prétraitée conservée en mémoire
+        y : array-like, optional
+            Cible, si ``X`` n'est pas un CVData
+        """
+        data = X if isinstance(X, CVData) else CVData(X, y, cv=self.cv, cache_dir=None)
+        tasks = self.plan(data)
+        if tasks:
+            # Plis calculés ici une seule fois, puis lus par tous les processus
+            data.prepare()
+        results = Parallel(n_jobs=self.n_jobs, return_as='generator')(
+            delayed(_fit_and_score)(self.estimator, task[1], data, *self.task_args(task))
+            for task in tasks
+        )
+        # Chaque essai est enregistré dès son retour : une interruption ne perd rien
+        for task, result in zip(tasks, results):
+            self.record(task, result)
+        self.summarize()
+        self.best_estimator_ = clone(self.estimator).set_params(**self.refit_params()).fit(*data.full())
+        return self
+
+    def predict(self, X):
+        return self.best_estimator_.predict(X)
+
+def make_search(model_info, strategy='grid', cv=5, scoring='neg_mean_squared_error', n_jobs=-1,
+                halving_resource='n_samples', halving_factor=3, random_state=42, verbose=1,
+                store=None, family=None, warm_start=True, early_stopping_rounds=None):
+    """
+    Construit la recherche d'hyperparamètres pour une famille de modèles
+
+    Parameters:
+    -----------
+    model_info : dict
+        Entrée du dictionnaire ``models`` ({'model': estimateur, 'params': grille})
+    strategy : str
+        'grid' : GridSearchCV exhaustif ;
+        'halving' : successive halving (HalvingGridSearchCV) — toutes les
+        configurations sont évaluées avec peu de ressources, seul le meilleur
+        tiers (``halving_factor``) passe à l'itération suivante avec trois
+        fois plus de ressources
+    halving_resource : str
+        'n_samples' (nombre de lignes d'entraînement) ou 'n_estimators'
+        (nombre d'arbres ; la valeur est alors retirée de la grille et varie
+        entre le minimum et le maximum de la grille). Les modèles sans
+        ``n_estimators`` (SVR) utilisent toujours 'n_samples'.
+    store : TrialStore, optional
+        Stockage des essais pour la stratégie 'resumable' : chaque
+        (famille, paramètres, pli, données) n'est évalué qu'une seule fois
+    family : str, optional
+        Nom de la famille de modèles (clé du dictionnaire ``models``)
+    warm_start : bool
+        Stratégie 'resumable' : un seul ajustement par pli pour toutes les
+        valeurs de ``n_estimators`` (forêt aléatoire, XGBoost)
+    early_stopping_rounds : int, optional
+        Stratégie 'resumable' : arrêt précoce de XGBoost sur une partie
+        (``VALIDATION_FRACTION``) de l'entraînement de chaque pli
+
+    Returns:
+    --------
+    GridSearchCV, HalvingGridSearchCV or ResumableSearchCV
+        Objet exposant ``fit``, ``best_params_``, ``best_estimator_`` et ``predict``
+    """
+    if strategy == 'resumable':
+        return ResumableSearchCV(
+            estimator=model_info['model'],
+            param_grid=model_info['params'],
+            store=store if store is not None else TrialStore(),
+            family=family or type(model_info['model']).__name__,
+            cv=cv,
+            scoring=scoring,
+            n_jobs=n_jobs,
+            verbose=verbose,
+            warm_start=warm_start,
+            early_stopping_rounds=early_stopping_rounds
+        )
+    if strategy == 'grid':
+        return GridSearchCV(
+            estimator=model_info['model'],
+            param_grid=model_info['params'],
+            cv=cv,
+            scoring=scoring,
+            n_jobs=n_jobs,
+            verbose=verbose
+        )
+    if strategy != 'halving':
+        raise ValueError(f"Stratégie de recherche inconnue: {strategy} (attendu: {SEARCH_STRATEGIES})")
+
+    param_grid = dict(model_info['params'])
+    options = {'resource': 'n_samples', 'min_resources': 'exhaust'}
+    if halving_resource == 'n_estimators' and 'n_estimators' in param_grid:
+        n_estimators = param_grid.pop('n_estimators')
+        options = {'resource': 'n_estimators',
+                   'min_resources': min(n_estimators),
+                   'max_resources': max(n_estimators)}
+    return HalvingGridSearchCV(
+        estimator=model_info['model'],
+        param_grid=param_grid,
+        factor=halving_factor,
+        cv=cv,
+        scoring=scoring,
+        n_jobs=n_jobs,
+        random_state=random_state,
+        verbose=verbose,
+        **options
+    )
@@ -0,0 +1,174 @@
+import argparse
+import os
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from predict_expenditure import CATEGORICAL_COLUMNS, MODEL_PATH, Predictor, file_sha256
+
+DATA_PATH = 'AER_credit_card_data.csv'
+
+# Incrémenté lorsque la structure ou le calcul des courbes change
+CURVES_VERSION = 1
+
+DEFAULT_GRID_RESOLUTION = 20
+DEFAULT_MAX_ROWS = 1000
+DEFAULT_ICE_ROWS = 50
+
+def curves_path(model_path):
+    """Fichier des courbes, à côté de l'artefact du modèle"""
+    return f"{os.path.splitext(model_path)[0]}.pdp.pkl"
+
+def feature_grid(values, categorical=False, grid_resolution=DEFAULT_GRID_RESOLUTION):
+    """
+    Valeurs de la grille d'une variable brute
+
+    Toutes les valeurs distinctes s'il y en a au plus ``grid_resolution``
+    (variables binaires ou discrètes), sinon des quantiles régulièrement
+    espacés entre 5 % et 95 % pour ne pas extrapoler sur les extrêmes.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    unique = np.unique(values)
+    if categorical or len(unique) <= grid_resolution:
+        return unique
+    return np.unique(np.quantile(values, np.linspace(0.05, 0.95, grid_resolution)))
+
+def compute_curves(predictor, data, grid_resolution=DEFAULT_GRID_RESOLUTION, max_rows=DEFAULT_MAX_ROWS,
+                   ice_rows=DEFAULT_ICE_ROWS, random_state=0):
+    """
+    Courbes de dépendance partielle (PD) et ICE de chaque variable du modèle
+
+    Les variables encodées (``scaler_X.feature_names_in_``) sont regroupées
+    par variable brute : les indicatrices owner_no/owner_yes sont modifiées
+    ensemble, de sorte que chaque ligne évaluée reste un profil valide.
+    Pour chaque variable et chaque valeur de sa grille, la matrice encodée
+    des lignes (éventuellement sous-échantillonnées) est recopiée avec la
+    variable remplacée ; toutes les copies de toutes les variables sont
+    empilées et prédites en un seul appel.
+
+    Parameters:
+    -----------
+    predictor : Predictor
+        Prédicteur du modèle à expliquer
+    data : pandas.DataFrame
+        Données brutes (colonnes de prepare_input_data)
+    grid_resolution : int
+        Nombre maximal de valeurs par grille
+    max_rows : int, optional
+        Lignes tirées au hasard au-delà de ce nombre (None : toutes)
+    ice_rows : int
+        Nombre de courbes ICE individuelles conservées par variable
+
+    Returns:
+    --------
+    dict
+        ``features`` : ``{variable: {'grid', 'pd', 'ice', 'encoded', 'categorical'}}``,
+        plus n_rows et les paramètres du calcul
+    """
+    featurizer = predictor.featurizer
+    rng = np.random.default_rng(random_state)
+    if max_rows is not None and len(data) > max_rows:
+        data = data.iloc[np.sort(rng.choice(len(data), size=max_rows, replace=False))]
+    X = featurizer.transform(data)
+    n_rows = len(X)
+
+    blocks, layout = [], []
+    for column in featurizer.raw_columns:
+        targets = [(j, category) for j, (source, category) in enumerate(featurizer.plan) if source == column]
+        if not targets:
+            continue
+        categorical = column in CATEGORICAL_COLUMNS
+        if categorical:
+            # Code brut 0/1 reconstitué à partir des indicatrices
+            j, category = targets[0]
+            codes = X[:, j] if category is None else np.where(X[:, j] == 1.0, category, 1.0 - category)
+            grid = feature_grid(codes, categorical=True)
+        else:
+            grid = feature_grid(X[:, targets[0][0]], grid_resolution=grid_resolution)
+        block = np.repeat(X[np.newaxis], len(grid), axis=0)
+        for j, category in targets:
+            block[:, :, j] = (grid if category is None else (grid == category))[:, np.newaxis]
+        blocks.append(block.reshape(-1, X.shape[1]))
+        layout.append((column, grid, categorical, [featurizer.feature_names[j] for j, _ in targets]))
+
+    predictions = predictor.predict_prepared(np.concatenate(blocks))
+
+    ice_index = np.sort(rng.choice(n_rows, size=min(ice_rows, n_rows), replace=False))
+    features, offset = {}, 0
+    for column, grid, categorical, encoded in layout:
+        values = predictions[offset:offset + len(grid) * n_rows].reshape(len(grid), n_rows)
+        offset += len(grid) * n_rows
+        features[column] = {
+            'grid': grid,
+            'pd': values.mean(axis=1),
+            'ice': values[:, ice_index].T,
+            'encoded': encoded,
+            'categorical': categorical
+        }
+    return {'version': CURVES_VERSION, 'n_rows': n_rows, 'grid_resolution': grid_resolution,
+            'max_rows': max_rows, 'features': features}
+
+def _save_curves(curves, path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(curves, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def load_or_compute(model_path=MODEL_PATH, data_path=DATA_PATH, grid_resolution=DEFAULT_GRID_RESOLUTION,
+                    max_rows=DEFAULT_MAX_ROWS, ice_rows=DEFAULT_ICE_ROWS, predictor=None, force=False,
+                    random_state=0):
+    """
+    Courbes PD/ICE du modèle, lues depuis le fichier voisin de l'artefact
+    si elles correspondent au modèle, aux données et à tous les paramètres
+    du calcul, sinon calculées puis enregistrées
+
+    Returns:
+    --------
+    dict
+        Résultat de ``compute_curves`` complété de model_hash et data_hash
+    """
+    path = curves_path(model_path)
+    expected = {'version': CURVES_VERSION, 'model_hash': file_sha256(model_path),
+                'data_hash': file_sha256(data_path), 'grid_resolution': grid_resolution, 'max_rows': max_rows,
+                'ice_rows': ice_rows, 'random_state': random_state}
+    if not force and os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                curves = pickle.load(f)
+            if all(curves.get(key) == value for key, value in expected.items()):
+                return curves
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+    predictor = predictor or Predictor(model_path)
+    curves = compute_curves(predictor, pd.read_csv(data_path), grid_resolution, max_rows, ice_rows, random_state)
+    curves.update(expected)
+    try:
+        _save_curves(curves, path)
+    except OSError:
+        # Répertoire du modèle en lecture seule : les courbes restent en mémoire
+        pass
+    return curves
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Précalcule les courbes de dépendance partielle et ICE du modèle")
+    parser.add_argument('--model', default=MODEL_PATH, help="Chemin de l'artefact du modèle")
+    parser.add_argument('--data', default=DATA_PATH, help="Fichier CSV des données")
+    parser.add_argument('--grid-resolution', type=int, default=DEFAULT_GRID_RESOLUTION,
+                        help=f"Valeurs par grille (défaut: {DEFAULT_GRID_RESOLUTION})")
+    parser.add_argument('--max-rows', type=int, default=DEFAULT_MAX_ROWS,
+                        help=f"Lignes échantillonnées, 0 pour toutes (défaut: {DEFAULT_MAX_ROWS})")
+    parser.add_argument('--ice-rows', type=int, default=DEFAULT_ICE_ROWS,
+                        help=f"Courbes ICE individuelles conservées par variable (défaut: {DEFAULT_ICE_ROWS})")
+    parser.add_argument('--random-state', type=int, default=0, help="Graine du sous-échantillonnage (défaut: 0)")
+    parser.add_argument('--force', action='store_true', help="Recalcule même si le fichier est à jour")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    curves = load_or_compute(args.model, args.data, args.grid_resolution, args.max_rows or None, args.ice_rows,
+                             force=args.force, random_state=args.random_state)
+    n_points = sum(len(f['grid']) for f in curves['features'].values()) * curves['n_rows']
+    print(f"{len(curves['features'])} variables, {n_points:,} prédictions "
+          f"en {time.perf_counter() - start:.2f} s -> {curves_path(args.model)}")
+
+if __name__ == "__main__":
+    main()
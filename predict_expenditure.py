@@ -1,38 +1,459 @@
 import pandas as pd
 import numpy as np
 import pickle
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
+import hashlib
+import os
+import threading
+try:
+    from sklearn.preprocessing import StandardScaler, MinMaxScaler
+except ImportError:
+    # Service sans sklearn : seuls les artefacts mappables sont utilisables
+    StandardScaler = MinMaxScaler = ()
+from model_artifact import ArrayMinMaxScaler, ArrayStandardScaler, is_mapped_artifact, load_artifact
+from tree_engine import TreeEnsembleEngine
+from tree_contributions import TreePathExplainer
+from instrumentation import get_instrumentation
 
-def load_model_and_scalers():
-    """Charge le modèle et les scalers sauvegardés"""
+MODEL_PATH = 'models/best_regression_model.pkl'
+
+# Colonnes brutes attendues en entrée (avant encodage)
+REQUIRED_COLUMNS = ['reports', 'age', 'income', 'share', 'owner', 'selfemp',
+                    'dependents', 'months', 'majorcards', 'active']
+
+# Variables catégorielles binaires et leur codage (ordre alphabétique du
+# LabelEncoder : 'no' -> 0, 'yes' -> 1) ; les libellés du formulaire
+# Streamlit ('Non'/'Oui') sont acceptés aussi
+CATEGORICAL_COLUMNS = ['card', 'owner', 'selfemp']
+CATEGORY_CODES = {'no': 0.0, 'yes': 1.0, 'non': 0.0, 'oui': 1.0,
+                  'false': 0.0, 'true': 1.0, '0': 0.0, '1': 1.0}
+
+def load_model_and_scalers(model_path=MODEL_PATH):
+    """Charge le modèle et les scalers sauvegardés (pickle ou artefact mappable)"""
+    if is_mapped_artifact(model_path):
+        return load_artifact(model_path)
     try:
-        with open('models/best_regression_model.pkl', 'rb') as f:
+        with open(model_path, 'rb') as f:
             saved_data = pickle.load(f)
         return saved_data['model'], saved_data['scaler_X'], saved_data['scaler_y']
     except FileNotFoundError:
         raise Exception("Le modèle n'a pas été trouvé. Veuillez d'abord exécuter regression_credit_card.py")
 
-def prepare_input_data(data):
-    """Prépare les données d'entrée pour la prédiction"""
-    # Vérification des colonnes requises
-    required_columns = ['reports', 'age', 'income', 'share', 'owner', 'selfemp', 
-                       'dependents', 'months', 'majorcards', 'active']
-    
-    # Vérification des colonnes manquantes
-    missing_columns = [col for col in required_columns if col not in data.columns]
-    if missing_columns:
-        raise ValueError(f"Colonnes manquantes: {missing_columns}")
-    
-    # Conversion des variables catégorielles
-    data = pd.get_dummies(data, columns=['owner', 'selfemp'])
-    
-    # Vérification des valeurs manquantes
-    if data.isnull().any().any():
-        raise ValueError("Les données contiennent des valeurs manquantes")
-    
-    return data
+def file_sha256(path, chunk_size=1 << 20):
+    """Calcule l'empreinte SHA-256 d'un fichier par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-def predict_expenditure(input_data):
+def _encode_category(column, value):
+    if isinstance(value, (bool, np.bool_, int, float, np.number)):
+        # Valeur déjà codée (ex. 'card' absente -> 0), comme pour un DataFrame
+        return float(value)
+    try:
+        return CATEGORY_CODES[str(value).strip().lower()]
+    except KeyError:
+        raise ValueError(f"Valeur inconnue pour la colonne {column}: {value!r}")
+
+class Featurizer:
+    """
+    Encodeur compilé une seule fois à partir de ``scaler_X.feature_names_in_``.
+
+    Chaque colonne d'entraînement est associée à sa colonne brute et à son
+    mode d'encodage, quel que soit le schéma de l'artefact :
+
+    - colonne numérique (``age``, ``income``...) : copiée telle quelle ;
+    - variable binaire encodée 0/1 (``owner``) : 'no' -> 0, 'yes' -> 1 ;
+    - indicatrice issue de ``pd.get_dummies`` (``owner_yes``, ``owner_No``...) :
+      1 si la valeur brute correspond à la catégorie, 0 sinon.
+
+    Les enregistrements (dict, liste de dicts, DataFrame ou tableau numpy dont
+    les colonnes suivent ``raw_columns``) sont écrits directement dans une
+    matrice float64 préallouée, dans l'ordre exact des colonnes
+    d'entraînement. L'encodage ne dépend donc plus des catégories présentes
+    dans le lot.
+
+    Parameters:
+    -----------
+    feature_names : sequence of str
+        Colonnes vues à l'entraînement (``scaler_X.feature_names_in_``)
+    """
+
+    def __init__(self, feature_names):
+        self.feature_names = [str(name) for name in feature_names]
+        self.n_features = len(self.feature_names)
+        # plan[j] = (colonne brute, catégorie ou None)
+        plan = []
+        for name in self.feature_names:
+            base, sep, category = name.rpartition('_')
+            if sep and base in CATEGORICAL_COLUMNS:
+                plan.append((base, _encode_category(name, category)))
+            else:
+                plan.append((name, None))
+        self.plan = plan
+
+        sources = []
+        for column, _ in plan:
+            if column not in sources:
+                sources.append(column)
+        # Colonnes brutes facultatives (ex. 'card') : absentes -> 0, comme le
+        # reindex(fill_value=0) de l'application
+        self.optional_columns = [c for c in sources if c not in REQUIRED_COLUMNS]
+        self.raw_columns = REQUIRED_COLUMNS + self.optional_columns
+        self._raw_index = {column: i for i, column in enumerate(self.raw_columns)}
+        self._targets = {column: [] for column in self.raw_columns}
+        for j, (column, category) in enumerate(plan):
+            self._targets[column].append((j, category))
+
+    @classmethod
+    def from_scaler(cls, scaler_X):
+        """Compile l'encodeur à partir du scaler des features"""
+        return cls(scaler_X.feature_names_in_)
+
+    def _check_columns(self, columns):
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in columns]
+        if missing_columns:
+            raise ValueError(f"Colonnes manquantes: {missing_columns}")
+
+    def _fill_column(self, out, column, values):
+        """Écrit une colonne brute (tableau 1D) dans toutes ses colonnes encodées"""
+        targets = self._targets[column]
+        if not targets:
+            return
+        if column in CATEGORICAL_COLUMNS:
+            values = np.asarray(values)
+            if values.dtype.kind in 'biuf':
+                codes = values.astype(np.float64)
+            else:
+                codes = np.fromiter((_encode_category(column, v) for v in values),
+                                    dtype=np.float64, count=len(values))
+            for j, category in targets:
+                out[:, j] = codes if category is None else (codes == category)
+        else:
+            try:
+                numeric = np.asarray(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                raise ValueError(f"Valeurs non numériques dans la colonne {column}")
+            for j, _ in targets:
+                out[:, j] = numeric
+
+    def _transform_record(self, record, out):
+        row = out[0]
+        for j, (column, category) in enumerate(self.plan):
+            value = record.get(column, 0.0)
+            if column in CATEGORICAL_COLUMNS:
+                code = _encode_category(column, value)
+                row[j] = code if category is None else float(code == category)
+            else:
+                try:
+                    row[j] = np.nan if value is None else value
+                except (TypeError, ValueError):
+                    raise ValueError(f"Valeurs non numériques dans la colonne {column}")
+
+    def transform(self, data, out=None, timer=None):
+        """
+        Encode des enregistrements bruts en matrice de features
+
+        Parameters:
+        -----------
+        data : dict, list of dict, pandas.DataFrame or numpy.ndarray
+            Enregistrement(s) brut(s) ; un tableau numpy doit suivre l'ordre
+            de ``raw_columns`` (les colonnes facultatives peuvent être omises)
+        out : numpy.ndarray, optional
+            Matrice (n, n_features) float64 à réutiliser
+        timer : instrumentation.BatchTimer, optional
+            Reçoit les durées des étapes 'validate' et 'encode'
+
+        Returns:
+        --------
+        numpy.ndarray
+            Matrice float64 dans l'ordre des colonnes d'entraînement
+        """
+        if isinstance(data, dict):
+            n_rows = 1
+        else:
+            n_rows = len(data)
+        if out is None:
+            out = np.empty((n_rows, self.n_features), dtype=np.float64)
+        elif out.shape != (n_rows, self.n_features):
+            raise ValueError(f"Matrice de sortie de forme {out.shape}, attendu {(n_rows, self.n_features)}")
+
+        if isinstance(data, dict):
+            self._check_columns(data)
+            if timer is not None:
+                timer.mark('validate')
+            self._transform_record(data, out)
+        elif isinstance(data, pd.DataFrame):
+            self._check_columns(data.columns)
+            if timer is not None:
+                timer.mark('validate')
+            for column in self.raw_columns:
+                if column in data.columns:
+                    self._fill_column(out, column, data[column].to_numpy())
+                else:
+                    self._fill_column(out, column, np.zeros(n_rows))
+        elif isinstance(data, np.ndarray):
+            if data.ndim != 2 or data.shape[1] < len(REQUIRED_COLUMNS) or data.shape[1] > len(self.raw_columns):
+                raise ValueError(f"Le tableau doit avoir les colonnes {self.raw_columns}")
+            if timer is not None:
+                timer.mark('validate')
+            for column, i in self._raw_index.items():
+                values = data[:, i] if i < data.shape[1] else np.zeros(n_rows)
+                self._fill_column(out, column, values)
+        else:
+            records = list(data)
+            for record in records:
+                self._check_columns(record)
+            if timer is not None:
+                timer.mark('validate')
+            for column in self.raw_columns:
+                self._fill_column(out, column, [record.get(column, 0.0) for record in records])
+
+        if timer is not None:
+            timer.mark('encode')
+
+        # Vérification des valeurs manquantes
+        if np.isnan(out).any():
+            raise ValueError("Les données contiennent des valeurs manquantes")
+        if timer is not None:
+            timer.mark('validate')
+        return out
+
+def scale_features(scaler_X, X):
+    """Applique scaler_X sur une matrice numpy (calcul direct pour StandardScaler)"""
+    if isinstance(scaler_X, (StandardScaler, ArrayStandardScaler)):
+        if scaler_X.with_mean and scaler_X.mean_ is not None:
+            X = X - scaler_X.mean_
+        if scaler_X.with_std and scaler_X.scale_ is not None:
+            X = X / scaler_X.scale_
+        return X
+    return scaler_X.transform(pd.DataFrame(X, columns=scaler_X.feature_names_in_))
+
+def inverse_scale_target(scaler_y, y_scaled):
+    """Ramène les prédictions à l'échelle originale (calcul direct pour MinMaxScaler)"""
+    y_scaled = np.asarray(y_scaled, dtype=np.float64).ravel()
+    if isinstance(scaler_y, (MinMaxScaler, ArrayMinMaxScaler)):
+        return (y_scaled - scaler_y.min_[0]) / scaler_y.scale_[0]
+    return scaler_y.inverse_transform(y_scaled.reshape(-1, 1)).ravel()
+
+def is_tree_model(model):
+    """Vrai pour une forêt aléatoire ou un XGBoost, compilé (TreeEnsembleEngine) ou non"""
+    return isinstance(model, TreeEnsembleEngine) or type(model).__name__ in ('RandomForestRegressor', 'XGBRegressor')
+
+class Predictor:
+    """
+    Prédicteur réutilisable : le modèle et les scalers ne sont désérialisés
+    qu'une seule fois, puis rechargés uniquement si l'artefact change.
+
+    À chaque appel, un simple ``os.stat`` compare la date de modification et
+    la taille du fichier ; si elles ont changé, le SHA-256 est recalculé et le
+    modèle n'est rechargé que si le contenu est réellement différent.
+
+    Parameters:
+    -----------
+    model_path : str
+        Chemin de l'artefact sauvegardé par regression_credit_card.py
+    compile_trees : bool
+        Remplace une forêt aléatoire ou un XGBoost par le moteur vectorisé
+        TreeEnsembleEngine (mêmes prédictions, surcoût par appel bien moindre) ;
+        l'estimateur d'origine reste accessible via ``model.estimator``
+    instrumentation : instrumentation.Instrumentation, optional
+        Collecte des durées par étape (load, validate, encode, scale, predict,
+        inverse_transform) ; par défaut l'instrumentation partagée du
+        processus, inactive tant qu'aucun collecteur n'y est ajouté
+    """
+
+    def __init__(self, model_path=MODEL_PATH, compile_trees=True, instrumentation=None):
+        self.model_path = model_path
+        self.compile_trees = compile_trees
+        self.instrumentation = instrumentation or get_instrumentation()
+        self.artifact_hash = None
+        self.version = 0
+        self._components = (None, None, None, None)
+        self._explainer = (None, None)
+        self._stat_signature = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        return self._components[0]
+
+    @property
+    def scaler_X(self):
+        return self._components[1]
+
+    @property
+    def scaler_y(self):
+        return self._components[2]
+
+    @property
+    def featurizer(self):
+        return self.components()[3]
+
+    def _current_signature(self):
+        try:
+            st = os.stat(self.model_path)
+        except FileNotFoundError:
+            raise Exception("Le modèle n'a pas été trouvé. Veuillez d'abord exécuter regression_credit_card.py")
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load_locked(self, signature):
+        artifact_hash = file_sha256(self.model_path)
+        if artifact_hash != self.artifact_hash:
+            model, scaler_X, scaler_y = load_model_and_scalers(self.model_path)
+            # Un artefact mappable fournit déjà un TreeEnsembleEngine
+            if self.compile_trees and is_tree_model(model) and not isinstance(model, TreeEnsembleEngine):
+                model = TreeEnsembleEngine.from_model(model)
+            self._components = (model, scaler_X, scaler_y, Featurizer.from_scaler(scaler_X))
+            self.artifact_hash = artifact_hash
+            self.version += 1
+        self._stat_signature = signature
+
+    def load(self):
+        """Charge (ou recharge) le modèle et les scalers depuis le disque"""
+        with self._lock:
+            self._load_locked(self._current_signature())
+        return self
+
+    def components(self):
+        """
+        Retourne (model, scaler_X, scaler_y, featurizer) en rechargeant
+        l'artefact seulement si sa date ou son contenu a changé
+        """
+        signature = self._current_signature()
+        if signature != self._stat_signature:
+            with self._lock:
+                if signature != self._stat_signature:
+                    self._load_locked(signature)
+        return self._components
+
+    def predict_prepared(self, X):
+        """Applique scaler_X, le modèle et scaler_y sur une matrice déjà encodée"""
+        timer = self.instrumentation.start_batch(len(X), path='prepared')
+        if timer is None:
+            model, scaler_X, scaler_y, _ = self.components()
+            y_pred_scaled = model.predict(scale_features(scaler_X, X))
+            return inverse_scale_target(scaler_y, y_pred_scaled)
+        with timer:
+            model, scaler_X, scaler_y, _ = self.components()
+            timer.mark('load')
+            return self._predict_timed(model, scaler_X, scaler_y, X, timer)
+
+    def _predict_timed(self, model, scaler_X, scaler_y, X, timer):
+        X_scaled = scale_features(scaler_X, X)
+        timer.mark('scale')
+        y_pred_scaled = model.predict(X_scaled)
+        timer.mark('predict')
+        y_pred = inverse_scale_target(scaler_y, y_pred_scaled)
+        timer.mark('inverse_transform')
+        return y_pred
+
+    def predict(self, input_data):
+        """
+        Prédit les dépenses pour des enregistrements bruts
+
+        Parameters:
+        -----------
+        input_data : dict, list of dict, pandas.DataFrame or numpy.ndarray
+            Données brutes (voir Featurizer.transform)
+
+        Returns:
+        --------
+        numpy.ndarray
+            Prédictions à l'échelle originale
+        """
+        timer = self.instrumentation.start_batch(path='raw')
+        if timer is None:
+            model, scaler_X, scaler_y, featurizer = self.components()
+            X = featurizer.transform(input_data)
+            y_pred_scaled = model.predict(scale_features(scaler_X, X))
+            return inverse_scale_target(scaler_y, y_pred_scaled)
+        with timer:
+            model, scaler_X, scaler_y, featurizer = self.components()
+            timer.mark('load')
+            X = featurizer.transform(input_data, timer=timer)
+            timer.rows = len(X)
+            return self._predict_timed(model, scaler_X, scaler_y, X, timer)
+
+    def explainable(self):
+        """Vrai si le modèle courant admet des contributions exactes (forêt aléatoire ou XGBoost)"""
+        return is_tree_model(self.components()[0])
+
+    def explainer(self):
+        """
+        TreePathExplainer du modèle courant, construit une seule fois par
+        version de l'artefact (forêt aléatoire ou XGBoost uniquement)
+        """
+        model = self.components()[0]
+        with self._lock:
+            version, explainer = self._explainer
+            if version != self.version or explainer is None:
+                if not is_tree_model(model):
+                    raise ValueError(f"Contributions disponibles uniquement pour les forêts aléatoires et XGBoost, "
+                                     f"pas pour {type(model).__name__}")
+                explainer = TreePathExplainer.from_model(model)
+                self._explainer = (self.version, explainer)
+        return explainer
+
+    def explain_prepared(self, X):
+        """
+        Contributions additives de chaque colonne encodée, en dollars
+
+        scaler_y étant affine, les contributions calculées à l'échelle du
+        modèle sont multipliées par sa pente et la valeur de base passe par
+        inverse_transform : valeur de base + somme des contributions =
+        prédiction.
+
+        Returns:
+        --------
+        tuple
+            (prédictions, valeur de base, matrice (n_lignes, n_features)
+            dans l'ordre de ``featurizer.feature_names``)
+        """
+        explainer = self.explainer()
+        _, scaler_X, scaler_y, _ = self.components()
+        contributions = explainer.contributions(scale_features(scaler_X, X))
+        offset, unit = inverse_scale_target(scaler_y, [0.0, 1.0])
+        contributions *= unit - offset
+        expected_value = offset + (unit - offset) * explainer.expected_value
+        return expected_value + contributions.sum(axis=1), expected_value, contributions
+
+    def explain(self, input_data):
+        """Comme explain_prepared, pour des enregistrements bruts (voir Featurizer.transform)"""
+        return self.explain_prepared(self.featurizer.transform(input_data))
+
+_predictors = {}
+_predictors_lock = threading.Lock()
+
+def get_predictor(model_path=MODEL_PATH):
+    """Retourne le prédicteur partagé par le processus pour cet artefact"""
+    key = os.path.abspath(model_path)
+    predictor = _predictors.get(key)
+    if predictor is None:
+        with _predictors_lock:
+            predictor = _predictors.get(key)
+            if predictor is None:
+                predictor = Predictor(model_path)
+                _predictors[key] = predictor
+    return predictor
+
+def prepare_input_data(data, featurizer=None):
+    """
+    Prépare les données d'entrée pour la prédiction
+
+    Les colonnes requises et les valeurs manquantes sont vérifiées, puis les
+    variables catégorielles sont encodées selon le schéma du modèle chargé.
+
+    Returns:
+    --------
+    numpy.ndarray
+        Matrice float64 dans l'ordre de ``scaler_X.feature_names_in_``
+    """
+    if featurizer is None:
+        featurizer = get_predictor().featurizer
+    return featurizer.transform(data)
+
+def predict_expenditure(input_data, predictor=None, cache=None):
     """
     Fait des prédictions sur de nouvelles données
     
@@ -40,26 +461,25 @@ def predict_expenditure(input_data):
     -----------
     input_data : pandas.DataFrame
         DataFrame contenant les données d'entrée avec les colonnes requises
+    predictor : Predictor, optional
+        Prédicteur à utiliser (par défaut, le prédicteur partagé du processus)
+    cache : prediction_cache.PredictionCache, optional
+        Cache LRU des prédictions à consulter avant le modèle
     
     Returns:
     --------
     pandas.DataFrame
         DataFrame contenant les données d'entrée et les prédictions
     """
-    # Chargement du modèle et des scalers
-    model, scaler_X, scaler_y = load_model_and_scalers()
-    
-    # Préparation des données
-    prepared_data = prepare_input_data(input_data)
-    
-    # Normalisation des features
-    X_scaled = scaler_X.transform(prepared_data)
-    
-    # Prédiction
-    y_pred_scaled = model.predict(X_scaled)
+    # Modèle et scalers chargés une seule fois par processus
+    if predictor is None:
+        predictor = get_predictor()
     
-    # Conversion des prédictions à l'échelle originale
-    y_pred = scaler_y.inverse_transform(y_pred_scaled.reshape(-1, 1)).ravel()
+    # Préparation, normalisation, prédiction et retour à l'échelle originale
+    if cache is not None:
+        y_pred = cache.predict(input_data, predictor)
+    else:
+        y_pred = predictor.predict(input_data)
     
     # Ajout des prédictions au DataFrame
     result_df = input_data.copy()
@@ -105,7 +525,8 @@ if __name__ == "__main__":
         print(f"Erreur: {str(e)}")
 
 def predict_single_example(age, income, owner='yes', selfemp='no', reports=0, 
-                         share=0.05, dependents=0, months=36, majorcards=1, active=12):
+                         share=0.05, dependents=0, months=36, majorcards=1, active=12,
+                         predictor=None, cache=None):
     """
     Fonction utilitaire pour prédire les dépenses pour un seul exemple
     
@@ -131,6 +552,10 @@ def predict_single_example(age, income, owner='yes', selfemp='no', reports=0,
         Nombre de cartes majeures
     active : int
         Nombre de cartes actives
+    predictor : Predictor, optional
+        Prédicteur à utiliser (par défaut, le prédicteur partagé du processus)
+    cache : prediction_cache.PredictionCache, optional
+        Cache LRU des prédictions à consulter avant le modèle
     
     Returns:
     --------
@@ -152,7 +577,7 @@ def predict_single_example(age, income, owner='yes', selfemp='no', reports=0,
     })
     
     # Prédiction
-    results = predict_expenditure(data)
+    results = predict_expenditure(data, predictor=predictor, cache=cache)
     return results['predicted_expenditure'].iloc[0]
 
 # Exemple d'utilisation de predict_single_example
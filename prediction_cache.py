@@ -0,0 +1,152 @@
+import collections
+import threading
+import time
+import numpy as np
+from predict_expenditure import get_predictor
+
+# Surcoût approximatif d'une entrée (clé bytes + float + nœud de l'OrderedDict)
+ENTRY_OVERHEAD_BYTES = 120
+
+class PredictionCache:
+    """
+    Cache LRU borné des prédictions, indexé par le vecteur de features encodé
+
+    Les enregistrements sont encodés par le Featurizer du prédicteur, puis
+    éventuellement quantifiés par feature ; la clé est l'octet-représentation
+    du vecteur obtenu. Seules les lignes absentes du cache sont prédites, en un
+    seul appel vectorisé. Le cache est vidé automatiquement lorsque l'empreinte
+    de l'artefact du modèle change.
+
+    Parameters:
+    -----------
+    max_entries : int
+        Nombre maximal d'entrées
+    max_bytes : int, optional
+        Taille mémoire maximale approximative du cache
+    ttl : float, optional
+        Durée de vie d'une entrée en secondes
+    quantization : float or dict, optional
+        Pas de quantification commun, ou ``{feature: pas}`` pour certaines
+        features (ex. ``{'income': 0.01, 'age': 1}``). Les prédictions sont
+        alors calculées sur le vecteur quantifié.
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=None, ttl=None, quantization=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.quantization = quantization
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.current_bytes = 0
+        self._entries = collections.OrderedDict()
+        self._artifact_hash = None
+        self._steps = None
+        self._steps_for = None
+        self._lock = threading.Lock()
+
+    def _quantization_steps(self, featurizer):
+        if self._steps_for is not featurizer:
+            if isinstance(self.quantization, dict):
+                steps = np.zeros(featurizer.n_features)
+                for name, step in self.quantization.items():
+                    for j, (column, _) in enumerate(featurizer.plan):
+                        if name in (column, featurizer.feature_names[j]):
+                            steps[j] = step
+            else:
+                steps = np.full(featurizer.n_features, float(self.quantization))
+            self._steps = steps
+            self._steps_for = featurizer
+        return self._steps
+
+    def _quantize(self, X, featurizer):
+        if not self.quantization:
+            return X
+        steps = self._quantization_steps(featurizer)
+        mask = steps > 0
+        X = X.copy()
+        X[:, mask] = np.round(X[:, mask] / steps[mask]) * steps[mask]
+        return X
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or
+                                 (self.max_bytes is not None and self.current_bytes > self.max_bytes)):
+            key, _ = self._entries.popitem(last=False)
+            self.current_bytes -= len(key) + ENTRY_OVERHEAD_BYTES
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def predict(self, records, predictor=None):
+        """
+        Prédit des enregistrements bruts en réutilisant les résultats déjà calculés
+
+        Returns:
+        --------
+        numpy.ndarray
+            Prédictions à l'échelle originale
+        """
+        predictor = predictor or get_predictor()
+        featurizer = predictor.components()[3]
+        X = self._quantize(featurizer.transform(records), featurizer)
+        keys = [row.tobytes() for row in X]
+        y_pred = np.empty(len(keys))
+        missing = collections.OrderedDict()
+        now = time.monotonic()
+
+        with self._lock:
+            if predictor.artifact_hash != self._artifact_hash:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.current_bytes = 0
+                self._artifact_hash = predictor.artifact_hash
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and self.ttl is not None and now - entry[1] > self.ttl:
+                    del self._entries[key]
+                    self.current_bytes -= len(key) + ENTRY_OVERHEAD_BYTES
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    missing.setdefault(key, []).append(i)
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    y_pred[i] = entry[0]
+                    self.hits += 1
+            artifact_hash = self._artifact_hash
+
+        if missing:
+            first_rows = [rows[0] for rows in missing.values()]
+            computed = predictor.predict_prepared(X[first_rows])
+            with self._lock:
+                store = artifact_hash == self._artifact_hash
+                for (key, rows), value in zip(missing.items(), computed):
+                    y_pred[rows] = value
+                    if store and key not in self._entries:
+                        self._entries[key] = (float(value), now)
+                        self.current_bytes += len(key) + ENTRY_OVERHEAD_BYTES
+                self._evict()
+        return y_pred
+
+    def stats(self):
+        """Compteurs du cache (succès, échecs, évictions, taille)"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
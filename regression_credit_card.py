@@ -1,3 +1,9 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import time
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split, GridSearchCV
@@ -8,30 +14,25 @@ from xgboost import XGBRegressor
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import matplotlib.pyplot as plt
 import seaborn as sns
+from model_search import (DEFAULT_CV_CACHE, DEFAULT_TRIAL_STORE, SEARCH_STRATEGIES, CVData, TrialStore,
+                          estimator_fingerprint, make_search)
+from training_scheduler import schedule_searches
+from predict_expenditure import file_sha256
+from analytics_bundle import BUNDLE_PATH, build_bundle, feature_importances, save_bundle
+from partial_dependence import curves_path, load_or_compute
 
-# Chargement des données
-df = pd.read_csv('AER_credit_card_data.csv')
-
-# Préparation des données
-X = df.drop(['expenditure', 'card'], axis=1)  # Features
-y = df['expenditure']  # Target variable
-
-# Conversion des variables catégorielles
-X = pd.get_dummies(X, columns=['owner', 'selfemp'])
-
-# Division train/test
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+DATA_PATH = 'AER_credit_card_data.csv'
+MODEL_PATH = 'models/best_regression_model.pkl'
+# Emplacement conventionnel de l'artefact mappable, écrit seulement sur demande
+MAPPED_MODEL_PATH = 'models/best_regression_model.mmap'
+DEFAULT_STAGE_CACHE = 'cache/stages'
+DEFAULT_TIMINGS_PATH = 'training_timings.json'
 
-# Normalisation des données
-# StandardScaler pour les features
-scaler_X = StandardScaler()
-X_train_scaled = scaler_X.fit_transform(X_train)
-X_test_scaled = scaler_X.transform(X_test)
+# Étapes du pipeline, dans l'ordre d'exécution
+STAGES = ['load', 'encode', 'split', 'scale', 'search', 'evaluate', 'render', 'export', 'analytics']
 
-# MinMaxScaler pour la target variable (expenditure)
-scaler_y = MinMaxScaler()
-y_train_scaled = scaler_y.fit_transform(y_train.values.reshape(-1, 1)).ravel()
-y_test_scaled = scaler_y.transform(y_test.values.reshape(-1, 1)).ravel()
+# Incrémenté lorsque le code d'une étape change le contenu de sa sortie
+PIPELINE_VERSION = 2
 
 # Définition des modèles et leurs paramètres
 models = {
@@ -63,6 +64,84 @@ models = {
     }
 }
 
+class StageCache:
+    """
+    Cache disque des sorties d'étapes
+
+    La clé d'une étape est l'empreinte de son nom, de ses paramètres et des
+    clés de ses entrées (sorties des étapes précédentes) : modifier un
+    paramètre invalide l'étape concernée et toutes celles qui en dépendent,
+    sans toucher aux étapes en amont.
+    """
+
+    def __init__(self, directory=DEFAULT_STAGE_CACHE, enabled=True):
+        self.directory = directory
+        self.enabled = enabled
+
+    @staticmethod
+    def key(stage, params, inputs=()):
+        payload = json.dumps({'stage': stage, 'version': PIPELINE_VERSION, 'params': params,
+                              'inputs': list(inputs)}, sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, stage, key):
+        return os.path.join(self.directory, stage, f"{key[:24]}.pkl")
+
+    def get(self, stage, key):
+        """Retourne (trouvé, valeur)"""
+        path = self._path(stage, key)
+        if not self.enabled or not os.path.exists(path):
+            return False, None
+        try:
+            with open(path, 'rb') as f:
+                return True, pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False, None
+
+    def put(self, stage, key, value):
+        if not self.enabled:
+            return
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+def _files_intact(files):
+    """Vrai si les fichiers produits par une étape existent toujours, inchangés"""
+    return all(os.path.exists(path) and file_sha256(path) == digest for path, digest in files.items())
+
+# Étapes du pipeline
+def load_data(path=DATA_PATH):
+    """Chargement des données"""
+    return pd.read_csv(path)
+
+def encode_features(df, target='expenditure', drop=('card',), categorical=('owner', 'selfemp')):
+    """Préparation des données et conversion des variables catégorielles"""
+    X = df.drop([target, *drop], axis=1)  # Features
+    y = df[target]  # Target variable
+    X = pd.get_dummies(X, columns=list(categorical))
+    return X, y
+
+def split_data(X, y, test_size=0.2, random_state=42):
+    """Division train/test"""
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+    return {'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test}
+
+def scale_data(split):
+    """Normalisation : StandardScaler pour les features, MinMaxScaler pour la target (expenditure)"""
+    scaler_X = StandardScaler()
+    X_train_scaled = scaler_X.fit_transform(split['X_train'])
+    X_test_scaled = scaler_X.transform(split['X_test'])
+
+    scaler_y = MinMaxScaler()
+    y_train_scaled = scaler_y.fit_transform(split['y_train'].values.reshape(-1, 1)).ravel()
+    y_test_scaled = scaler_y.transform(split['y_test'].values.reshape(-1, 1)).ravel()
+    return {'scaler_X': scaler_X, 'scaler_y': scaler_y,
+            'X_train_scaled': X_train_scaled, 'X_test_scaled': X_test_scaled,
+            'y_train_scaled': y_train_scaled, 'y_test_scaled': y_test_scaled}
+
 def evaluate_regression_model(y_true, y_pred, model_name):
     """Évaluation complète d'un modèle de régression"""
     # Métriques
@@ -70,70 +149,118 @@ def evaluate_regression_model(y_true, y_pred, model_name):
     rmse = np.sqrt(mse)
     mae = mean_absolute_error(y_true, y_pred)
     r2 = r2_score(y_true, y_pred)
-    
+
     print(f"\nRésultats pour {model_name}:")
     print(f"MSE: {mse:.4f}")
     print(f"RMSE: {rmse:.4f}")
     print(f"MAE: {mae:.4f}")
     print(f"R²: {r2:.4f}")
-    
+
     return {'mse': mse, 'rmse': rmse, 'mae': mae, 'r2': r2}
 
-def perform_grid_search():
+def perform_grid_search(split, scaled, strategy='grid', halving_resource='n_samples', halving_factor=3, store=None,
+                        core_budget=None, inner_threads=1, warm_start=True, early_stopping_rounds=None,
+                        cv_cache=DEFAULT_CV_CACHE):
+    """
+    Recherche des hyperparamètres de chaque famille de modèles
+
+    Returns:
+    --------
+    dict
+        ``{famille: {'best_params', 'best_score', 'best_model'}}`` ; avec
+        ``core_budget``, chaque famille porte aussi ``'schedule'``, le
+        rapport d'ordonnancement complet (temps mural, temps CPU et
+        utilisation des cœurs par famille, plus 'Total')
+    """
     results = {}
-    
+    schedule = None
+    X_train_scaled, y_train_scaled = scaled['X_train_scaled'], scaled['y_train_scaled']
+
+    # Matrice encodée mappée en mémoire, normalisation ajustée par pli
+    cv_data = None
+    if core_budget or strategy == 'resumable':
+        cv_data = CVData(split['X_train'], y_train_scaled, cv=5, preprocessor=StandardScaler(), cache_dir=cv_cache)
+
+    # Plis des trois familles sur un pool commun au budget de cœurs fixé
+    scheduled = {}
+    if core_budget:
+        scheduled = {
+            name: make_search(model_info, strategy='resumable', cv=5, scoring='neg_mean_squared_error',
+                              store=store or TrialStore(':memory:'), family=name,
+                              warm_start=warm_start, early_stopping_rounds=early_stopping_rounds)
+            for name, model_info in models.items()
+        }
+        print(f"\nEntraînement des modèles {', '.join(scheduled)} sur {core_budget} cœurs...")
+        schedule = schedule_searches(scheduled, cv_data, core_budget=core_budget,
+                                     inner_threads=inner_threads)
+
     for name, model_info in models.items():
-        print(f"\nEntraînement du modèle {name}...")
-        
-        # GridSearchCV
-        grid_search = GridSearchCV(
-            estimator=model_info['model'],
-            param_grid=model_info['params'],
-            cv=5,
-            scoring='neg_mean_squared_error',
-            n_jobs=-1,
-            verbose=1
-        )
-        
-        # Entraînement
-        grid_search.fit(X_train_scaled, y_train_scaled)
-        
+        if name in scheduled:
+            grid_search = scheduled[name]
+        else:
+            print(f"\nEntraînement du modèle {name}...")
+
+            # GridSearchCV (ou successive halving)
+            grid_search = make_search(
+                model_info,
+                strategy=strategy,
+                cv=5,
+                scoring='neg_mean_squared_error',
+                n_jobs=-1,
+                halving_resource=halving_resource,
+                halving_factor=halving_factor,
+                store=store,
+                family=name,
+                warm_start=warm_start,
+                early_stopping_rounds=early_stopping_rounds
+            )
+
+            # Entraînement
+            if cv_data is not None:
+                grid_search.fit(cv_data)
+            else:
+                grid_search.fit(X_train_scaled, y_train_scaled)
+
         # Meilleurs paramètres
         print(f"\nMeilleurs paramètres pour {name}:")
         print(grid_search.best_params_)
-        
-        # Prédictions
-        y_pred_scaled = grid_search.predict(X_test_scaled)
-        
-        # Conversion des prédictions à l'échelle originale
-        y_pred = scaler_y.inverse_transform(y_pred_scaled.reshape(-1, 1)).ravel()
-        
-        # Évaluation
-        metrics = evaluate_regression_model(y_test, y_pred, name)
-        
-        # Stockage des résultats
+
         results[name] = {
             'best_params': grid_search.best_params_,
-            'metrics': metrics,
-            'best_model': grid_search.best_estimator_,
-            'predictions': y_pred
+            'best_score': grid_search.best_score_,
+            'best_model': grid_search.best_estimator_
         }
-    
+        if name in scheduled:
+            results[name]['schedule'] = schedule
+
     return results
 
-# Exécution de GridSearchCV
-print("Début de l'entraînement des modèles...")
-results = perform_grid_search()
+def evaluate_models(searched, split, scaled):
+    """Prédictions sur le jeu de test, à l'échelle originale, et métriques"""
+    results = {}
+    for name, result in searched.items():
+        # Prédictions
+        y_pred_scaled = result['best_model'].predict(scaled['X_test_scaled'])
+
+        # Conversion des prédictions à l'échelle originale
+        y_pred = scaled['scaler_y'].inverse_transform(y_pred_scaled.reshape(-1, 1)).ravel()
+
+        # Évaluation
+        metrics = evaluate_regression_model(split['y_test'], y_pred, name)
+
+        # Stockage des résultats
+        results[name] = dict(result, metrics=metrics, predictions=y_pred)
+    return results
 
 # Visualisation des résultats
-def plot_regression_results(results):
+def plot_regression_results(results, path='regression_metrics_comparison.png', dpi=300):
     # Préparation des données pour le graphique
     metrics = ['rmse', 'mae', 'r2']
     models = list(results.keys())
-    
+
     # Création du graphique
     fig, axes = plt.subplots(1, 3, figsize=(15, 5))
-    
+
     for i, metric in enumerate(metrics):
         values = [results[model]['metrics'][metric] for model in models]
         if metric == 'r2':  # R² doit être sur une échelle de 0 à 1
@@ -141,19 +268,19 @@ def plot_regression_results(results):
         sns.barplot(x=models, y=values, ax=axes[i])
         axes[i].set_title(f'{metric.upper()}')
         axes[i].set_xticklabels(models, rotation=45)
-        
+
         # Ajout des valeurs sur les barres
         for j, v in enumerate(values):
             axes[i].text(j, v, f'{v:.3f}', ha='center', va='bottom')
-    
+
     plt.tight_layout()
-    plt.savefig('regression_metrics_comparison.png', dpi=300, bbox_inches='tight')
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
     plt.close()
 
 # Visualisation des prédictions vs valeurs réelles
-def plot_predictions_vs_actual(results):
+def plot_predictions_vs_actual(results, y_test, path='regression_predictions_comparison.png', dpi=300):
     plt.figure(figsize=(15, 5))
-    
+
     for i, (name, result) in enumerate(results.items(), 1):
         plt.subplot(1, 3, i)
         plt.scatter(y_test, result['predictions'], alpha=0.5)
@@ -161,33 +288,289 @@ def plot_predictions_vs_actual(results):
         plt.title(f'{name} - Prédictions vs Réelles')
         plt.xlabel('Valeurs réelles')
         plt.ylabel('Prédictions')
-    
+
     plt.tight_layout()
-    plt.savefig('regression_predictions_comparison.png', dpi=300, bbox_inches='tight')
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
     plt.close()
 
-# Affichage des résultats
-plot_regression_results(results)
-plot_predictions_vs_actual(results)
+def render_plots(results, split, metrics_path='regression_metrics_comparison.png',
+                 predictions_path='regression_predictions_comparison.png', dpi=300):
+    """Affichage des résultats ; retourne {fichier: empreinte}"""
+    plot_regression_results(results, metrics_path, dpi)
+    plot_predictions_vs_actual(results, split['y_test'], predictions_path, dpi)
+    return {path: file_sha256(path) for path in (metrics_path, predictions_path)}
 
-# Sauvegarde du meilleur modèle
-import pickle
-best_model_name = max(results, key=lambda x: results[x]['metrics']['r2'])
-best_model = results[best_model_name]['best_model']
+def select_best_model(results):
+    best_model_name = max(results, key=lambda x: results[x]['metrics']['r2'])
+    return best_model_name, results[best_model_name]['best_model']
 
-# Création du dossier models s'il n'existe pas
-import os
-if not os.path.exists('models'):
-    os.makedirs('models')
-
-# Sauvegarde du modèle et des scalers
-with open('models/best_regression_model.pkl', 'wb') as f:
-    pickle.dump({
-        'model': best_model,
-        'scaler_X': scaler_X,
-        'scaler_y': scaler_y
-    }, f)
-
-print(f"\nMeilleur modèle: {best_model_name}")
-print(f"R²: {results[best_model_name]['metrics']['r2']:.4f}")
-print("Modèle et scalers sauvegardés avec succès!") 
\ No newline at end of file
+def best_model_metrics(results, scaled):
+    """
+    Métriques de test du meilleur modèle et son score de validation croisée
+
+    ``cv_score`` est le score de la recherche (MSE négatif sur la cible
+    normalisée) ; ``cv_rmse`` le ramène en dollars via l'étendue du MinMaxScaler.
+    """
+    best_model_name, _ = select_best_model(results)
+    best_score = results[best_model_name]['best_score']
+    metrics = {name: float(value) for name, value in results[best_model_name]['metrics'].items()}
+    metrics.update(model_name=best_model_name, cv_score=float(best_score),
+                   cv_rmse=float(np.sqrt(-best_score) * scaled['scaler_y'].data_range_[0]))
+    return metrics
+
+def export_best_model(results, scaled, model_path=MODEL_PATH, mapped_path=None):
+    """
+    Sauvegarde du meilleur modèle, des scalers et des métriques, plus
+    l'artefact mappable si ``mapped_path`` est fourni ; retourne
+    {fichier: empreinte}
+    """
+    _, best_model = select_best_model(results)
+
+    # Création du dossier models s'il n'existe pas
+    for path in (model_path, mapped_path):
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Sauvegarde du modèle et des scalers
+    with open(model_path, 'wb') as f:
+        pickle.dump({
+            'model': best_model,
+            'scaler_X': scaled['scaler_X'],
+            'scaler_y': scaled['scaler_y'],
+            'metrics': best_model_metrics(results, scaled)
+        }, f)
+    files = {model_path: file_sha256(model_path)}
+
+    # Version mappable en mémoire (chargement quasi instantané, partagée entre processus)
+    if mapped_path:
+        from model_artifact import save_artifact
+        save_artifact(mapped_path, best_model, scaled['scaler_X'], scaled['scaler_y'])
+        files[mapped_path] = file_sha256(mapped_path)
+    return files
+
+def export_analytics(df, results, split, scaled, model_hash=None, data_hash=None, bundle_path=BUNDLE_PATH,
+                     model_path=None, data_path=DATA_PATH):
+    """
+    Bundle d'analyse du meilleur modèle (métriques, prédictions de test,
+    histogrammes, importances, corrélations, agrégats par segment) pour la
+    page Analyse, et courbes PD/ICE à côté de ``model_path`` s'il est
+    fourni ; retourne {fichier: empreinte}
+    """
+    best_model_name, best_model = select_best_model(results)
+    bundle = build_bundle(df, split['y_test'], results[best_model_name]['predictions'],
+                          best_model_metrics(results, scaled),
+                          importances=feature_importances(best_model, split['X_train'].columns),
+                          scope='test', data_hash=data_hash, model_hash=model_hash)
+    save_bundle(bundle, bundle_path)
+    files = {bundle_path: file_sha256(bundle_path)}
+    if model_path:
+        load_or_compute(model_path, data_path, force=True)
+        files[curves_path(model_path)] = file_sha256(curves_path(model_path))
+    return files
+
+def _search_space():
+    """Empreinte de la grille : estimateurs de base et valeurs testées"""
+    return {name: {'estimator': estimator_fingerprint(name, info['model']), 'params': info['params']}
+            for name, info in models.items()}
+
+class TrainingPipeline:
+    """
+    Pipeline d'entraînement par étapes nommées, avec cache disque
+
+    Étapes : load, encode, split, scale, search, evaluate, render, export,
+    analytics.
+    La sortie de chaque étape est mise en cache (``StageCache``) sous une clé
+    dérivée de ses paramètres et des clés de ses entrées : modifier seulement
+    les graphiques ou la grille de recherche ne refait pas la préparation des
+    données. Les durées de chaque étape sont affichées et enregistrées.
+
+    Parameters:
+    -----------
+    data_path : str
+        Fichier CSV des données
+    search_options : dict, optional
+        Arguments de ``perform_grid_search`` (strategy, halving_resource, ...)
+    cache : StageCache, optional
+        Cache des étapes (défaut : ``cache/stages``)
+    force : iterable of str, optional
+        Étapes à recalculer même si elles sont en cache
+    """
+
+    def __init__(self, data_path=DATA_PATH, search_options=None, render_options=None, export_options=None,
+                 cache=None, force=(), timings_path=DEFAULT_TIMINGS_PATH, bundle_path=BUNDLE_PATH):
+        unknown = set(force) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Étapes inconnues: {sorted(unknown)} (attendu: {STAGES})")
+        self.data_path = data_path
+        self.search_options = dict(search_options or {})
+        self.render_options = dict(render_options or {})
+        self.export_options = dict(export_options or {})
+        self.cache = cache if cache is not None else StageCache()
+        self.force = set(force)
+        self.timings_path = timings_path
+        self.bundle_path = bundle_path
+        self.outputs = {}
+        self.keys = {}
+        self.timings = []
+
+    def _search_params(self):
+        # Seules les options qui changent le résultat entrent dans la clé ;
+        # le budget de cœurs, le stockage des essais ou le cache de CV non
+        options = {name: value for name, value in self.search_options.items()
+                   if name in ('strategy', 'halving_resource', 'halving_factor', 'early_stopping_rounds')}
+        # Normalisation par pli (CVData) : scores différents de GridSearchCV
+        per_fold_scaling = bool(self.search_options.get('core_budget')) or options.get('strategy') == 'resumable'
+        if per_fold_scaling:
+            # L'ajustement partagé par pli (et l'arrêt précoce qui en dépend) change les scores
+            options['warm_start'] = self.search_options.get('warm_start', True)
+        return dict(options, per_fold_scaling=per_fold_scaling, space=_search_space())
+
+    def _stage(self, stage, params, inputs, compute, outputs_are_files=False):
+        key = self.cache.key(stage, params, [self.keys[name] for name in inputs])
+        start = time.perf_counter()
+        hit, value = (False, None) if stage in self.force else self.cache.get(stage, key)
+        if hit and outputs_are_files and not _files_intact(value):
+            hit = False
+        if not hit:
+            value = compute(*[self.outputs[name] for name in inputs])
+            self.cache.put(stage, key, value)
+        elapsed = time.perf_counter() - start
+        self.outputs[stage] = value
+        self.keys[stage] = key
+        self.timings.append({'stage': stage, 'seconds': elapsed, 'cached': hit, 'key': key[:16]})
+        print(f"[{stage:<9}] {elapsed:8.3f} s{' (cache)' if hit else ''}")
+        return value
+
+    def run(self, until=STAGES[-1]):
+        """
+        Exécute les étapes jusqu'à ``until`` inclus
+
+        Returns:
+        --------
+        dict
+            Sorties des étapes exécutées, par nom d'étape
+        """
+        if until not in STAGES:
+            raise ValueError(f"Étape inconnue: {until} (attendu: {STAGES})")
+        last = STAGES.index(until)
+        self.timings = []
+        total_start = time.perf_counter()
+        self.keys['source'] = file_sha256(self.data_path)
+        self.outputs['source'] = self.data_path
+
+        steps = [
+            ('load', {}, ['source'], load_data, False),
+            ('encode', {'target': 'expenditure', 'drop': ['card'], 'categorical': ['owner', 'selfemp']},
+             ['load'], encode_features, False),
+            ('split', {'test_size': 0.2, 'random_state': 42}, ['encode'],
+             lambda encoded: split_data(*encoded, test_size=0.2, random_state=42), False),
+            ('scale', {}, ['split'], scale_data, False),
+            ('search', self._search_params(), ['split', 'scale'],
+             lambda split, scaled: perform_grid_search(split, scaled, **self.search_options), False),
+            ('evaluate', {}, ['search', 'split', 'scale'], evaluate_models, False),
+            ('render', self.render_options, ['evaluate', 'split'],
+             lambda results, split: render_plots(results, split, **self.render_options), True),
+            ('export', self.export_options, ['evaluate', 'scale'],
+             lambda results, scaled: export_best_model(results, scaled, **self.export_options), True),
+            ('analytics', {'bundle_path': self.bundle_path}, ['load', 'evaluate', 'split', 'scale', 'export'],
+             lambda df, results, split, scaled, exported: export_analytics(
+                 df, results, split, scaled, model_hash=exported[self.export_options.get('model_path', MODEL_PATH)],
+                 data_hash=self.keys['source'], bundle_path=self.bundle_path,
+                 model_path=self.export_options.get('model_path', MODEL_PATH), data_path=self.data_path), True),
+        ]
+        for stage, params, inputs, compute, outputs_are_files in steps[:last + 1]:
+            self._stage(stage, params, inputs, compute, outputs_are_files)
+
+        total = time.perf_counter() - total_start
+        print(f"[{'total':<9}] {total:8.3f} s")
+        if self.timings_path:
+            timings = {'timestamp': time.time(), 'until': until, 'total_seconds': total, 'stages': self.timings}
+            # Rapport d'ordonnancement de la recherche (--core-budget), issu du cache le cas échéant
+            searched = self.outputs['search'] if last >= STAGES.index('search') else {}
+            schedule = next((result['schedule'] for result in searched.values() if 'schedule' in result), None)
+            if schedule is not None:
+                timings['schedule'] = schedule
+            with open(self.timings_path, 'w', encoding='utf-8') as f:
+                json.dump(timings, f, indent=2)
+        return {stage: self.outputs[stage] for stage in STAGES[:last + 1]}
+
+def main(argv=None):
+    # Options de la ligne de commande
+    parser = argparse.ArgumentParser(description="Entraînement et sélection du modèle de régression")
+    parser.add_argument('--data', default=DATA_PATH, help="Fichier CSV des données")
+    parser.add_argument('--search', choices=SEARCH_STRATEGIES, default='grid',
+                        help="Stratégie de recherche d'hyperparamètres (défaut: grid)")
+    parser.add_argument('--halving-resource', choices=['n_samples', 'n_estimators'], default='n_samples',
+                        help="Ressource augmentée à chaque itération du successive halving")
+    parser.add_argument('--halving-factor', type=int, default=3,
+                        help="Facteur d'élimination du successive halving (défaut: 3)")
+    parser.add_argument('--trial-store', default=DEFAULT_TRIAL_STORE,
+                        help="Base SQLite des essais déjà évalués (stratégie resumable)")
+    parser.add_argument('--core-budget', type=int, default=None,
+                        help="Exécute les plis des trois familles sur un pool commun limité à ce nombre de cœurs")
+    parser.add_argument('--inner-threads', type=int, default=1,
+                        help="Threads internes (BLAS, XGBoost) par ajustement avec --core-budget (défaut: 1)")
+    parser.add_argument('--no-warm-start', dest='warm_start', action='store_false',
+                        help="Ajuste chaque valeur de n_estimators séparément (stratégie resumable / --core-budget)")
+    parser.add_argument('--early-stopping-rounds', type=int, default=None,
+                        help="Arrêt précoce de XGBoost sur une partie de l'entraînement de chaque pli "
+                             "(stratégie resumable / --core-budget)")
+    parser.add_argument('--cv-cache', default=DEFAULT_CV_CACHE,
+                        help="Répertoire des données de CV mappées et des plis normalisés (stratégie resumable / --core-budget)")
+    parser.add_argument('--until', choices=STAGES, default=STAGES[-1],
+                        help=f"Dernière étape à exécuter (défaut: {STAGES[-1]})")
+    parser.add_argument('--force', nargs='+', choices=STAGES, default=[],
+                        help="Étapes à recalculer même si elles sont en cache")
+    parser.add_argument('--stage-cache', default=DEFAULT_STAGE_CACHE,
+                        help=f"Répertoire du cache des étapes (défaut: {DEFAULT_STAGE_CACHE})")
+    parser.add_argument('--no-cache', action='store_true', help="Désactive le cache des étapes")
+    parser.add_argument('--timings', default=DEFAULT_TIMINGS_PATH,
+                        help=f"Fichier JSON des durées par étape (défaut: {DEFAULT_TIMINGS_PATH})")
+    parser.add_argument('--dpi', type=int, default=300, help="Résolution des graphiques (défaut: 300)")
+    parser.add_argument('--model-path', default=MODEL_PATH, help="Artefact pickle du meilleur modèle")
+    parser.add_argument('--mapped-model-path', nargs='?', const=MAPPED_MODEL_PATH, default=None,
+                        help=f"Écrit aussi l'artefact mappable du meilleur modèle (défaut si l'option est "
+                             f"donnée sans valeur: {MAPPED_MODEL_PATH})")
+    parser.add_argument('--analytics-path', default=BUNDLE_PATH,
+                        help=f"Bundle d'analyse de la page Analyse (défaut: {BUNDLE_PATH})")
+    args = parser.parse_args(argv)
+    if args.core_budget and args.search == 'halving':
+        parser.error("--core-budget s'utilise avec les stratégies grid ou resumable")
+
+    search_options = {
+        'strategy': args.search,
+        'halving_resource': args.halving_resource,
+        'halving_factor': args.halving_factor,
+        'store': TrialStore(args.trial_store) if args.search == 'resumable' else None,
+        'core_budget': args.core_budget,
+        'inner_threads': args.inner_threads,
+        'warm_start': args.warm_start,
+        'early_stopping_rounds': args.early_stopping_rounds,
+        'cv_cache': args.cv_cache
+    }
+    pipeline = TrainingPipeline(
+        data_path=args.data,
+        search_options=search_options,
+        render_options={'dpi': args.dpi},
+        export_options={'model_path': args.model_path, 'mapped_path': args.mapped_model_path},
+        cache=StageCache(args.stage_cache, enabled=not args.no_cache),
+        force=args.force,
+        timings_path=args.timings,
+        bundle_path=args.analytics_path
+    )
+
+    print("Début de l'entraînement des modèles...")
+    outputs = pipeline.run(until=args.until)
+
+    if 'evaluate' in outputs:
+        results = outputs['evaluate']
+        best_model_name, _ = select_best_model(results)
+        print(f"\nMeilleur modèle: {best_model_name}")
+        print(f"R²: {results[best_model_name]['metrics']['r2']:.4f}")
+    if 'export' in outputs:
+        print("Modèle et scalers sauvegardés avec succès!")
+    if 'analytics' in outputs:
+        print(f"Bundle d'analyse écrit dans {args.analytics_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DATA_PATH = os.path.join(ROOT, 'AER_credit_card_data.csv')
+
+@pytest.fixture(scope='session')
+def credit_data():
+    """Jeu de données brut (owner, selfemp et card en 'yes'/'no')"""
+    return pd.read_csv(DATA_PATH)
+
+@pytest.fixture(scope='session')
+def model_path(tmp_path_factory, credit_data):
+    """Artefact pickle d'une petite forêt aléatoire, au schéma de l'artefact livré"""
+    from sklearn.ensemble import RandomForestRegressor
+    from helpers import fit_artifact, label_encoded, write_artifact
+    model = RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0)
+    fitted = fit_artifact(model, label_encoded(credit_data), credit_data['expenditure'])
+    return write_artifact(str(tmp_path_factory.mktemp('model') / 'model.pkl'), *fitted)
+
+@pytest.fixture
+def incomplete_csv(tmp_path, credit_data):
+    """CSV brut de 60 lignes dont la quatrième n'a pas de revenu"""
+    frame = credit_data.drop(columns=['expenditure']).head(60).copy()
+    frame.loc[3, 'income'] = np.nan
+    path = tmp_path / 'clients.csv'
+    frame.to_csv(path, index=False)
+    return str(path)
+
+@pytest.fixture
+def cv_data(credit_data):
+    """CVData en mémoire (3 plis) sur les 300 premières lignes"""
+    from helpers import label_encoded
+    from model_search import CVData
+    X = label_encoded(credit_data).to_numpy(dtype=np.float64)[:300]
+    return CVData(X, credit_data['expenditure'].to_numpy()[:300], cv=3, cache_dir=None)
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / 'trials.sqlite')
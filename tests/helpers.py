@@ -0,0 +1,36 @@
+import pickle
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder, MinMaxScaler, StandardScaler
+from predict_expenditure import CATEGORICAL_COLUMNS
+
+def label_encoded(df):
+    """
+    Features encodées comme l'artefact livré models/best_regression_model.pkl
+    (LabelEncoder : une colonne 0/1 par variable catégorielle, 'card' comprise)
+    """
+    X = df.drop(columns=['expenditure']).copy()
+    for column in CATEGORICAL_COLUMNS:
+        X[column] = LabelEncoder().fit_transform(X[column])
+    return X
+
+def training_encoded(df):
+    """Features encodées par le pipeline d'entraînement (indicatrices owner/selfemp, 'card' retirée)"""
+    from regression_credit_card import encode_features
+    return encode_features(df)[0]
+
+def dummies_encoded(df):
+    """Features encodées par pd.get_dummies sur les trois variables catégorielles, 'card' comprise"""
+    return pd.get_dummies(df.drop(columns=['expenditure']), columns=CATEGORICAL_COLUMNS, dtype=float)
+
+def fit_artifact(model, X, y):
+    """Ajuste les scalers et le modèle comme le pipeline d'entraînement"""
+    scaler_X = StandardScaler().fit(X)
+    scaler_y = MinMaxScaler().fit(np.asarray(y, dtype=np.float64).reshape(-1, 1))
+    model.fit(scaler_X.transform(X), scaler_y.transform(np.asarray(y).reshape(-1, 1)).ravel())
+    return model, scaler_X, scaler_y
+
+def write_artifact(path, model, scaler_X, scaler_y):
+    with open(path, 'wb') as f:
+        pickle.dump({'model': model, 'scaler_X': scaler_X, 'scaler_y': scaler_y}, f)
+    return path
@@ -0,0 +1,67 @@
+import pickle
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from analytics_bundle import (BUNDLE_VERSION, build_bundle, feature_importances, histogram, load_bundle,
+                              save_bundle, segment_aggregates)
+from helpers import training_encoded
+from tree_engine import TreeEnsembleEngine
+
+@pytest.fixture
+def bundle(credit_data):
+    y_true = credit_data['expenditure'].to_numpy()
+    y_pred = y_true * 0.9 + 5
+    return build_bundle(credit_data, y_true, y_pred, {'rmse': 1.0, 'mae': 0.5, 'r2': 0.9},
+                        data_hash='donnees', model_hash='modele', bins=20)
+
+def test_bundle_contents(bundle, credit_data):
+    assert bundle['version'] == BUNDLE_VERSION
+    assert (bundle['scope'], bundle['data_hash'], bundle['model_hash']) == ('test', 'donnees', 'modele')
+    assert bundle['residual_histogram']['counts'].sum() == len(credit_data)
+    assert len(bundle['target_histogram']['edges']) == 21
+    assert set(bundle['segments']) == {'owner', 'selfemp', 'card'}
+    assert 'expenditure' in bundle['correlation'].columns and 'owner' not in bundle['correlation'].columns
+
+def test_segment_aggregates_match_pandas(credit_data):
+    stats = segment_aggregates(credit_data)['owner']
+    groups = credit_data.groupby('owner')['expenditure']
+    np.testing.assert_allclose(stats['mean'], groups.mean().loc[stats.index])
+    np.testing.assert_allclose(stats['median'], groups.median().loc[stats.index])
+    np.testing.assert_allclose(stats['q1'], groups.quantile(0.25).loc[stats.index])
+    assert stats['count'].sum() == len(credit_data)
+    # Moustaches de Tukey : à l'intérieur de [min, max] et des bornes à 1,5 IQR
+    iqr = stats['q3'] - stats['q1']
+    assert (stats['lowerfence'] >= stats['q1'] - 1.5 * iqr).all() and (stats['lowerfence'] >= stats['min']).all()
+    assert (stats['upperfence'] <= stats['q3'] + 1.5 * iqr).all() and (stats['upperfence'] <= stats['max']).all()
+    assert 'absente' not in segment_aggregates(credit_data, segments=['owner', 'absente'])
+
+def test_histogram():
+    result = histogram(np.arange(100), bins=4)
+    np.testing.assert_array_equal(result['counts'], [25, 25, 25, 25])
+
+def test_feature_importances(credit_data):
+    X = training_encoded(credit_data)
+    forest = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, credit_data['expenditure'])
+    importances = feature_importances(forest, X.columns)
+    assert list(importances.columns) == ['Variable', 'Importance']
+    assert importances['Importance'].is_monotonic_increasing
+    # Modèle compilé : importances de l'estimateur d'origine
+    compiled = feature_importances(TreeEnsembleEngine.from_model(forest), X.columns)
+    assert compiled.equals(importances)
+    assert feature_importances(Ridge().fit(X, credit_data['expenditure']), X.columns) is None
+
+def test_save_and_load(tmp_path, bundle):
+    path = str(tmp_path / 'models' / 'bundle.pkl')
+    save_bundle(bundle, path)
+    loaded = load_bundle(path)
+    np.testing.assert_array_equal(loaded['y_pred'], bundle['y_pred'])
+    assert loaded['segments']['owner'].equals(bundle['segments']['owner'])
+
+def test_incompatible_bundles_are_ignored(tmp_path, bundle):
+    path = tmp_path / 'bundle.pkl'
+    assert load_bundle(str(path)) is None
+    path.write_bytes(pickle.dumps(dict(bundle, version=BUNDLE_VERSION + 1)))
+    assert load_bundle(str(path)) is None
+    path.write_bytes(b'tronque')
+    assert load_bundle(str(path)) is None
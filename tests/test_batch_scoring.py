@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+from batch_scoring import (benchmark_workers, count_rows, detect_format, iter_chunks, iter_parallel_scores,
+                           score_chunk, score_file)
+from predict_expenditure import Predictor
+
+@pytest.fixture
+def predictor(model_path):
+    return Predictor(model_path)
+
+def test_detect_format():
+    assert [detect_format(p) for p in ('a.csv', 'a.JSONL', 'a.ndjson', 'a.parquet')] == \
+        ['csv', 'jsonl', 'jsonl', 'parquet']
+    with pytest.raises(ValueError, match='JSON Lines'):
+        detect_format('a.json')
+
+def test_chunks_and_row_count(incomplete_csv):
+    assert [len(chunk) for chunk in iter_chunks(incomplete_csv, chunk_size=25)] == [25, 25, 10]
+    assert count_rows(incomplete_csv) == 60
+
+def test_score_chunk_keeps_incomplete_rows(incomplete_csv, predictor):
+    chunk = pd.read_csv(incomplete_csv)
+    scored, n_incomplete = score_chunk(chunk.copy(), predictor)
+    assert n_incomplete == 1
+    assert np.isnan(scored['predicted_expenditure'][3])
+    complete = chunk.drop(index=3)
+    np.testing.assert_allclose(scored['predicted_expenditure'].drop(index=3), predictor.predict(complete))
+    with pytest.raises(ValueError, match='Colonnes manquantes'):
+        score_chunk(chunk.drop(columns=['age']), predictor)
+
+@pytest.mark.parametrize('output_name', ['scored.csv', 'scored.jsonl'])
+def test_score_file_matches_in_memory_scoring(tmp_path, incomplete_csv, predictor, output_name):
+    output = str(tmp_path / output_name)
+    assert score_file(incomplete_csv, output, chunk_size=16, predictor=predictor, verbose=False) == 60
+    scored = pd.read_csv(output) if output.endswith('.csv') else pd.read_json(output, lines=True)
+    expected, _ = score_chunk(pd.read_csv(incomplete_csv), predictor)
+    assert len(scored) == 60
+    # to_json arrondit à 10 décimales
+    np.testing.assert_allclose(scored['predicted_expenditure'], expected['predicted_expenditure'], atol=1e-9)
+
+def test_empty_input_rewrites_output(tmp_path, incomplete_csv, predictor):
+    output = tmp_path / 'scored.csv'
+    output.write_text('résultat précédent\n')
+    header_only = tmp_path / 'empty.csv'
+    header_only.write_text(open(incomplete_csv).readline())
+    assert score_file(str(header_only), str(output), predictor=predictor, verbose=False) == 0
+    assert output.read_text().strip().split(',')[-1] == 'predicted_expenditure'
+    assert pd.read_csv(output).empty
+
+    empty_jsonl = tmp_path / 'empty.jsonl'
+    empty_jsonl.write_text('')
+    output = tmp_path / 'scored.jsonl'
+    output.write_text('{"ancien": 1}\n')
+    assert score_file(str(empty_jsonl), str(output), predictor=predictor, verbose=False) == 0
+    assert output.read_text() == ''
+
+def test_parquet_input(tmp_path, incomplete_csv, predictor):
+    pytest.importorskip('pyarrow')
+    parquet = str(tmp_path / 'clients.parquet')
+    pd.read_csv(incomplete_csv).to_parquet(parquet, index=False)
+    assert count_rows(parquet) == 60
+    output = str(tmp_path / 'scored.csv')
+    assert score_file(parquet, output, chunk_size=16, predictor=predictor, verbose=False) == 60
+    assert pd.read_csv(output)['predicted_expenditure'].isna().sum() == 1
+
+def test_rejects_json_output(tmp_path, incomplete_csv, predictor):
+    with pytest.raises(ValueError, match='JSON Lines'):
+        score_file(incomplete_csv, str(tmp_path / 'scored.json'), predictor=predictor, verbose=False)
+
+def test_parallel_scores_keep_input_order(incomplete_csv, predictor):
+    chunks = list(iter_chunks(incomplete_csv, chunk_size=7))
+    serial = [score_chunk(chunk.copy(), predictor) for chunk in chunks]
+    parallel = list(iter_parallel_scores(iter(chunks), predictor, workers=2, max_pending=3))
+    assert [n for _, n in parallel] == [n for _, n in serial]
+    for (expected, _), (scored, _) in zip(serial, parallel):
+        pd.testing.assert_frame_equal(scored, expected)
+
+def test_parallel_score_file(tmp_path, incomplete_csv, predictor):
+    serial, parallel = str(tmp_path / 'serial.csv'), str(tmp_path / 'parallel.csv')
+    score_file(incomplete_csv, serial, chunk_size=9, predictor=predictor, verbose=False)
+    assert score_file(incomplete_csv, parallel, chunk_size=9, predictor=predictor, verbose=False, workers=2) == 60
+    pd.testing.assert_frame_equal(pd.read_csv(parallel), pd.read_csv(serial))
+
+def test_benchmark_scores_like_the_workers(incomplete_csv, predictor):
+    # Le débit de référence (1 processus) mesure score_chunk, comme les processus
+    report = benchmark_workers(incomplete_csv, [1, 2], chunk_size=20, predictor=predictor)
+    assert [row['workers'] for row in report] == [1, 2]
+    assert all(row['rows'] == 60 for row in report)
+    assert report[0]['speedup'] == pytest.approx(1.0)
@@ -0,0 +1,24 @@
+from benchmark_training import find_regressions, select_baseline
+
+def _run(threads=1, repeat=1, fit=1.0, scales=(1,)):
+    results = [{'family': 'XGBoost', 'scale': scale, 'fit_wall_time': fit, 'predict_wall_time': 0.1,
+                'peak_rss_mb': 100.0} for scale in scales]
+    return {'threads': threads, 'repeat': repeat, 'results': results}
+
+def test_baseline_has_the_same_settings():
+    comparable = _run(fit=1.0)
+    history = [comparable, _run(threads=4, fit=0.3), _run(repeat=5, fit=0.5)]
+    current = _run(fit=1.1)
+    assert select_baseline(history, current) is comparable
+    assert find_regressions(current['results'], comparable) == []
+
+def test_baseline_shares_a_measurement():
+    comparable = _run(scales=(1, 10))
+    history = [comparable, _run(scales=(100,))]
+    assert select_baseline(history, _run(scales=(10,))) is comparable
+    assert select_baseline(history, _run(scales=(1000,))) is None
+    assert select_baseline([_run(threads=2)], _run()) is None
+
+def test_regression_above_threshold():
+    regressions = find_regressions(_run(fit=1.5)['results'], _run(fit=1.0), threshold=0.2)
+    assert [(r['metric'], r['ratio']) for r in regressions] == [('fit_wall_time', 1.5)]
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import StandardScaler
+from helpers import dummies_encoded, fit_artifact, label_encoded, training_encoded, write_artifact
+from predict_expenditure import REQUIRED_COLUMNS, Featurizer, Predictor, predict_expenditure, prepare_input_data
+
+# Schémas d'artefact pris en charge par le Featurizer
+ENCODINGS = pytest.mark.parametrize('encode', [label_encoded, training_encoded, dummies_encoded],
+                                    ids=['label', 'training', 'dummies'])
+
+@pytest.fixture
+def sample(credit_data):
+    return credit_data.sample(40, random_state=0).reset_index(drop=True)
+
+def _featurizer(X):
+    return Featurizer.from_scaler(StandardScaler().fit(X))
+
+@ENCODINGS
+def test_transform_matches_training_encoding(credit_data, sample, encode):
+    featurizer = _featurizer(encode(credit_data))
+    expected = encode(sample).reindex(columns=featurizer.feature_names, fill_value=0)
+    np.testing.assert_array_equal(featurizer.transform(sample.drop(columns=['expenditure'])),
+                                  expected.to_numpy(dtype=np.float64))
+
+@ENCODINGS
+def test_input_formats_agree(credit_data, sample, encode):
+    featurizer = _featurizer(encode(credit_data))
+    raw = sample[featurizer.raw_columns]
+    expected = featurizer.transform(raw)
+    records = raw.to_dict('records')
+    np.testing.assert_array_equal(featurizer.transform(records), expected)
+    np.testing.assert_array_equal(featurizer.transform(raw.to_numpy(dtype=object)), expected)
+    for i, record in enumerate(records[:5]):
+        np.testing.assert_array_equal(featurizer.transform(record)[0], expected[i])
+
+def test_label_encoded_columns(credit_data):
+    featurizer = _featurizer(label_encoded(credit_data))
+    assert featurizer.feature_names == [c for c in credit_data.columns if c != 'expenditure']
+    assert featurizer.raw_columns == REQUIRED_COLUMNS + ['card']
+    record = dict(credit_data.iloc[0].drop('expenditure'), owner='Oui', selfemp='Non')
+    row = featurizer.transform(record)[0]
+    names = featurizer.feature_names
+    assert row[names.index('owner')] == 1.0
+    assert row[names.index('selfemp')] == 0.0
+
+def test_training_schema_columns(credit_data):
+    featurizer = _featurizer(training_encoded(credit_data))
+    assert featurizer.raw_columns == REQUIRED_COLUMNS
+    assert featurizer.feature_names[-4:] == ['owner_no', 'owner_yes', 'selfemp_no', 'selfemp_yes']
+    # 'card' n'est pas une feature du pipeline d'entraînement : fournie ou non, elle est ignorée
+    record = dict(credit_data.iloc[0].drop('expenditure'))
+    without_card = {k: v for k, v in record.items() if k != 'card'}
+    np.testing.assert_array_equal(featurizer.transform(record), featurizer.transform(without_card))
+
+def test_dummies_do_not_depend_on_batch(credit_data):
+    # pd.get_dummies sur un seul enregistrement ne produirait que owner_yes
+    featurizer = _featurizer(dummies_encoded(credit_data))
+    record = dict(credit_data.iloc[0].drop(['expenditure', 'card']), owner='yes', selfemp='no')
+    row = dict(zip(featurizer.feature_names, featurizer.transform(record)[0]))
+    assert (row['owner_no'], row['owner_yes']) == (0.0, 1.0)
+    assert (row['selfemp_no'], row['selfemp_yes']) == (1.0, 0.0)
+    # 'card' absente : codée 0 ('no'), comme le reindex(fill_value=0) de l'application
+    assert (row['card_no'], row['card_yes']) == (1.0, 0.0)
+
+def test_invalid_input(credit_data):
+    featurizer = _featurizer(label_encoded(credit_data))
+    record = dict(credit_data.iloc[0].drop('expenditure'))
+    with pytest.raises(ValueError, match='Colonnes manquantes'):
+        featurizer.transform({k: v for k, v in record.items() if k != 'age'})
+    with pytest.raises(ValueError, match='Valeur inconnue'):
+        featurizer.transform(dict(record, owner='maybe'))
+    with pytest.raises(ValueError, match='valeurs manquantes'):
+        featurizer.transform(pd.DataFrame([dict(record, income=np.nan)]))
+
+def test_out_buffer_is_reused(credit_data, sample):
+    featurizer = _featurizer(label_encoded(credit_data))
+    out = np.empty((len(sample), featurizer.n_features))
+    assert featurizer.transform(sample, out=out) is out
+    with pytest.raises(ValueError, match='Matrice de sortie'):
+        featurizer.transform(sample, out=out[:-1])
+
+@pytest.mark.parametrize('encode', [label_encoded, training_encoded], ids=['label', 'training'])
+def test_predictions_match_the_dataframe_pipeline(tmp_path, credit_data, sample, encode):
+    # Chemin d'origine : encodage pandas réindexé, scaler_X sur le DataFrame, inverse_transform
+    model, scaler_X, scaler_y = fit_artifact(Ridge(), encode(credit_data), credit_data['expenditure'])
+    predictor = Predictor(write_artifact(str(tmp_path / 'model.pkl'), model, scaler_X, scaler_y))
+    X = encode(sample).reindex(columns=scaler_X.feature_names_in_, fill_value=0)
+    expected = scaler_y.inverse_transform(model.predict(scaler_X.transform(X)).reshape(-1, 1)).ravel()
+    raw = sample.drop(columns=['expenditure'])
+    np.testing.assert_allclose(prepare_input_data(raw, predictor.featurizer), X.to_numpy(dtype=np.float64))
+    result = predict_expenditure(raw, predictor)
+    np.testing.assert_allclose(result['predicted_expenditure'], expected, rtol=1e-9, atol=1e-9)
+    pd.testing.assert_frame_equal(result.drop(columns=['predicted_expenditure']), raw)
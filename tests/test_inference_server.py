@@ -0,0 +1,111 @@
+import asyncio
+import json
+import numpy as np
+import pytest
+from inference_server import InferenceServer
+from predict_expenditure import Predictor
+
+def _serve(predictor, scenario, **kwargs):
+    """Démarre le service sur un port libre, exécute ``scenario(port)`` puis l'arrête"""
+    async def main():
+        server = InferenceServer(predictor, **kwargs)
+        server.batcher.start()
+        listener = await asyncio.start_server(server.handle_connection, '127.0.0.1', 0)
+        try:
+            return await scenario(listener.sockets[0].getsockname()[1])
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            await server.batcher.stop()
+    return asyncio.run(main())
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    if headers['content-type'] == 'application/json':
+        body = json.loads(body)
+    return int(status_line.split()[1]), body
+
+async def _exchange(port, raw):
+    """Envoie une requête HTTP brute ; retourne (statut, corps JSON)"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    response = await _read_response(reader)
+    writer.close()
+    return response
+
+def _request(method, path, payload=None):
+    body = b'' if payload is None else json.dumps(payload).encode()
+    return f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+
+@pytest.fixture
+def predictor(model_path):
+    return Predictor(model_path)
+
+@pytest.fixture
+def records(credit_data):
+    return credit_data.drop(columns=['expenditure', 'card']).head(20).to_dict('records')
+
+def test_concurrent_requests_share_micro_batches(predictor, records):
+    async def scenario(port):
+        responses = await asyncio.gather(*(_exchange(port, _request('POST', '/predict', records[i:i + 4]))
+                                           for i in range(0, 20, 4)))
+        return responses, await _exchange(port, _request('GET', '/health'))
+
+    responses, (status, health) = _serve(predictor, scenario, max_wait_ms=50)
+    assert [status for status, _ in responses] == [200] * 5
+    predictions = [value for _, payload in responses for value in payload['predictions']]
+    np.testing.assert_allclose(predictions, predictor.predict(records))
+    assert status == 200
+    assert health['rows'] == 20
+    assert health['batches'] < 5
+
+def test_invalid_request_fails_alone(predictor, records):
+    async def scenario(port):
+        return await asyncio.gather(
+            _exchange(port, _request('POST', '/predict', records[0])),
+            _exchange(port, _request('POST', '/predict', dict(records[1], owner='peut-être'))),
+            _exchange(port, _request('POST', '/predict', {'instances': records[2:4]})))
+
+    (ok_status, single), (bad_status, error), (batch_status, batch) = _serve(predictor, scenario, max_wait_ms=50)
+    assert (ok_status, bad_status, batch_status) == (200, 400, 200)
+    assert 'Valeur inconnue' in error['error']
+    np.testing.assert_allclose(single['predictions'] + batch['predictions'],
+                               predictor.predict(records[:1] + records[2:4]))
+
+@pytest.mark.parametrize('raw, status', [
+    (_request('GET', '/predict'), 405),
+    (_request('GET', '/inconnue'), 404),
+    (_request('POST', '/predict', []), 400),
+    (b"POST /predict HTTP/1.1\r\nContent-Length: 5\r\n\r\n{nope", 400),
+    (f"POST /predict HTTP/1.1\r\nContent-Length: {20 * 1024 * 1024}\r\n\r\n".encode(), 413),
+    (b"INVALIDE\r\n\r\n", 400),
+])
+def test_error_statuses(predictor, raw, status):
+    assert _serve(predictor, lambda port: _exchange(port, raw))[0] == status
+
+def test_keep_alive_connection(predictor, records):
+    async def scenario(port):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        responses = []
+        for record in records[:3]:
+            writer.write(_request('POST', '/predict', record))
+            await writer.drain()
+            responses.append(await _read_response(reader))
+        writer.close()
+        return responses
+
+    responses = _serve(predictor, scenario)
+    assert [status for status, _ in responses] == [200] * 3
+
+@pytest.mark.parametrize('length', ['abc', '-5', '1.5'])
+def test_invalid_content_length_is_rejected(predictor, length):
+    raw = f"POST /predict HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}".encode()
+    status, payload = _serve(predictor, lambda port: _exchange(port, raw))
+    assert status == 400
+    assert payload == {'error': "Requête invalide"}
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import logging
+import pytest
+from inference_server import InferenceServer
+from instrumentation import HistogramSink, Instrumentation, LogSink, PrometheusSink, STAGES
+from predict_expenditure import Predictor
+
+class RecordingSink:
+    def __init__(self):
+        self.batches = []
+
+    def record(self, stages, total, rows, error=None, labels=None):
+        self.batches.append({'stages': stages, 'total': total, 'rows': rows, 'error': error, 'labels': labels})
+
+@pytest.fixture
+def instrumented(model_path):
+    instrumentation = Instrumentation()
+    sink = instrumentation.add_sink(RecordingSink())
+    return Predictor(model_path, instrumentation=instrumentation), sink
+
+@pytest.fixture
+def records(credit_data):
+    return credit_data.drop(columns=['expenditure']).head(8).to_dict('records')
+
+def test_disabled_without_sinks(model_path, records):
+    instrumentation = Instrumentation()
+    assert instrumentation.start_batch(10) is None
+    sink = instrumentation.add_sink(RecordingSink())
+    instrumentation.remove_sink(sink)
+    assert not instrumentation.enabled
+    Predictor(model_path, instrumentation=instrumentation).predict(records)
+    assert sink.batches == []
+
+def test_raw_and_prepared_paths(instrumented, records):
+    predictor, sink = instrumented
+    predictor.predict(records)
+    raw = sink.batches[-1]
+    assert raw['rows'] == 8 and raw['labels'] == {'path': 'raw'} and raw['error'] is None
+    assert set(raw['stages']) == set(STAGES)
+    assert sum(raw['stages'].values()) <= raw['total']
+
+    predictor.predict_prepared(predictor.featurizer.transform(records))
+    prepared = sink.batches[-1]
+    assert prepared['labels'] == {'path': 'prepared'}
+    assert set(prepared['stages']) == {'load', 'scale', 'predict', 'inverse_transform'}
+    assert len(sink.batches) == 2
+
+def test_errors_are_recorded(instrumented, records):
+    predictor, sink = instrumented
+    with pytest.raises(ValueError):
+        predictor.predict([dict(records[0], owner='peut-être')])
+    assert sink.batches[-1]['error'].startswith('ValueError')
+
+def test_served_rows_are_counted_once(instrumented, records):
+    predictor, sink = instrumented
+
+    async def main():
+        server = InferenceServer(predictor, max_wait_ms=50)
+        server.batcher.start()
+        try:
+            await asyncio.gather(*(server.batcher.predict(records[i:i + 2]) for i in range(0, 8, 2)))
+        finally:
+            await server.batcher.stop()
+        return server.batcher
+
+    batcher = asyncio.run(main())
+    assert [batch['labels'] for batch in sink.batches] == [{'path': 'served'}] * batcher.batches
+    assert sum(batch['rows'] for batch in sink.batches) == 8 == batcher.rows
+
+def test_histograms_and_prometheus_export(tmp_path):
+    sink = PrometheusSink(buckets=(0.001, 0.01))
+    instrumentation = Instrumentation([sink])
+    for rows, duration in ((3, 0.0005), (5, 0.005), (2, 0.05)):
+        sink.record({'predict': duration}, duration, rows)
+    assert sink.quantile('predict', 0.5) == 0.01
+    assert sink.quantile('predict', 1.0) == float('inf')
+    snapshot = sink.snapshot()
+    assert (snapshot['rows'], snapshot['batches'], snapshot['errors']) == (10, 3, 0)
+    assert snapshot['stages']['predict']['count'] == 3
+
+    text = sink.render()
+    assert 'predictor_stage_duration_seconds_bucket{stage="predict",le="0.001"} 1' in text
+    assert 'predictor_stage_duration_seconds_bucket{stage="predict",le="+Inf"} 3' in text
+    assert 'predictor_rows_total 10' in text
+    path = tmp_path / 'metrics.prom'
+    sink.dump(str(path))
+    assert path.read_text() == text
+
+    with instrumentation.start_batch(4, path='raw') as timer:
+        timer.mark('encode')
+    assert sink.batches == 4 and sink.rows == 14
+    sink.reset()
+    assert isinstance(sink, HistogramSink) and sink.snapshot()['batches'] == 0
+
+def test_log_sink(caplog):
+    sink = LogSink()
+    with caplog.at_level(logging.INFO, logger='predictor.metrics'):
+        sink.record({'predict': 0.002}, 0.003, 5, error='ValueError: x', labels={'path': 'raw'})
+    event = json.loads(caplog.records[-1].getMessage())
+    assert event == {'event': 'predict_batch', 'rows': 5, 'total_ms': 3.0, 'stages_ms': {'predict': 2.0},
+                     'path': 'raw', 'error': 'ValueError: x'}
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.svm import SVR
+from helpers import fit_artifact, training_encoded, write_artifact
+from model_artifact import (ALIGNMENT, convert_pickle, is_mapped_artifact, load_artifact, read_arrays,
+                            save_artifact, write_arrays)
+from predict_expenditure import Predictor, load_model_and_scalers
+from tree_engine import TreeEnsembleEngine
+
+xgb = pytest.importorskip('xgboost')
+
+TREE_MODELS = {
+    'random_forest': lambda: RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0),
+    'xgboost': lambda: xgb.XGBRegressor(n_estimators=20, max_depth=4, random_state=0)
+}
+
+@pytest.fixture(params=sorted(TREE_MODELS))
+def tree_artifacts(request, tmp_path, credit_data):
+    """(chemin pickle, chemin mappable) du même modèle d'arbres"""
+    fitted = fit_artifact(TREE_MODELS[request.param](), training_encoded(credit_data), credit_data['expenditure'])
+    pkl_path = write_artifact(str(tmp_path / 'model.pkl'), *fitted)
+    mmap_path = str(tmp_path / 'model.mmap')
+    save_artifact(mmap_path, *fitted)
+    return pkl_path, mmap_path
+
+def test_predictor_serves_mapped_tree_artifact(tree_artifacts, credit_data):
+    pkl_path, mmap_path = tree_artifacts
+    records = credit_data.drop(columns=['expenditure']).head(50)
+    predictor = Predictor(mmap_path)
+    assert isinstance(predictor.components()[0], TreeEnsembleEngine)
+    y_pred = predictor.predict(records)
+    np.testing.assert_allclose(y_pred, Predictor(pkl_path).predict(records), rtol=1e-6, atol=1e-6)
+
+    assert predictor.explainable()
+    explained, base_value, contributions = predictor.explain(records)
+    np.testing.assert_allclose(explained, y_pred, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(base_value + contributions.sum(axis=1), y_pred, atol=1e-6)
+
+@pytest.mark.parametrize('mmap', [True, False], ids=['mmap', 'lecture'])
+def test_arrays_round_trip(tmp_path, mmap):
+    arrays = {'a': np.arange(7, dtype=np.int32), 'b': np.linspace(0, 1, 12).reshape(3, 4),
+              'c': np.array([True, False])}
+    path = str(tmp_path / 'arrays.mmap')
+    write_arrays(path, arrays, {'nom': 'essai'})
+    assert is_mapped_artifact(path)
+    meta, loaded = read_arrays(path, mmap=mmap)
+    assert meta == {'nom': 'essai'}
+    for name, array in arrays.items():
+        np.testing.assert_array_equal(loaded[name], array)
+        assert loaded[name].dtype == array.dtype
+    if mmap:
+        # Vues alignées, en lecture seule, sur le fichier projeté
+        assert all(array.ctypes.data % ALIGNMENT == 0 for array in loaded.values())
+        assert not loaded['b'].flags.writeable
+
+def test_pickle_is_not_a_mapped_artifact(tmp_path, model_path):
+    assert not is_mapped_artifact(model_path)
+    assert not is_mapped_artifact(str(tmp_path / 'absent.mmap'))
+    with pytest.raises(ValueError, match="n'est pas un artefact mappable"):
+        read_arrays(model_path)
+
+@pytest.mark.parametrize('kernel', ['rbf', 'linear', 'poly'])
+def test_svr_round_trip(tmp_path, credit_data, kernel):
+    fitted = fit_artifact(SVR(kernel=kernel, C=1.0), training_encoded(credit_data), credit_data['expenditure'])
+    pkl_path = write_artifact(str(tmp_path / 'svr.pkl'), *fitted)
+    mmap_path = str(tmp_path / 'svr.mmap')
+    convert_pickle(pkl_path, mmap_path)
+    model, scaler_X, _ = load_artifact(mmap_path)
+    X = fitted[1].transform(training_encoded(credit_data).head(100))
+    np.testing.assert_allclose(model.predict(X), fitted[0].predict(X), rtol=1e-9, atol=1e-9)
+    assert scaler_X.feature_names_in_.tolist() == list(fitted[1].feature_names_in_)
+
+    records = credit_data.drop(columns=['expenditure']).head(100)
+    np.testing.assert_allclose(Predictor(mmap_path).predict(records), Predictor(pkl_path).predict(records),
+                               rtol=1e-9, atol=1e-9)
+    assert not Predictor(mmap_path).explainable()
+
+def test_load_model_and_scalers_detects_format(tree_artifacts):
+    pkl_path, mmap_path = tree_artifacts
+    assert type(load_model_and_scalers(mmap_path)[0]) is TreeEnsembleEngine
+    assert type(load_model_and_scalers(pkl_path)[0]).__name__ in ('RandomForestRegressor', 'XGBRegressor')
+
+def test_unsupported_model(tmp_path, credit_data):
+    fitted = fit_artifact(Ridge(), training_encoded(credit_data), credit_data['expenditure'])
+    with pytest.raises(ValueError, match='non pris en charge'):
+        save_artifact(str(tmp_path / 'ridge.mmap'), *fitted)
@@ -0,0 +1,95 @@
+import shutil
+import numpy as np
+import pytest
+import partial_dependence
+from partial_dependence import compute_curves, curves_path, feature_grid, load_or_compute
+from predict_expenditure import Predictor
+
+@pytest.fixture
+def sample(credit_data):
+    return credit_data.drop(columns=['expenditure']).head(120)
+
+@pytest.fixture
+def paths(tmp_path, model_path, sample):
+    """(modèle, données) dans un répertoire propre au test, pour y écrire les courbes"""
+    model = str(tmp_path / 'model.pkl')
+    shutil.copy(model_path, model)
+    data = str(tmp_path / 'data.csv')
+    sample.to_csv(data, index=False)
+    return model, data
+
+@pytest.fixture
+def compute_calls(monkeypatch):
+    calls = []
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return compute_curves(*args, **kwargs)
+    monkeypatch.setattr(partial_dependence, 'compute_curves', counting)
+    return calls
+
+def test_pd_matches_manual_computation(model_path, sample):
+    predictor = Predictor(model_path)
+    curves = compute_curves(predictor, sample, grid_resolution=8, max_rows=None, ice_rows=len(sample))
+    assert curves['n_rows'] == len(sample)
+    assert set(curves['features']) == set(predictor.featurizer.raw_columns)
+    for column in ['income', 'age', 'owner']:
+        feature = curves['features'][column]
+        if feature['categorical']:
+            np.testing.assert_array_equal(feature['grid'], [0, 1])
+            values = ['no', 'yes']
+        else:
+            np.testing.assert_array_equal(feature['grid'], feature_grid(sample[column], grid_resolution=8))
+            values = feature['grid']
+        expected = np.array([predictor.predict(sample.assign(**{column: value})) for value in values])
+        np.testing.assert_allclose(feature['ice'], expected.T, rtol=1e-9, atol=1e-9)
+        # PD : moyenne des courbes ICE
+        np.testing.assert_allclose(feature['pd'], expected.mean(axis=1), rtol=1e-9, atol=1e-9)
+
+def test_ice_and_row_sampling(model_path, sample):
+    curves = compute_curves(Predictor(model_path), sample, max_rows=50, ice_rows=10)
+    assert curves['n_rows'] == 50
+    feature = curves['features']['income']
+    assert feature['ice'].shape == (10, len(feature['grid']))
+    assert len(feature['grid']) <= 20
+
+def test_feature_grid():
+    np.testing.assert_array_equal(feature_grid([3, 1, 1, 2]), [1, 2, 3])
+    grid = feature_grid(np.arange(1000), grid_resolution=5)
+    np.testing.assert_allclose(grid, np.quantile(np.arange(1000), [0.05, 0.275, 0.5, 0.725, 0.95]))
+
+def test_curves_are_cached(paths, compute_calls):
+    model, data = paths
+    first = load_or_compute(model, data, grid_resolution=5, max_rows=None, ice_rows=5)
+    assert curves_path(model) == model.replace('.pkl', '.pdp.pkl')
+    second = load_or_compute(model, data, grid_resolution=5, max_rows=None, ice_rows=5)
+    assert len(compute_calls) == 1
+    np.testing.assert_array_equal(second['features']['income']['pd'], first['features']['income']['pd'])
+    load_or_compute(model, data, grid_resolution=5, max_rows=None, ice_rows=5, force=True)
+    assert len(compute_calls) == 2
+
+@pytest.mark.parametrize('change', [{'ice_rows': 7}, {'random_state': 1}, {'grid_resolution': 6},
+                                    {'max_rows': 60}], ids=['ice_rows', 'random_state', 'grid', 'max_rows'])
+def test_changed_parameters_invalidate_cache(paths, compute_calls, change):
+    model, data = paths
+    params = dict(grid_resolution=5, max_rows=None, ice_rows=5, random_state=0)
+    load_or_compute(model, data, **params)
+    curves = load_or_compute(model, data, **dict(params, **change))
+    assert len(compute_calls) == 2
+    assert all(curves[key] == value for key, value in change.items())
+    # Les courbes recalculées remplacent le fichier
+    load_or_compute(model, data, **dict(params, **change))
+    assert len(compute_calls) == 2
+
+def test_changed_data_invalidates_cache(paths, sample, compute_calls):
+    model, data = paths
+    load_or_compute(model, data, grid_resolution=5, ice_rows=5)
+    sample.head(80).to_csv(data, index=False)
+    assert load_or_compute(model, data, grid_resolution=5, ice_rows=5)['n_rows'] == 80
+    assert len(compute_calls) == 2
+
+def test_corrupt_curves_file_is_recomputed(paths, compute_calls):
+    model, data = paths
+    with open(curves_path(model), 'wb') as f:
+        f.write(b'tronque')
+    assert load_or_compute(model, data, grid_resolution=5, ice_rows=5)['features']
+    assert len(compute_calls) == 1
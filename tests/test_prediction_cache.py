@@ -0,0 +1,122 @@
+import os
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from helpers import fit_artifact, label_encoded, write_artifact
+from prediction_cache import PredictionCache
+from predict_expenditure import Predictor, predict_expenditure
+
+@pytest.fixture
+def artifact(tmp_path, credit_data):
+    def write(model):
+        X = label_encoded(credit_data)
+        path = write_artifact(str(tmp_path / 'model.pkl'), *fit_artifact(model, X, credit_data['expenditure']))
+        # Date de modification distincte à chaque écriture, même dans la même milliseconde
+        stat = os.stat(path)
+        write.mtime_ns = max(stat.st_mtime_ns, getattr(write, 'mtime_ns', 0) + 1_000_000)
+        os.utime(path, ns=(write.mtime_ns, write.mtime_ns))
+        return path
+    return write
+
+@pytest.fixture
+def records(credit_data):
+    return credit_data.drop(columns=['expenditure']).head(30).to_dict('records')
+
+def test_repeated_records_hit_cache(artifact, records):
+    predictor = Predictor(artifact(RandomForestRegressor(n_estimators=10, random_state=0)))
+    cache = PredictionCache()
+    first = cache.predict(records, predictor)
+    np.testing.assert_allclose(first, predictor.predict(records))
+    second = cache.predict(records, predictor)
+    np.testing.assert_array_equal(second, first)
+    stats = cache.stats()
+    assert (stats['misses'], stats['hits'], stats['invalidations']) == (30, 30, 0)
+
+def test_duplicates_are_predicted_once(artifact, records):
+    predictor = Predictor(artifact(Ridge()))
+    cache = PredictionCache()
+    y_pred = cache.predict(records[:5] * 3, predictor)
+    np.testing.assert_allclose(y_pred, np.tile(predictor.predict(records[:5]), 3))
+    assert cache.stats()['entries'] == 5
+
+def test_eviction_is_least_recently_used(artifact, records):
+    predictor = Predictor(artifact(Ridge()))
+    cache = PredictionCache(max_entries=10)
+    cache.predict(records[:10], predictor)
+    cache.predict(records[:1], predictor)
+    cache.predict(records[10:15], predictor)
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions']) == (10, 5)
+    # records[0], relu juste avant, est resté ; records[1] a été évincé
+    cache.predict(records[:2], predictor)
+    assert cache.stats()['hits'] == 2
+
+def test_byte_budget(artifact, records):
+    predictor = Predictor(artifact(Ridge()))
+    cache = PredictionCache(max_bytes=4000)
+    cache.predict(records, predictor)
+    stats = cache.stats()
+    assert 0 < stats['bytes'] <= 4000
+    assert stats['entries'] + stats['evictions'] == len(records)
+
+def test_ttl_expiration(artifact, records, monkeypatch):
+    predictor = Predictor(artifact(Ridge()))
+    cache = PredictionCache(ttl=60)
+    now = [1000.0]
+    monkeypatch.setattr('prediction_cache.time.monotonic', lambda: now[0])
+    cache.predict(records[:3], predictor)
+    now[0] += 30
+    cache.predict(records[:3], predictor)
+    now[0] += 61
+    cache.predict(records[:3], predictor)
+    stats = cache.stats()
+    assert (stats['hits'], stats['expirations'], stats['misses']) == (3, 3, 6)
+
+def test_quantization_shares_entries(artifact, records):
+    predictor = Predictor(artifact(Ridge()))
+    cache = PredictionCache(quantization={'income': 1.0})
+    nearby = [dict(records[0], income=round(records[0]['income']) + 0.1)]
+    rounded = [dict(records[0], income=round(records[0]['income']))]
+    y_pred = cache.predict(nearby, predictor)
+    # Prédiction calculée sur le vecteur quantifié, réutilisée pour les revenus voisins
+    np.testing.assert_allclose(y_pred, predictor.predict(rounded))
+    cache.predict(rounded, predictor)
+    assert cache.stats()['hits'] == 1
+
+def test_predict_expenditure_uses_cache(artifact, credit_data):
+    predictor = Predictor(artifact(Ridge()))
+    cache = PredictionCache()
+    frame = credit_data.drop(columns=['expenditure']).head(10)
+    first = predict_expenditure(frame, predictor, cache)
+    second = predict_expenditure(frame, predictor, cache)
+    np.testing.assert_array_equal(first['predicted_expenditure'], second['predicted_expenditure'])
+    assert cache.stats()['hits'] == 10
+
+def test_new_artifact_invalidates_cache(artifact, records):
+    path = artifact(RandomForestRegressor(n_estimators=10, random_state=0))
+    predictor = Predictor(path)
+    cache = PredictionCache()
+    before = cache.predict(records, predictor)
+    old_hash = predictor.artifact_hash
+
+    artifact(Ridge())
+    after = cache.predict(records, predictor)
+    assert predictor.artifact_hash != old_hash
+    assert cache.stats()['invalidations'] == 1
+    assert cache.stats()['hits'] == 0
+    np.testing.assert_allclose(after, Predictor(path).predict(records))
+    assert not np.allclose(after, before)
+
+def test_same_content_keeps_cache(artifact, records):
+    path = artifact(Ridge())
+    predictor = Predictor(path)
+    cache = PredictionCache()
+    cache.predict(records, predictor)
+    version = predictor.version
+    # Fichier touché sans changement de contenu : ni rechargement ni invalidation
+    os.utime(path, ns=(artifact.mtime_ns + 1_000_000,) * 2)
+    cache.predict(records, predictor)
+    assert predictor.version == version
+    assert cache.stats()['invalidations'] == 0
+    assert cache.stats()['hits'] == len(records)
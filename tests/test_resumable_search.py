@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import GridSearchCV
+from helpers import label_encoded
+from model_search import CVData, ResumableSearchCV, TrialStore
+
+PARAM_GRID = {'n_estimators': [5, 10], 'max_depth': [2, 4]}
+
+def _search(store, **kwargs):
+    return ResumableSearchCV(RandomForestRegressor(random_state=0), PARAM_GRID, store, 'random_forest',
+                             cv=3, n_jobs=1, verbose=0, **kwargs)
+
+def test_completed_trials_are_skipped(cv_data, store_path):
+    store = TrialStore(store_path)
+    first = _search(store).fit(cv_data)
+    store.close()
+
+    # Nouvelle exécution (nouvelle connexion) : tout est repris du stockage
+    store = TrialStore(store_path)
+    search = _search(store)
+    assert search.plan(cv_data) == []
+    search.fit(cv_data)
+    assert search.best_params_ == first.best_params_
+    np.testing.assert_array_equal(search.cv_results_['mean_test_score'], first.cv_results_['mean_test_score'])
+    store.close()
+
+def test_interrupted_search_resumes_missing_trials(cv_data, store_path):
+    store = TrialStore(store_path)
+    reference = _search(store).fit(cv_data)
+    # Interruption simulée : le dernier pli n'a jamais été enregistré
+    store.connection.execute('DELETE FROM trials WHERE fold = 2')
+    store.connection.commit()
+
+    search = _search(store)
+    tasks = search.plan(cv_data)
+    assert {fold for _, _, fold, _ in tasks} == {2}
+    # Un seul ajustement par profondeur, scoré pour chaque n_estimators
+    assert sorted(checkpoints for _, _, _, checkpoints in tasks) == [(5, 10), (5, 10)]
+    search.fit(cv_data)
+    np.testing.assert_allclose(search.cv_results_['mean_test_score'], reference.cv_results_['mean_test_score'])
+    assert search.plan(cv_data) == []
+    store.close()
+
+def test_trials_are_keyed_by_data_and_estimator(cv_data, store_path, credit_data):
+    store = TrialStore(store_path)
+    _search(store).fit(cv_data)
+    # Autres paramètres de base : autre famille d'essais
+    other = ResumableSearchCV(RandomForestRegressor(random_state=1), PARAM_GRID, store, 'random_forest',
+                              cv=3, n_jobs=1, verbose=0)
+    assert len(other.plan(cv_data)) == 6
+    # Autres données : aucun essai repris
+    X = label_encoded(credit_data).to_numpy(dtype=np.float64)[:240]
+    shifted = CVData(X, credit_data['expenditure'].to_numpy()[:240], cv=3, cache_dir=None)
+    assert len(_search(store).plan(shifted)) == 6
+    store.close()
+
+def test_store_round_trip(store_path):
+    store = TrialStore(store_path)
+    store.put('svr', 'cle', '{"C": 1}', 0, 'donnees', -0.5, 1.0, 0.1)
+    store.put('svr', 'cle', '{"C": 1}', 1, 'donnees', -0.7, 1.0, 0.1, n_iterations=12)
+    # Un essai réévalué remplace le précédent
+    store.put('svr', 'cle', '{"C": 1}', 0, 'donnees', -0.4, 1.0, 0.1)
+    store.put('svr', 'autre', '{"C": 1}', 0, 'donnees', -9.0, 1.0, 0.1)
+    assert store.load_trials('cle', 'donnees') == {('{"C": 1}', 0): (-0.4, None), ('{"C": 1}', 1): (-0.7, 12)}
+    assert store.load_scores('cle', 'autres') == {}
+    store.close()
+
+def test_matches_grid_search_on_arrays(cv_data, store_path):
+    # Données en mémoire sans prétraitement : même découpage et mêmes scores que GridSearchCV
+    X, y = np.asarray(cv_data.X), np.asarray(cv_data.y)
+    store = TrialStore(store_path)
+    search = _search(store, warm_start=False).fit(X, y)
+    grid = GridSearchCV(RandomForestRegressor(random_state=0), PARAM_GRID, cv=3,
+                        scoring='neg_mean_squared_error').fit(X, y)
+    assert search.best_params_ == grid.best_params_
+    np.testing.assert_allclose(search.cv_results_['mean_test_score'], grid.cv_results_['mean_test_score'])
+    np.testing.assert_allclose(search.predict(X[:10]), grid.predict(X[:10]))
+    store.close()
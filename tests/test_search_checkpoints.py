@@ -0,0 +1,82 @@
+import sqlite3
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from model_search import ResumableSearchCV, TrialStore, _fit_and_score, validation_split
+
+def _models():
+    xgb = pytest.importorskip('xgboost')
+    return {'random_forest': RandomForestRegressor(max_depth=4, random_state=0),
+            'xgboost': xgb.XGBRegressor(max_depth=3, learning_rate=0.3, random_state=0)}
+
+@pytest.mark.parametrize('family', ['random_forest', 'xgboost'])
+def test_staged_scores_match_independent_fits(cv_data, family):
+    estimator = _models()[family]
+    staged, _, _, _ = _fit_and_score(estimator, {}, cv_data, 1, 'neg_mean_squared_error', checkpoints=(5, 10, 20))
+    independent = [_fit_and_score(estimator, {'n_estimators': n}, cv_data, 1, 'neg_mean_squared_error')[0][0]
+                   for n in (5, 10, 20)]
+    np.testing.assert_allclose(staged, independent, rtol=1e-6)
+
+def test_validation_split_is_reproducible(cv_data):
+    X, y = np.asarray(cv_data.X), np.asarray(cv_data.y)
+    X_fit, y_fit, X_val, y_val = validation_split(X, y)
+    assert (len(X_fit), len(X_val)) == (240, 60)
+    np.testing.assert_array_equal(validation_split(X, y)[2], X_val)
+    # Partition des lignes d'origine
+    rows = {tuple(row) for row in X}
+    assert {tuple(row) for row in np.vstack([X_fit, X_val])} == rows
+
+def test_store_created_before_iterations_is_migrated(store_path):
+    connection = sqlite3.connect(store_path)
+    connection.execute("""
+        CREATE TABLE trials (family TEXT NOT NULL, estimator TEXT NOT NULL, params TEXT NOT NULL,
+                             fold INTEGER NOT NULL, data_hash TEXT NOT NULL, score REAL NOT NULL,
+                             fit_time REAL, score_time REAL, created_at REAL,
+                             PRIMARY KEY (estimator, params, fold, data_hash))
+    """)
+    connection.execute("INSERT INTO trials VALUES ('rf', 'cle', '{}', 0, 'd', -1.0, 0.1, 0.1, 0)")
+    connection.commit()
+    connection.close()
+    store = TrialStore(store_path)
+    assert store.load_trials('cle', 'd') == {('{}', 0): (-1.0, None)}
+    store.put('rf', 'cle', '{}', 1, 'd', -2.0, 0.1, 0.1, n_iterations=7)
+    assert store.load_trials('cle', 'd')[('{}', 1)] == (-2.0, 7)
+    store.close()
+
+def test_early_stopping_refits_with_scored_iterations(cv_data, store_path):
+    xgb = pytest.importorskip('xgboost')
+    store = TrialStore(store_path)
+    search = ResumableSearchCV(xgb.XGBRegressor(learning_rate=0.3, max_depth=3, random_state=0),
+                               {'n_estimators': [200]}, store, 'xgboost', cv=3, n_jobs=1, verbose=0,
+                               early_stopping_rounds=5).fit(cv_data)
+    iterations = [search._iterations[(search._params_keys[0], fold)] for fold in range(3)]
+    assert all(1 <= n <= 200 for n in iterations)
+    assert search.best_estimator_.get_params()['n_estimators'] == max(1, int(round(np.mean(iterations))))
+    # Les essais repris conservent le nombre d'itérations retenu
+    resumed = ResumableSearchCV(xgb.XGBRegressor(learning_rate=0.3, max_depth=3, random_state=0),
+                                {'n_estimators': [200]}, store, 'xgboost', cv=3, n_jobs=1, verbose=0,
+                                early_stopping_rounds=5)
+    assert resumed.plan(cv_data) == []
+    resumed.summarize()
+    assert resumed.refit_params() == search.refit_params()
+    store.close()
+
+def test_early_stopping_without_warm_start(cv_data, store_path):
+    xgb = pytest.importorskip('xgboost')
+    store = TrialStore(store_path)
+
+    def search(warm_start):
+        return ResumableSearchCV(xgb.XGBRegressor(learning_rate=0.3, max_depth=3, random_state=0),
+                                 {'n_estimators': [50, 200]}, store, 'xgboost', cv=3, n_jobs=1, verbose=0,
+                                 warm_start=warm_start, early_stopping_rounds=5)
+
+    unstaged = search(warm_start=False)
+    # Un ajustement arrêté séparément par valeur de n_estimators
+    assert [checkpoints for _, _, _, checkpoints in unstaged.plan(cv_data)] == [None] * 6
+    unstaged.fit(cv_data)
+    for key in unstaged._params_keys:
+        assert all(unstaged._iterations[(key, fold)] <= 200 for fold in range(3))
+    assert unstaged.best_estimator_.get_params()['n_estimators'] == unstaged.refit_params()['n_estimators']
+    # Scores différents de l'ajustement partagé : essais stockés à part
+    assert len(search(warm_start=True).plan(cv_data)) == 3
+    store.close()
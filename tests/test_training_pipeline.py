@@ -0,0 +1,104 @@
+import json
+import pandas as pd
+import pytest
+from predict_expenditure import file_sha256
+from regression_credit_card import StageCache, TrainingPipeline
+
+def _search_key(**search_options):
+    pipeline = TrainingPipeline(search_options=search_options, cache=StageCache(enabled=False), timings_path=None)
+    return StageCache.key('search', pipeline._search_params())
+
+@pytest.mark.parametrize('strategy_options', [{'strategy': 'resumable'}, {'strategy': 'grid', 'core_budget': 4}])
+def test_warm_start_is_part_of_the_search_key(strategy_options):
+    assert _search_key(**strategy_options, warm_start=False) != _search_key(**strategy_options, warm_start=True)
+    # Valeur par défaut de perform_grid_search
+    assert _search_key(**strategy_options) == _search_key(**strategy_options, warm_start=True)
+
+def test_options_without_effect_are_not_part_of_the_search_key():
+    # GridSearchCV n'utilise ni l'ajustement partagé ni le stockage des essais
+    assert _search_key(strategy='grid', warm_start=False) == _search_key(strategy='grid')
+    assert (_search_key(strategy='resumable', trial_store='a.sqlite', core_budget=2)
+            == _search_key(strategy='resumable', trial_store='b.sqlite', core_budget=8))
+
+@pytest.fixture
+def pipeline_factory(tmp_path, credit_data):
+    data_path = tmp_path / 'data.csv'
+    credit_data.to_csv(data_path, index=False)
+
+    def make(**kwargs):
+        return TrainingPipeline(str(data_path), cache=StageCache(str(tmp_path / 'stages')),
+                                timings_path=str(tmp_path / 'timings.json'), **kwargs)
+    make.data_path = data_path
+    return make
+
+def _cached(pipeline):
+    return {row['stage']: row['cached'] for row in pipeline.timings}
+
+def test_second_run_reads_every_stage_from_cache(pipeline_factory):
+    first = pipeline_factory()
+    outputs = first.run(until='scale')
+    assert not any(_cached(first).values())
+    second = pipeline_factory()
+    cached_outputs = second.run(until='scale')
+    assert _cached(second) == {'load': True, 'encode': True, 'split': True, 'scale': True}
+    assert second.keys == first.keys
+    pd.testing.assert_frame_equal(cached_outputs['split']['X_train'], outputs['split']['X_train'])
+    timings = json.loads(open(pipeline_factory.data_path.parent / 'timings.json').read())
+    assert [row['stage'] for row in timings['stages']] == ['load', 'encode', 'split', 'scale']
+
+def test_changed_data_invalidates_downstream_stages(pipeline_factory, credit_data):
+    pipeline_factory().run(until='scale')
+    credit_data.head(500).to_csv(pipeline_factory.data_path, index=False)
+    rerun = pipeline_factory()
+    outputs = rerun.run(until='split')
+    assert not any(_cached(rerun).values())
+    assert len(outputs['split']['X_train']) == 400
+
+def test_forced_stage_recomputes_only_itself(pipeline_factory):
+    pipeline_factory().run(until='scale')
+    forced = pipeline_factory(force=['split'])
+    forced.run(until='scale')
+    # Sortie identique : la clé de l'étape suivante ne change pas
+    assert _cached(forced) == {'load': True, 'encode': True, 'split': False, 'scale': True}
+
+def test_file_outputs_are_checked(tmp_path):
+    pipeline = TrainingPipeline(cache=StageCache(str(tmp_path / 'stages')), timings_path=None)
+    pipeline.keys['source'] = 'empreinte'
+    pipeline.outputs['source'] = None
+    output = tmp_path / 'sortie.txt'
+    calls = []
+
+    def compute(_):
+        calls.append(1)
+        output.write_text('résultat')
+        return {str(output): file_sha256(str(output))}
+
+    for _ in range(2):
+        pipeline._stage('export', {}, ['source'], compute, outputs_are_files=True)
+    assert len(calls) == 1
+    # Fichier supprimé : l'étape est recalculée malgré le cache
+    output.unlink()
+    pipeline._stage('export', {}, ['source'], compute, outputs_are_files=True)
+    assert len(calls) == 2 and output.exists()
+
+def test_stage_cache_entries(tmp_path):
+    cache = StageCache(str(tmp_path))
+    key = StageCache.key('split', {'test_size': 0.2}, ['a'])
+    assert key != StageCache.key('split', {'test_size': 0.3}, ['a'])
+    assert key != StageCache.key('split', {'test_size': 0.2}, ['b'])
+    assert cache.get('split', key) == (False, None)
+    cache.put('split', key, {'valeur': 1})
+    assert cache.get('split', key) == (True, {'valeur': 1})
+    # Entrée corrompue : simple absence
+    with open(cache._path('split', key), 'wb') as f:
+        f.write(b'tronque')
+    assert cache.get('split', key) == (False, None)
+    disabled = StageCache(str(tmp_path), enabled=False)
+    disabled.put('scale', key, 1)
+    assert disabled.get('scale', key) == (False, None)
+
+def test_invalid_stage_names():
+    with pytest.raises(ValueError, match='Étapes inconnues'):
+        TrainingPipeline(force=['inconnue'])
+    with pytest.raises(ValueError, match='Étape inconnue'):
+        TrainingPipeline(cache=StageCache(enabled=False), timings_path=None).run(until='inconnue')
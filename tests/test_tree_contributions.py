@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import StandardScaler
+from helpers import fit_artifact, label_encoded, training_encoded, write_artifact
+from predict_expenditure import Featurizer, Predictor
+from tree_contributions import TreePathExplainer, group_contributions
+from tree_engine import TreeEnsembleEngine
+
+xgb = pytest.importorskip('xgboost')
+
+MODELS = {
+    'random_forest': lambda: RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0),
+    'xgboost': lambda: xgb.XGBRegressor(n_estimators=30, max_depth=4, learning_rate=0.2, random_state=0)
+}
+
+@pytest.fixture(scope='module', params=sorted(MODELS))
+def fitted(request, credit_data):
+    X = label_encoded(credit_data)
+    model, scaler_X, _ = fit_artifact(MODELS[request.param](), X, credit_data['expenditure'])
+    return model, scaler_X.transform(X)
+
+def test_contributions_are_additive(fitted):
+    model, X = fitted
+    explainer = TreePathExplainer.from_model(model)
+    contributions = explainer.contributions(X)
+    assert contributions.shape == X.shape
+    np.testing.assert_allclose(explainer.expected_value + contributions.sum(axis=1), model.predict(X),
+                               rtol=1e-5, atol=1e-6)
+
+def test_table_and_direct_paths_agree(fitted):
+    model, X = fitted
+    engine = TreeEnsembleEngine.from_model(model)
+    direct = TreePathExplainer(engine, table_cells=0).contributions(X[:50])
+    np.testing.assert_allclose(TreePathExplainer(engine).contributions(X[:50]), direct, rtol=1e-9, atol=1e-12)
+
+def test_contributions_match_xgboost(credit_data):
+    X = label_encoded(credit_data)
+    model, scaler_X, _ = fit_artifact(MODELS['xgboost'](), X, credit_data['expenditure'])
+    X = scaler_X.transform(X)
+    expected = model.get_booster().predict(xgb.DMatrix(X), pred_contribs=True, approx_contribs=False)
+    explainer = TreePathExplainer.from_model(model)
+    np.testing.assert_allclose(explainer.contributions(X), expected[:, :-1], atol=1e-5)
+    np.testing.assert_allclose(explainer.expected_value, expected[0, -1], atol=1e-5)
+
+@pytest.fixture
+def records(credit_data):
+    return credit_data.drop(columns=['expenditure']).head(30).to_dict('records')
+
+def _predictor(tmp_path, credit_data, model):
+    fitted = fit_artifact(model, label_encoded(credit_data), credit_data['expenditure'])
+    return Predictor(write_artifact(str(tmp_path / 'model.pkl'), *fitted))
+
+def test_explain_is_additive_in_dollars(tmp_path, credit_data, records):
+    predictor = _predictor(tmp_path, credit_data, RandomForestRegressor(n_estimators=10, random_state=0))
+    assert predictor.explainable()
+    y_pred, base_value, contributions = predictor.explain(records)
+    np.testing.assert_allclose(y_pred, predictor.predict(records), rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(base_value + contributions.sum(axis=1), y_pred, atol=1e-6)
+
+def test_explain_rejects_non_tree_model(tmp_path, credit_data, records):
+    predictor = _predictor(tmp_path, credit_data, Ridge())
+    assert not predictor.explainable()
+    with pytest.raises(ValueError, match='Contributions disponibles uniquement'):
+        predictor.explain(records)
+
+def test_group_contributions_sums_indicators(credit_data):
+    featurizer = Featurizer.from_scaler(StandardScaler().fit(training_encoded(credit_data)))
+    contributions = np.arange(3 * featurizer.n_features, dtype=np.float64).reshape(3, -1)
+    columns, grouped = group_contributions(contributions, featurizer)
+    assert columns == featurizer.raw_columns
+    encoded = dict(zip(featurizer.feature_names, contributions.T))
+    np.testing.assert_array_equal(grouped[:, columns.index('owner')], encoded['owner_no'] + encoded['owner_yes'])
+    np.testing.assert_array_equal(grouped[:, columns.index('income')], encoded['income'])
+    # Regroupement sans perte : la somme par ligne est conservée
+    np.testing.assert_allclose(grouped.sum(axis=1), contributions.sum(axis=1))
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from helpers import fit_artifact, label_encoded
+from tree_engine import TreeEnsembleEngine, float32_thresholds
+
+xgb = pytest.importorskip('xgboost')
+
+MODELS = {
+    'random_forest': lambda: RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0),
+    'xgboost': lambda: xgb.XGBRegressor(n_estimators=30, max_depth=4, learning_rate=0.2, random_state=0)
+}
+
+@pytest.fixture(scope='module', params=sorted(MODELS))
+def fitted(request, credit_data):
+    X = label_encoded(credit_data)
+    model, scaler_X, _ = fit_artifact(MODELS[request.param](), X, credit_data['expenditure'])
+    return model, scaler_X.transform(X)
+
+def _engine(model):
+    engine = TreeEnsembleEngine.from_model(model)
+    # Sans repli sur l'estimateur, quelle que soit la taille du lot
+    engine.fallback_rows = 0
+    return engine
+
+def test_engine_matches_predict(fitted):
+    model, X = fitted
+    engine = _engine(model)
+    expected = model.predict(X)
+    np.testing.assert_allclose(engine.predict(X), expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(engine.predict(X[:1]), expected[:1], rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(engine.predict(X, block_cells=64), expected, rtol=1e-5, atol=1e-6)
+
+def test_values_on_split_thresholds(fitted):
+    # Lignes placées exactement sur les seuils : même branche que la bibliothèque d'origine
+    model, X = fitted
+    engine = _engine(model)
+    # Les feuilles pointent sur elles-mêmes
+    internal = engine.left != np.arange(len(engine.left))
+    rng = np.random.default_rng(0)
+    picks = rng.choice(np.flatnonzero(internal), size=200)
+    X_edge = X[rng.integers(len(X), size=200)].copy()
+    X_edge[np.arange(200), engine.feature[picks]] = engine.threshold[picks]
+    np.testing.assert_allclose(engine.predict(X_edge), model.predict(X_edge), rtol=1e-5, atol=1e-6)
+
+def test_missing_values_follow_xgboost(credit_data):
+    X = label_encoded(credit_data)
+    model, scaler_X, _ = fit_artifact(MODELS['xgboost'](), X, credit_data['expenditure'])
+    X = scaler_X.transform(X)[:100]
+    X[::3, 2] = np.nan
+    X[::5, 3] = np.nan
+    np.testing.assert_allclose(_engine(model).predict(X), model.predict(X), rtol=1e-5, atol=1e-6)
+
+def test_large_batches_fall_back_to_the_estimator(fitted):
+    model, X = fitted
+    engine = TreeEnsembleEngine.from_model(model)
+    assert engine.fallback_rows and len(X) >= engine.fallback_rows
+    np.testing.assert_array_equal(engine.predict(X), np.asarray(model.predict(X), dtype=np.float64))
+
+def test_apply_returns_leaves(fitted):
+    model, X = fitted
+    engine = _engine(model)
+    leaves = engine.apply(X[:50])
+    assert leaves.shape == (50, engine.n_trees)
+    assert (engine.left[leaves] == leaves).all()
+    np.testing.assert_allclose(np.take(engine.value, leaves).sum(axis=1) * engine._leaf_scale + engine.base_score,
+                               engine.predict(X[:50]))
+
+def test_engine_roundtrip_arrays(fitted):
+    model, X = fitted
+    engine = _engine(model)
+    meta, arrays = engine.to_arrays()
+    # Moteur relu depuis ses tableaux (artefact mappable) : sans estimateur d'origine
+    rebuilt = TreeEnsembleEngine(meta, arrays)
+    assert rebuilt.estimator is None
+    np.testing.assert_array_equal(rebuilt.predict(X), engine.predict(X))
+
+def test_float32_thresholds_keep_le_comparisons():
+    threshold = np.array([0.1, 1 / 3, 2.5, -7.3])
+    threshold32 = float32_thresholds(threshold, strict=False)
+    assert (threshold32.astype(np.float64) <= threshold).all()
+    # Pour tout x float32 : x <= t  <=>  x <= t32
+    for t, t32 in zip(threshold, threshold32):
+        x = np.array([np.nextafter(t32, np.float32(-1)), t32, np.nextafter(t32, np.float32(1))], dtype=np.float32)
+        np.testing.assert_array_equal(x.astype(np.float64) <= t, x <= t32)
+
+def test_unsupported_model():
+    with pytest.raises(ValueError, match="non pris en charge"):
+        TreeEnsembleEngine.from_model(object())
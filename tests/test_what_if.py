@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from predict_expenditure import Predictor
+from what_if import SWEEPABLE_COLUMNS, evaluate_grid, feature_columns
+
+@pytest.fixture
+def predictor(model_path):
+    return Predictor(model_path)
+
+@pytest.fixture
+def base(credit_data):
+    return dict(credit_data.iloc[3].drop(['expenditure', 'card']))
+
+def test_grid_matches_row_by_row_predictions(predictor, base):
+    x_values = np.linspace(1.5, 10, 7)
+    y_values = [20, 35, 50, 65]
+    grid = evaluate_grid(base, 'income', x_values, 'age', y_values, predictor=predictor)
+    assert grid.shape == (4, 7)
+    expected = [[predictor.predict(dict(base, income=x, age=y))[0] for x in x_values] for y in y_values]
+    np.testing.assert_allclose(grid, expected, rtol=1e-9, atol=1e-9)
+
+def test_sweepable_columns(predictor):
+    assert 'owner' not in SWEEPABLE_COLUMNS
+    for column in SWEEPABLE_COLUMNS:
+        assert feature_columns(predictor.featurizer, column)
+    with pytest.raises(ValueError, match='non balayable'):
+        feature_columns(predictor.featurizer, 'owner')
+
+def test_same_feature_on_both_axes(predictor, base):
+    with pytest.raises(ValueError, match='différentes'):
+        evaluate_grid(base, 'age', [20, 30], 'age', [40], predictor=predictor)
@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from sklearn.base import clone
+from model_search import _fit_and_score
+
+# Données de validation croisée (CVData) des processus de travail, transmises
+# une seule fois à l'initialisation ; les plis sont lus depuis les fichiers mappés
+_worker_data = None
+
+def _limit_inner_threads(n_threads):
+    """Borne les threads BLAS/OpenMP du processus courant"""
+    os.environ['OMP_NUM_THREADS'] = str(n_threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(n_threads)
+    except ImportError:
+        pass
+
+def _init_search_worker(data, inner_threads):
+    global _worker_data
+    _worker_data = data
+    _limit_inner_threads(inner_threads)
+
+def _cv_task(estimator, params, task_args):
+    start, cpu_start = time.time(), time.process_time()
+    scores, fit_time, score_time, iterations = _fit_and_score(estimator, params, _worker_data, *task_args)
+    return scores, fit_time, score_time, iterations, start, time.time(), time.process_time() - cpu_start
+
+def _refit_task(estimator, params):
+    X, y = _worker_data.full()
+    start, cpu_start = time.time(), time.process_time()
+    model = clone(estimator).set_params(**params).fit(X, y)
+    return model, start, time.time(), time.process_time() - cpu_start
+
+def pin_inner_threads(estimator, n_threads):
+    """Copie de l'estimateur limitée à ``n_threads`` threads internes (n_jobs / nthread XGBoost)"""
+    estimator = clone(estimator)
+    if 'n_jobs' in estimator.get_params():
+        estimator.set_params(n_jobs=n_threads)
+    return estimator
+
+def estimate_task_cost(estimator, params):
+    """
+    Coût relatif approximatif d'un ajustement, utilisé uniquement pour
+    ordonner les tâches (les plus longues d'abord)
+
+    Ordres de grandeur mesurés sur un thread : ~4 ms par arbre de forêt
+    aléatoire, ~0,08 ms par niveau de profondeur et par arbre XGBoost, quelques
+    ms pour un SVR à noyau, proportionnel à C pour le noyau linéaire.
+    """
+    config = dict(estimator.get_params(), **params)
+    name = type(estimator).__name__
+    if 'n_estimators' in config:
+        n_estimators = config['n_estimators'] or 100
+        if name == 'RandomForestRegressor':
+            return 4.0 * n_estimators
+        return 0.08 * (config.get('max_depth') or 6) * n_estimators
+    if name == 'SVR':
+        return 16.0 * (1.0 + config.get('C', 1.0)) if config.get('kernel') == 'linear' else 5.0
+    return 1.0
+
+def _pool_context():
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+def schedule_searches(searches, data, core_budget=None, inner_threads=1, verbose=True):
+    """
+    Exécute les recherches de plusieurs familles de modèles sur un pool commun
+
+    Toutes les tâches de validation croisée (famille, paramètres, pli ;
+    un ajustement couvre toutes les valeurs de n_estimators en warm start) sont
+    placées dans un seul pool de ``core_budget // inner_threads`` processus,
+    les plus coûteuses d'abord (estimate_task_cost), si bien que les
+    ajustements courts d'une famille comblent la fin des ajustements longs des
+    autres. Chaque processus est limité à ``inner_threads`` threads BLAS,
+    OpenMP et XGBoost : le nombre total de cœurs occupés ne dépasse pas le
+    budget. Le réentraînement du meilleur candidat d'une famille est soumis au
+    pool dès que ses plis sont terminés.
+
+    Parameters:
+    -----------
+    searches : dict
+        ``{famille: ResumableSearchCV}`` (résultats persistés au fil de l'eau)
+    data : CVData
+        Données partagées ; les plis prétraités sont calculés une fois avant
+        le démarrage du pool puis lus par tous les processus
+    core_budget : int, optional
+        Nombre total de cœurs (défaut : tous les cœurs de la machine)
+    inner_threads : int
+        Threads internes par ajustement
+
+    Returns:
+    --------
+    dict
+        Rapport par famille : tâches, temps mural, temps CPU et utilisation
+        des cœurs, plus une entrée 'Total'
+    """
+    core_budget = core_budget or os.cpu_count() or 1
+    inner_threads = max(1, min(inner_threads, core_budget))
+    workers = max(1, core_budget // inner_threads)
+
+    estimators = {name: pin_inner_threads(search.estimator, inner_threads) for name, search in searches.items()}
+    tasks = []
+    for name, search in searches.items():
+        for task in search.plan(data):
+            cost = estimate_task_cost(estimators[name], task[1])
+            tasks.append((cost, name, task))
+    tasks.sort(key=lambda item: item[0], reverse=True)
+    data.prepare()
+
+    remaining = {name: 0 for name in searches}
+    for _, name, _ in tasks:
+        remaining[name] += 1
+    timings = {name: {'tasks': 0, 'start': None, 'end': None, 'cpu': 0.0} for name in searches}
+
+    def account(name, start, end, cpu):
+        timing = timings[name]
+        timing['tasks'] += 1
+        timing['start'] = start if timing['start'] is None else min(timing['start'], start)
+        timing['end'] = end if timing['end'] is None else max(timing['end'], end)
+        timing['cpu'] += cpu
+
+    wall_start = time.time()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(),
+                             initializer=_init_search_worker, initargs=(data, inner_threads)) as pool:
+        pending = {}
+
+        def submit_refit(name):
+            search = searches[name]
+            search.summarize()
+            future = pool.submit(_refit_task, estimators[name], search.refit_params())
+            pending[future] = ('refit', name, None)
+
+        for _, name, task in tasks:
+            future = pool.submit(_cv_task, estimators[name], task[1], searches[name].task_args(task))
+            pending[future] = ('cv', name, task)
+        for name, count in remaining.items():
+            if count == 0:
+                submit_refit(name)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, name, task = pending.pop(future)
+                result = future.result()
+                if kind == 'cv':
+                    searches[name].record(task, result)
+                    account(name, *result[4:])
+                    remaining[name] -= 1
+                    if remaining[name] == 0:
+                        submit_refit(name)
+                else:
+                    model, start, end, cpu = result
+                    # Le modèle final retrouve la configuration de threads d'origine
+                    if 'n_jobs' in model.get_params():
+                        model.set_params(n_jobs=searches[name].estimator.get_params()['n_jobs'])
+                    searches[name].best_estimator_ = model
+                    account(name, start, end, cpu)
+    wall_end = time.time()
+
+    report = {}
+    for name, timing in timings.items():
+        wall = (timing['end'] - timing['start']) if timing['tasks'] else 0.0
+        report[name] = {
+            'tasks': timing['tasks'],
+            'wall_time': wall,
+            'cpu_time': timing['cpu'],
+            'cores_used': timing['cpu'] / wall if wall else 0.0,
+            'utilization': timing['cpu'] / (wall * core_budget) if wall else 0.0
+        }
+    wall = wall_end - wall_start
+    cpu = sum(timing['cpu'] for timing in timings.values())
+    report['Total'] = {
+        'tasks': sum(timing['tasks'] for timing in timings.values()),
+        'wall_time': wall,
+        'cpu_time': cpu,
+        'cores_used': cpu / wall if wall else 0.0,
+        'utilization': cpu / (wall * core_budget) if wall else 0.0
+    }
+    if verbose:
+        print_schedule_report(report, core_budget, workers, inner_threads)
+    return report
+
+def print_schedule_report(report, core_budget, workers, inner_threads):
+    """Affiche le temps mural et l'utilisation des cœurs par famille"""
+    print(f"\nOrdonnancement : budget de {core_budget} cœurs, "
+          f"{workers} processus x {inner_threads} thread(s)")
+    print(f"{'Famille':<15} {'Tâches':>7} {'Mural (s)':>10} {'CPU (s)':>9} {'Cœurs':>6} {'Utilisation':>12}")
+    for name, row in report.items():
+        print(f"{name:<15} {row['tasks']:>7} {row['wall_time']:>10.2f} {row['cpu_time']:>9.2f} "
+              f"{row['cores_used']:>6.2f} {row['utilization']:>11.1%}")
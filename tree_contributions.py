@@ -0,0 +1,258 @@
+import argparse
+import time
+from math import factorial
+import numpy as np
+from tree_engine import TreeEnsembleEngine
+
+# Nombre cible de cellules (ligne, feuille, variable du chemin) traitées à la
+# fois : borne la mémoire des polynômes intermédiaires
+DEFAULT_BLOCK_CELLS = 1 << 22
+
+# Taille maximale (feuilles * motifs * variables) de la table précalculée ;
+# au-delà (forêts profondes), les polynômes sont recalculés à chaque appel
+DEFAULT_TABLE_CELLS = 1 << 22
+
+class TreePathExplainer:
+    """
+    Contributions additives exactes (TreeSHAP, version « path-dependent »)
+    pour les forêts aléatoires et XGBoost aplatis par TreeEnsembleEngine
+
+    Pour chaque feuille, le chemin depuis la racine est résumé une fois pour
+    toutes par variable distincte : intervalle [lo, hi] des valeurs menant à
+    la feuille, fraction de couverture z (produit des rapports de couverture
+    des arêtes) et direction des valeurs manquantes. Pour une ligne, o vaut
+    1 si la valeur de la variable est dans l'intervalle, 0 sinon, et la
+    contribution de la feuille à la variable i est
+
+        v * (o_i - z_i) * somme_s w(s, d) * [t^s] prod_{j != i} (z_j + o_j t)
+
+    avec w(s, d) = s! (d - s - 1)! / d! les poids de Shapley. Le polynôme est
+    construit puis divisé par le facteur de i (opérations EXTEND / UNWIND
+    de TreeSHAP) pour toutes les lignes et toutes les feuilles de tous les
+    arbres à la fois : les seules boucles Python portent sur la profondeur
+    des chemins. Le résultat est identique à l'algorithme récursif
+    d'origine ; la somme des contributions et de ``expected_value`` est la
+    prédiction du modèle.
+
+    Les o_j étant binaires, une feuille de profondeur d n'a que 2^d motifs
+    possibles : si la table (feuille, motif) tient dans ``table_cells``
+    (arbres peu profonds, typiquement XGBoost), elle est calculée une fois
+    et expliquer une ligne se réduit à lire une entrée par feuille.
+
+    Parameters:
+    -----------
+    engine : TreeEnsembleEngine
+        Moteur d'arbres du modèle à expliquer
+    table_cells : int
+        Taille maximale de la table des motifs (0 pour la désactiver)
+    """
+
+    def __init__(self, engine, table_cells=DEFAULT_TABLE_CELLS):
+        self.engine = engine
+        self.n_features = engine.n_features_in_
+        self._strict = engine.meta['comparison'] == 'lt'
+        self._build_paths()
+        self._table = None
+        n_leaves, depth = len(self.leaf_value), self.max_depth
+        if n_leaves * (1 << depth) * depth <= table_cells:
+            # Ligne motif * n_feuilles + feuille
+            self._table = self._leaf_contributions(np.arange(n_leaves << depth))
+
+    @classmethod
+    def from_model(cls, model):
+        """Explicateur d'un TreeEnsembleEngine, d'un RandomForestRegressor ou d'un XGBRegressor"""
+        if not isinstance(model, TreeEnsembleEngine):
+            model = TreeEnsembleEngine.from_model(model)
+        return cls(model)
+
+    def _build_paths(self):
+        engine = self.engine
+        n_features = self.n_features
+        # Parcours niveau par niveau de tous les arbres ; l'état de chaque
+        # nœud de la frontière est celui du chemin qui y mène
+        node = engine.roots.astype(np.int64)
+        lo = np.full((len(node), n_features), -np.inf, dtype=np.float32)
+        hi = np.full((len(node), n_features), np.inf, dtype=np.float32)
+        zero = np.ones((len(node), n_features))
+        missing = np.ones((len(node), n_features), dtype=bool)
+        on_path = np.zeros((len(node), n_features), dtype=bool)
+        leaves = []
+        while len(node):
+            is_leaf = engine.left[node] == node
+            if is_leaf.any():
+                leaves.append((node[is_leaf], lo[is_leaf], hi[is_leaf], zero[is_leaf], missing[is_leaf],
+                               on_path[is_leaf]))
+            keep = ~is_leaf
+            node, lo, hi, zero, missing, on_path = (node[keep], lo[keep], hi[keep], zero[keep], missing[keep],
+                                                    on_path[keep])
+            rows = np.arange(len(node))
+            feature = engine.feature[node]
+            threshold = engine.threshold32[node]
+            missing_left = engine.missing_left[node] == 1
+            children = []
+            for child, go_left in ((engine.left[node], True), (engine.right[node], False)):
+                child_lo, child_hi = lo.copy(), hi.copy()
+                child_zero, child_missing, child_on = zero.copy(), missing.copy(), on_path.copy()
+                if go_left:
+                    child_hi[rows, feature] = np.minimum(hi[rows, feature], threshold)
+                else:
+                    child_lo[rows, feature] = np.maximum(lo[rows, feature], threshold)
+                child_zero[rows, feature] *= engine.cover[child] / engine.cover[node]
+                child_missing[rows, feature] &= missing_left == go_left
+                child_on[rows, feature] = True
+                children.append((child.astype(np.int64), child_lo, child_hi, child_zero, child_missing, child_on))
+            node, lo, hi, zero, missing, on_path = (np.concatenate(parts) for parts in zip(*children))
+
+        leaf, lo, hi, zero, missing, on_path = (np.concatenate(parts) for parts in zip(*leaves))
+        depth = on_path.sum(axis=1)
+        self.max_depth = max(int(depth.max()), 1)
+        # Variables du chemin regroupées en tête, sur max_depth colonnes ;
+        # les colonnes de bourrage (z = 1, o = 0) laissent le polynôme inchangé
+        order = np.argsort(~on_path, axis=1, kind='stable')[:, :self.max_depth]
+        slot_on = np.take_along_axis(on_path, order, axis=1)
+        self.path_feature = np.where(slot_on, order, n_features).astype(np.int64)
+        self.path_lo = np.take_along_axis(lo, order, axis=1)
+        self.path_hi = np.take_along_axis(hi, order, axis=1)
+        self.path_zero = np.where(slot_on, np.take_along_axis(zero, order, axis=1), 1.0)
+        self.path_missing = np.take_along_axis(missing, order, axis=1) & slot_on
+        self.path_on = slot_on
+        self.path_depth = depth
+        self.leaf_value = engine.value[leaf] * engine._leaf_scale
+        # Poids de Shapley w(s, d) de chaque feuille, nuls au-delà de sa profondeur
+        weights = np.zeros((self.max_depth + 1, self.max_depth))
+        for d in range(1, self.max_depth + 1):
+            for s in range(d):
+                weights[d, s] = factorial(s) * factorial(d - s - 1) / factorial(d)
+        self.path_weights = weights[depth]
+        self.expected_value = float((self.leaf_value * self.path_zero.prod(axis=1)).sum() + engine.base_score)
+
+    def contributions(self, X, block_cells=DEFAULT_BLOCK_CELLS):
+        """
+        Contributions de chaque variable à chaque prédiction
+
+        Parameters:
+        -----------
+        X : numpy.ndarray
+            Matrice (n_lignes, n_features) des entrées du modèle (déjà
+            mises à l'échelle)
+
+        Returns:
+        --------
+        numpy.ndarray
+            Matrice (n_lignes, n_features) ; chaque ligne somme à
+            ``prédiction - expected_value``
+        """
+        X = self.engine._as_features(X)
+        out = np.empty((len(X), self.n_features))
+        # Un bloc borne la taille des polynômes (ou des lectures dans la table)
+        step = max(1, block_cells // (len(self.leaf_value) * (self.max_depth + 1)))
+        for start in range(0, len(X), step):
+            out[start:start + step] = self._block_contributions(X[start:start + step])
+        return out
+
+    def _block_contributions(self, X):
+        n_rows, depth = len(X), self.max_depth
+        # Colonne de zéros pour les emplacements de bourrage
+        X = np.concatenate([X, np.zeros((n_rows, 1), dtype=X.dtype)], axis=1)
+        x = np.take(X, self.path_feature, axis=1)
+        if self._strict:
+            one = (x >= self.path_lo) & (x < self.path_hi)
+        else:
+            one = (x > self.path_lo) & (x <= self.path_hi)
+        missing = np.isnan(x)
+        if missing.any():
+            one = np.where(missing, self.path_missing, one)
+        one &= self.path_on
+        # Motif des o de chaque (ligne, feuille), clé motif * n_feuilles + feuille
+        n_leaves = len(self.leaf_value)
+        key = (one.astype(np.intp) @ (1 << np.arange(depth))) * n_leaves + np.arange(n_leaves)
+        if self._table is not None:
+            phi = np.take(self._table, key, axis=0)
+        else:
+            # Chaque couple (feuille, motif) distinct du bloc n'est calculé qu'une fois
+            unique, inverse = np.unique(key, return_inverse=True)
+            phi = self._leaf_contributions(unique)[inverse.ravel()]
+
+        # Somme par variable ; les emplacements de bourrage tombent dans la colonne n_features
+        index = (np.arange(n_rows)[:, np.newaxis] * (self.n_features + 1) + self.path_feature.ravel()).ravel()
+        sums = np.bincount(index, weights=phi.ravel(), minlength=n_rows * (self.n_features + 1))
+        return sums.reshape(n_rows, self.n_features + 1)[:, :self.n_features]
+
+    def _leaf_contributions(self, key):
+        """Contributions (couple, emplacement) pour des clés motif * n_feuilles + feuille"""
+        depth = self.max_depth
+        leaf = key % len(self.leaf_value)
+        one = ((key // len(self.leaf_value))[:, np.newaxis] >> np.arange(depth)) & 1
+        one = (one.astype(bool) & self.path_on[leaf]).astype(np.float64)
+        zero = self.path_zero[leaf]
+        weights = self.path_weights[leaf]
+        value = self.leaf_value[leaf]
+
+        # Coefficients de prod_j (z_j + o_j t), de forme (degré, couple)
+        poly = np.zeros((depth + 1, len(key)))
+        poly[0] = 1.0
+        for j in range(depth):
+            z, o = zero[:, j], one[:, j]
+            for k in range(j + 1, 0, -1):
+                poly[k] = poly[k] * z + poly[k - 1] * o
+            poly[0] *= z
+        # Pour o_i = 0, diviser par z_i revient à une mise à l'échelle
+        weighted = (weights.T * poly[:depth]).sum(axis=0)
+
+        phi = np.empty((len(key), depth))
+        for i in range(depth):
+            z, o = zero[:, i], one[:, i]
+            # Division synthétique par (z_i + t), du degré le plus élevé au plus bas
+            quotient = poly[depth]
+            total = weights[:, depth - 1] * quotient
+            for k in range(depth - 1, 0, -1):
+                quotient = poly[k] - z * quotient
+                total += weights[:, k - 1] * quotient
+            total = np.where(o == 1.0, total, weighted / z)
+            phi[:, i] = value * (o - z) * total
+        return phi
+
+def group_contributions(contributions, featurizer):
+    """
+    Regroupe les contributions des colonnes encodées par variable brute
+    (owner_no et owner_yes -> owner), dans l'ordre de ``featurizer.raw_columns``
+
+    Returns:
+    --------
+    tuple
+        (liste des variables brutes, matrice (n_lignes, n_variables))
+    """
+    columns = [column for column in featurizer.raw_columns
+               if any(source == column for source, _ in featurizer.plan)]
+    grouped = np.zeros((len(contributions), len(columns)))
+    for j, (source, _) in enumerate(featurizer.plan):
+        grouped[:, columns.index(source)] += contributions[:, j]
+    return columns, grouped
+
+def main(argv=None):
+    import pandas as pd
+    from predict_expenditure import MODEL_PATH, Predictor
+
+    parser = argparse.ArgumentParser(description="Contributions des variables aux prédictions d'un modèle d'arbres")
+    parser.add_argument('--model', default=MODEL_PATH, help="Chemin de l'artefact du modèle")
+    parser.add_argument('--data', default='AER_credit_card_data.csv', help="Fichier CSV des clients à expliquer")
+    parser.add_argument('--output', help="Fichier CSV des contributions (une colonne par variable brute)")
+    args = parser.parse_args(argv)
+
+    predictor = Predictor(args.model)
+    data = pd.read_csv(args.data)
+    start = time.perf_counter()
+    y_pred, expected_value, contributions = predictor.explain(data)
+    elapsed = time.perf_counter() - start
+    columns, grouped = group_contributions(contributions, predictor.featurizer)
+    print(f"{len(data):,} lignes expliquées en {elapsed:.2f} s ({len(data) / elapsed:,.0f} lignes/s), "
+          f"valeur de base {expected_value:,.2f} $")
+    if args.output:
+        result = pd.DataFrame(grouped, columns=columns, index=data.index)
+        result.insert(0, 'expected_value', expected_value)
+        result['predicted_expenditure'] = y_pred
+        result.to_csv(args.output, index=False)
+        print(f"Contributions enregistrées dans {args.output}")
+
+if __name__ == "__main__":
+    main()
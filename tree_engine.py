@@ -0,0 +1,251 @@
+import json
+import numpy as np
+
+# Nombre cible de couples (ligne, arbre) traités à la fois : borne la mémoire
+# des matrices de nœuds et garde les accès dans le cache du processeur
+DEFAULT_BLOCK_CELLS = 1 << 16
+
+# Au-delà de ce nombre de lignes, la boucle compilée de la bibliothèque
+# d'origine reste plus rapide que le parcours numpy ; elle est utilisée si
+# l'estimateur est disponible (artefact pickle)
+DEFAULT_FALLBACK_ROWS = 512
+
+def float32_thresholds(threshold, strict):
+    """
+    Seuils float32 équivalents pour des features float32
+
+    Pour ``x <= t`` (sklearn), ``t`` est arrondi vers le bas au float32 le
+    plus proche : la comparaison reste exacte. Les seuils XGBoost (``x < t``)
+    sont déjà des float32.
+    """
+    threshold32 = threshold.astype(np.float32)
+    if not strict:
+        too_high = threshold32.astype(np.float64) > threshold
+        threshold32[too_high] = np.nextafter(threshold32[too_high], np.float32(-np.inf))
+    return threshold32
+
+class TreeEnsembleEngine:
+    """
+    Moteur d'inférence vectorisé pour les forêts aléatoires et XGBoost
+
+    Tous les arbres sont aplatis dans des tableaux contigus (feature, seuil,
+    enfants, valeur de feuille, couverture). Les feuilles pointent sur
+    elles-mêmes, si bien que toutes les lignes descendent tous les arbres en
+    même temps, niveau par niveau : une itération numpy par niveau de
+    profondeur au lieu d'un appel par arbre. Seul numpy est nécessaire, les
+    tableaux pouvant provenir directement d'un artefact mappable.
+
+    Parameters:
+    -----------
+    meta : dict
+        ``family``, ``aggregation`` ('mean' ou 'sum'), ``comparison``
+        ('le' pour sklearn, 'lt' pour XGBoost), ``base_score``, ``n_features``
+    arrays : dict
+        Tableaux ``tree.*`` (voir ``to_arrays``)
+    estimator : object, optional
+        Estimateur d'origine, utilisé pour les très gros lots
+    fallback_rows : int, optional
+        Taille de lot à partir de laquelle ``estimator.predict`` est préféré
+    """
+
+    def __init__(self, meta, arrays, estimator=None, fallback_rows=DEFAULT_FALLBACK_ROWS):
+        self.meta = meta
+        self.family = meta['family']
+        self.n_features_in_ = meta['n_features']
+        self.base_score = float(meta['base_score'])
+        self.estimator = estimator
+        self.fallback_rows = fallback_rows
+        self.feature = arrays['tree.feature']
+        self.threshold = arrays['tree.threshold']
+        self.left = arrays['tree.left']
+        self.right = arrays['tree.right']
+        self.value = arrays['tree.value']
+        self.cover = arrays['tree.cover']
+        self.missing_left = arrays['tree.missing_left']
+        self.roots = arrays['tree.roots']
+        self.depths = arrays['tree.depths']
+        self.n_trees = len(self.roots)
+        self.max_depth = int(self.depths.max()) if self.n_trees else 0
+        self._leaf_scale = 1.0 / self.n_trees if meta['aggregation'] == 'mean' else 1.0
+        self._strict = meta['comparison'] == 'lt'
+        # Tableaux dérivés pour le parcours ; lus depuis l'artefact s'ils y
+        # sont, afin de rester partagés entre processus
+        self.children = arrays.get('tree.children')
+        if self.children is None:
+            # Enfants entrelacés : children[2 * nœud + aller_à_droite]
+            self.children = np.stack([self.left, self.right], axis=1).ravel().astype(np.int32)
+        self.threshold32 = arrays.get('tree.threshold32')
+        if self.threshold32 is None:
+            self.threshold32 = float32_thresholds(self.threshold, self._strict)
+        self._roots32 = self.roots.astype(np.int32)
+        self._feature32 = self.feature.astype(np.int32, copy=False)
+
+    @classmethod
+    def from_model(cls, model):
+        """Aplatit un RandomForestRegressor ou un XGBRegressor entraîné"""
+        name = type(model).__name__
+        if name == 'RandomForestRegressor':
+            meta, arrays = _flatten_random_forest(model)
+        elif name == 'XGBRegressor':
+            meta, arrays = _flatten_xgboost(model)
+        else:
+            raise ValueError(f"Modèle non pris en charge par le moteur d'arbres: {name}")
+        return cls(meta, arrays, estimator=model)
+
+    def to_arrays(self):
+        """Retourne (métadonnées, tableaux) pour la sérialisation"""
+        arrays = {
+            'tree.feature': self.feature, 'tree.threshold': self.threshold,
+            'tree.left': self.left, 'tree.right': self.right,
+            'tree.value': self.value, 'tree.cover': self.cover,
+            'tree.missing_left': self.missing_left,
+            'tree.roots': self.roots, 'tree.depths': self.depths,
+            'tree.children': self.children, 'tree.threshold32': self.threshold32
+        }
+        return dict(self.meta, kind='tree_ensemble'), arrays
+
+    def apply(self, X, block_cells=DEFAULT_BLOCK_CELLS):
+        """
+        Indice de la feuille atteinte par chaque ligne dans chaque arbre
+
+        Returns:
+        --------
+        numpy.ndarray
+            Matrice (n_lignes, n_arbres) d'indices de nœuds globaux
+        """
+        X = self._as_features(X)
+        leaves = np.empty((len(X), self.n_trees), dtype=np.int32)
+        for start, stop in self._blocks(len(X), block_cells):
+            leaves[start:stop] = self._descend(X[start:stop])
+        return leaves
+
+    def predict(self, X, block_cells=DEFAULT_BLOCK_CELLS):
+        """Prédictions identiques à ``model.predict`` (à la précision flottante près)"""
+        if self.estimator is not None and self.fallback_rows and len(X) >= self.fallback_rows:
+            return np.asarray(self.estimator.predict(X), dtype=np.float64)
+        X = self._as_features(X)
+        out = np.empty(len(X))
+        for start, stop in self._blocks(len(X), block_cells):
+            leaves = self._descend(X[start:stop])
+            out[start:stop] = np.take(self.value, leaves).sum(axis=1)
+        return out * self._leaf_scale + self.base_score
+
+    def _as_features(self, X):
+        # Comme sklearn et XGBoost, les features sont comparées en float32
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Matrice de {self.n_features_in_} features attendue, reçu {X.shape}")
+        return X
+
+    def _blocks(self, n_rows, block_cells):
+        step = max(1, block_cells // max(self.n_trees, 1))
+        for start in range(0, n_rows, step):
+            yield start, min(start + step, n_rows)
+
+    def _descend(self, X):
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int32) * n_features)[:, None]
+        node = np.empty((n_rows, self.n_trees), dtype=np.int32)
+        node[:] = self._roots32
+        has_missing = np.isnan(flat_X).any()
+        # np.take est nettement plus rapide que l'indexation avancée
+        for _ in range(self.max_depth):
+            x = np.take(flat_X, row_offsets + np.take(self._feature32, node))
+            threshold = np.take(self.threshold32, node)
+            go_right = x >= threshold if self._strict else x > threshold
+            if has_missing:
+                missing = np.isnan(x)
+                go_right[missing] = np.take(self.missing_left, node[missing]) == 0
+            node = np.take(self.children, 2 * node + go_right)
+        return node
+
+def _flatten_random_forest(model):
+    features, thresholds, lefts, rights, values, covers, missing_left, roots, depths = [], [], [], [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        node_ids = np.arange(n_nodes)
+        is_leaf = tree.children_left == -1
+        # Les feuilles pointent sur elles-mêmes : le parcours s'y stabilise
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        values.append(tree.value.reshape(n_nodes, -1)[:, 0])
+        covers.append(tree.weighted_n_node_samples)
+        missing = getattr(tree, 'missing_go_to_left', None)
+        missing_left.append(np.zeros(n_nodes) if missing is None else missing)
+        roots.append(offset)
+        depths.append(tree.max_depth)
+        offset += n_nodes
+    meta = {'family': 'random_forest', 'aggregation': 'mean', 'comparison': 'le',
+            'base_score': 0.0, 'n_features': int(model.n_features_in_)}
+    return meta, _tree_arrays(features, thresholds, lefts, rights, values, covers, missing_left, roots, depths)
+
+def _parse_base_score(value):
+    return float(str(value).strip('[]').split(',')[0])
+
+def _flatten_xgboost(model):
+    booster = model.get_booster()
+    raw = json.loads(booster.save_raw(raw_format='json'))
+    learner = raw['learner']
+    objective = learner['objective']['name']
+    if objective not in ('reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror', 'reg:quantileerror'):
+        raise ValueError(f"Objectif XGBoost non pris en charge: {objective}")
+    gbm = learner['gradient_booster']
+    if gbm['name'] != 'gbtree':
+        raise ValueError(f"Booster XGBoost non pris en charge: {gbm['name']}")
+    trees = gbm['model']['trees']
+    try:
+        trees = trees[:model.best_iteration + 1]
+    except AttributeError:
+        pass
+
+    features, thresholds, lefts, rights, values, covers, missing_left, roots, depths = [], [], [], [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        left_children = np.asarray(tree['left_children'], dtype=np.int64)
+        right_children = np.asarray(tree['right_children'], dtype=np.int64)
+        n_nodes = len(left_children)
+        node_ids = np.arange(n_nodes)
+        is_leaf = left_children == -1
+        conditions = np.asarray(tree['split_conditions'], dtype=np.float32).astype(np.float64)
+        lefts.append(np.where(is_leaf, node_ids, left_children) + offset)
+        rights.append(np.where(is_leaf, node_ids, right_children) + offset)
+        features.append(np.where(is_leaf, 0, np.asarray(tree['split_indices'], dtype=np.int64)))
+        thresholds.append(np.where(is_leaf, 0.0, conditions))
+        # Pour une feuille, split_conditions contient sa valeur (taux d'apprentissage inclus)
+        values.append(np.where(is_leaf, conditions, 0.0))
+        covers.append(np.asarray(tree['sum_hessian'], dtype=np.float64))
+        missing_left.append(np.asarray(tree['default_left'], dtype=np.uint8))
+        roots.append(offset)
+        depths.append(_tree_depth(left_children, right_children))
+        offset += n_nodes
+    meta = {'family': 'xgboost', 'aggregation': 'sum', 'comparison': 'lt',
+            'base_score': _parse_base_score(learner['learner_model_param']['base_score']),
+            'n_features': int(learner['learner_model_param']['num_feature'])}
+    return meta, _tree_arrays(features, thresholds, lefts, rights, values, covers, missing_left, roots, depths)
+
+def _tree_depth(left_children, right_children):
+    depth, frontier = 0, [0]
+    while True:
+        children = [c for node in frontier for c in (left_children[node], right_children[node]) if c != -1]
+        if not children:
+            return depth
+        depth += 1
+        frontier = children
+
+def _tree_arrays(features, thresholds, lefts, rights, values, covers, missing_left, roots, depths):
+    return {
+        'tree.feature': np.concatenate(features).astype(np.int32),
+        'tree.threshold': np.concatenate(thresholds).astype(np.float64),
+        'tree.left': np.concatenate(lefts).astype(np.int32),
+        'tree.right': np.concatenate(rights).astype(np.int32),
+        'tree.value': np.concatenate(values).astype(np.float64),
+        'tree.cover': np.concatenate(covers).astype(np.float64),
+        'tree.missing_left': np.concatenate(missing_left).astype(np.uint8),
+        'tree.roots': np.asarray(roots, dtype=np.int32),
+        'tree.depths': np.asarray(depths, dtype=np.int32)
+    }
@@ -0,0 +1,54 @@
+import numpy as np
+from predict_expenditure import CATEGORICAL_COLUMNS, REQUIRED_COLUMNS, get_predictor
+
+# Variables numériques pouvant être balayées
+SWEEPABLE_COLUMNS = [col for col in REQUIRED_COLUMNS if col not in CATEGORICAL_COLUMNS]
+
+DEFAULT_RESOLUTION = 200
+
+def feature_columns(featurizer, column):
+    """Indices des colonnes encodées alimentées par la variable brute ``column``"""
+    if column not in SWEEPABLE_COLUMNS:
+        raise ValueError(f"Variable non balayable: {column} (attendu: {SWEEPABLE_COLUMNS})")
+    return [j for j, (source, _) in enumerate(featurizer.plan) if source == column]
+
+def evaluate_grid(base, x_feature, x_values, y_feature, y_values, predictor=None):
+    """
+    Dépense prédite sur une grille de deux variables autour d'un profil de base
+
+    Le profil est encodé une seule fois ; la matrice de la grille
+    (len(y_values) * len(x_values) lignes) est obtenue par recopie de cette
+    ligne puis remplacement des deux colonnes balayées, et passe en un seul
+    appel dans scaler_X, le modèle et scaler_y.
+
+    Parameters:
+    -----------
+    base : dict
+        Enregistrement client (colonnes de prepare_input_data)
+    x_feature, y_feature : str
+        Variables balayées (parmi SWEEPABLE_COLUMNS), distinctes
+    x_values, y_values : array-like
+        Valeurs de chaque axe
+    predictor : Predictor, optional
+        Prédicteur à utiliser (défaut : prédicteur partagé du processus)
+
+    Returns:
+    --------
+    numpy.ndarray
+        Matrice (len(y_values), len(x_values)) des prédictions
+    """
+    if x_feature == y_feature:
+        raise ValueError("Les deux variables balayées doivent être différentes")
+    predictor = predictor or get_predictor()
+    featurizer = predictor.featurizer
+    x_values = np.asarray(x_values, dtype=np.float64)
+    y_values = np.asarray(y_values, dtype=np.float64)
+
+    row = featurizer.transform(base)
+    X = np.repeat(row, len(y_values) * len(x_values), axis=0)
+    # Ligne i * len(x) + j : (y_values[i], x_values[j])
+    for j in feature_columns(featurizer, x_feature):
+        X[:, j] = np.tile(x_values, len(y_values))
+    for j in feature_columns(featurizer, y_feature):
+        X[:, j] = np.repeat(y_values, len(x_values))
+    return predictor.predict_prepared(X).reshape(len(y_values), len(x_values))